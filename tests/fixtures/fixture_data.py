@@ -31,3 +31,13 @@ def few_posts_with_group(mixer, user, group):
     """Return one record with the same author and group."""
     posts = mixer.cycle(20).blend(Post, author=user, group=group)
     return posts[0]
+
+
+@pytest.fixture
+def data_factory(db):
+    """Return a function that fills the database with synthetic data."""
+    from posts.datagen import generate
+
+    def factory(batch_size=1000, seed=0, **sizes):
+        return generate(batch_size=batch_size, seed=seed, **sizes)
+    return factory
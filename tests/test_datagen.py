@@ -0,0 +1,30 @@
+from posts.models import Comment, Follow, Group, Post, User
+
+
+class TestDataFactory:
+
+    def test_data_factory_fills_database(self, data_factory):
+        report = data_factory(
+            users=20, groups=2, posts=50, comments=30, follows=40,
+            batch_size=16,
+        )
+        assert [rows for _, rows, _ in report] == [20, 2, 40, 50, 30], (
+            'Проверьте, что генератор создаёт столько строк, сколько просили'
+        )
+        assert User.objects.count() == 20
+        assert Group.objects.count() == 2
+        assert Follow.objects.count() == 40
+        assert Post.objects.count() == 50
+        assert Comment.objects.count() == 30
+
+    def test_data_factory_is_repeatable(self, data_factory):
+        data_factory(users=5, posts=10, seed=3)
+        texts = list(
+            Post.objects.order_by('pk').values_list('text', flat=True)
+        )
+        Post.objects.all().delete()
+        User.objects.all().delete()
+        data_factory(users=5, posts=10, seed=3)
+        assert list(
+            Post.objects.order_by('pk').values_list('text', flat=True)
+        ) == texts, 'Проверьте, что с тем же seed генерируются те же данные'
@@ -1,5 +1,14 @@
 from django.apps import AppConfig
+from django.conf import settings
+from django.db.backends.signals import connection_created
 
 
 class CoreConfig(AppConfig):
     name = 'core'
+
+    def ready(self):
+        from core.querylog import install_query_logger
+        connection_created.connect(install_query_logger)
+        if settings.TEMPLATES_WARMUP:
+            from core.template_cache import warm_templates
+            warm_templates()
@@ -0,0 +1,155 @@
+import asyncio
+import sys
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import connections
+
+REQUEST_BODY_MEMORY_LIMIT = 1024 * 1024
+
+
+class WsgiToAsgi:
+    """ASGI-обёртка над WSGI-приложением Django.
+
+    Django 2.2 не умеет асинхронные представления, поэтому сами
+    представления выполняются в ограниченном пуле потоков. Чтение тела
+    запроса и отдача ответа медленному клиенту идут в event loop и не
+    занимают поток, так что пул тратится только на работу с БД и шаблонами.
+
+    Ответ-поток (StreamingHttpResponse) читается в собственном потоке от
+    первого куска до close(): ленивые QuerySet и соединения с БД
+    привязаны к потоку, а соединения этого потока закрываются вместе
+    с ответом.
+    """
+
+    def __init__(self, wsgi_application, max_workers=None):
+        self.wsgi_application = wsgi_application
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_workers or settings.ASGI_THREADS,
+            thread_name_prefix='asgi',
+        )
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self.lifespan(receive, send)
+            return
+        if scope['type'] != 'http':
+            raise ValueError(f'Неподдерживаемый тип: {scope["type"]}')
+        body = await self.read_body(receive)
+        loop = asyncio.get_event_loop()
+        status, headers, content, streaming = await loop.run_in_executor(
+            self.executor, self.run_wsgi, self.build_environ(scope, body)
+        )
+        await send({
+            'type': 'http.response.start',
+            'status': status,
+            'headers': headers,
+        })
+        if streaming is None:
+            await send({'type': 'http.response.body', 'body': content})
+            return
+        stream_executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix='asgi-stream'
+        )
+        iterator = iter(streaming)
+        try:
+            while True:
+                chunk = await loop.run_in_executor(
+                    stream_executor, next, iterator, None
+                )
+                if chunk is None:
+                    break
+                if chunk:
+                    await send({
+                        'type': 'http.response.body',
+                        'body': chunk,
+                        'more_body': True,
+                    })
+        finally:
+            await loop.run_in_executor(
+                stream_executor, self.close_streaming, streaming
+            )
+            stream_executor.shutdown(wait=False)
+        await send({'type': 'http.response.body', 'body': b''})
+
+    @staticmethod
+    def close_streaming(streaming):
+        try:
+            streaming.close()
+        finally:
+            connections.close_all()
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                self.executor.shutdown(wait=True)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def read_body(self, receive):
+        body = tempfile.SpooledTemporaryFile(
+            max_size=REQUEST_BODY_MEMORY_LIMIT
+        )
+        while True:
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                break
+            body.write(message.get('body', b''))
+            if not message.get('more_body', False):
+                break
+        body.seek(0)
+        return body
+
+    def build_environ(self, scope, body):
+        server_name, server_port = scope.get('server') or ('localhost', 80)
+        environ = {
+            'REQUEST_METHOD': scope['method'],
+            'SCRIPT_NAME': scope.get('root_path', ''),
+            'PATH_INFO': scope['path'].encode('utf-8').decode('latin-1'),
+            'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+            'SERVER_NAME': server_name,
+            'SERVER_PORT': str(server_port),
+            'SERVER_PROTOCOL': f'HTTP/{scope.get("http_version", "1.1")}',
+            'wsgi.version': (1, 0),
+            'wsgi.url_scheme': scope.get('scheme', 'http'),
+            'wsgi.input': body,
+            'wsgi.errors': sys.stderr,
+            'wsgi.multithread': True,
+            'wsgi.multiprocess': True,
+            'wsgi.run_once': False,
+        }
+        if scope.get('client'):
+            environ['REMOTE_ADDR'] = scope['client'][0]
+            environ['REMOTE_PORT'] = str(scope['client'][1])
+        for name, value in scope.get('headers', []):
+            name = name.decode('latin-1').upper().replace('-', '_')
+            value = value.decode('latin-1')
+            if name not in ('CONTENT_TYPE', 'CONTENT_LENGTH'):
+                name = f'HTTP_{name}'
+            if name in environ:
+                value = f'{environ[name]},{value}'
+            environ[name] = value
+        return environ
+
+    def run_wsgi(self, environ):
+        response = {}
+
+        def start_response(status, headers, exc_info=None):
+            response['status'] = int(status.split(' ', 1)[0])
+            response['headers'] = [
+                (name.lower().encode('latin-1'), value.encode('latin-1'))
+                for name, value in headers
+            ]
+
+        result = self.wsgi_application(environ, start_response)
+        if getattr(result, 'streaming', False):
+            return response['status'], response['headers'], b'', result
+        try:
+            content = b''.join(result)
+        finally:
+            result.close()
+        return response['status'], response['headers'], content, None
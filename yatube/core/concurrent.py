@@ -0,0 +1,116 @@
+import contextvars
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+
+from django.conf import settings
+from django.core.paginator import InvalidPage
+from django.db import connections
+
+_executor = None
+
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.QUERY_EXECUTOR_THREADS,
+            thread_name_prefix='queries',
+        )
+    return _executor
+
+
+def release_connections():
+    """Закрывает сломанные соединения потока, исправные оставляет.
+
+    close_old_connections() при CONN_MAX_AGE = 0 закрывал бы соединение
+    после каждого запроса, а потоку пула оно нужно на всё время жизни.
+    """
+    for connection in connections.all():
+        if connection.connection is None:
+            continue
+        if connection.get_autocommit() != connection.settings_dict[
+            'AUTOCOMMIT'
+        ]:
+            connection.close()
+        elif connection.errors_occurred:
+            if connection.is_usable():
+                connection.errors_occurred = False
+            else:
+                connection.close()
+
+
+def _run_in_worker(func, args, kwargs):
+    # у каждого потока пула своё постоянное соединение с БД
+    try:
+        return func(*args, **kwargs)
+    finally:
+        release_connections()
+
+
+class QueryBatch:
+    """Независимые запросы одного представления.
+
+    Запросы, отправленные через submit(), выполняются параллельно в общем
+    пуле потоков, а выход из блока with ждёт их все. Внутри транзакции
+    другие соединения не видят её данных, поэтому там (и при выключенном
+    пуле) запросы выполняются сразу в текущем потоке.
+    """
+
+    def __init__(self):
+        self.futures = []
+        self.parallel = settings.QUERY_EXECUTOR_THREADS > 0 and not any(
+            connection.in_atomic_block for connection in connections.all()
+        )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        wait(self.futures)
+
+    def submit(self, func, *args, **kwargs):
+        if self.parallel:
+            # контекст (имя представления для core.querylog) — в поток пула
+            future = get_executor().submit(
+                contextvars.copy_context().run,
+                _run_in_worker, func, args, kwargs,
+            )
+        else:
+            future = Future()
+            try:
+                future.set_result(func(*args, **kwargs))
+            except Exception as error:
+                future.set_exception(error)
+        self.futures.append(future)
+        return future
+
+    def page(self, paginator, number):
+        """Запрашивает страницу и общее число объектов одновременно."""
+        try:
+            number = max(int(number), 1)
+        except (TypeError, ValueError):
+            number = 1
+        bottom = (number - 1) * paginator.per_page
+        top = bottom + paginator.per_page
+        count = self.submit(paginator.object_list.count)
+        rows = self.submit(lambda: list(paginator.object_list[bottom:top]))
+        return PageResult(paginator, number, count, rows)
+
+
+class PageResult:
+    def __init__(self, paginator, number, count, rows):
+        self.paginator = paginator
+        self.number = number
+        self.count = count
+        self.rows = rows
+
+    def result(self):
+        paginator = self.paginator
+        paginator.count = self.count.result()
+        try:
+            paginator.validate_number(self.number)
+        except InvalidPage:
+            # номер за пределами ленты: повторяем как Paginator.get_page
+            page = paginator.get_page(self.number)
+            page.object_list = list(page.object_list)
+            return page
+        return paginator._get_page(self.rows.result(), self.number, paginator)
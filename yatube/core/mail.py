@@ -0,0 +1,148 @@
+import logging
+import os
+import pickle
+import time
+import uuid
+
+from django.conf import settings
+from django.core.mail import get_connection
+from django.core.mail.backends.base import BaseEmailBackend
+
+logger = logging.getLogger(__name__)
+
+QUEUE, SENDING, FAILED = 'queue', 'sending', 'failed'
+
+
+def spool_path(*parts):
+    return os.path.join(settings.EMAIL_SPOOL_DIR, *parts)
+
+
+def write_envelope(envelope):
+    """Кладёт письмо в очередь атомарно: пишет во временный файл и
+    переименовывает. Имя начинается со времени следующей попытки и
+    времени записи, поэтому сортировка имён даёт очередь по сроку."""
+    os.makedirs(spool_path(QUEUE), exist_ok=True)
+    name = (
+        f'{envelope["due"]:014.3f}-{time.time_ns()}-{uuid.uuid4().hex}.msg'
+    )
+    temporary = spool_path(QUEUE, f'.{name}.tmp')
+    with open(temporary, 'wb') as file:
+        pickle.dump(envelope, file)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(temporary, spool_path(QUEUE, name))
+    return name
+
+
+class SpoolEmailBackend(BaseEmailBackend):
+    """Вместо отправки складывает письма в локальную очередь на диске.
+
+    Отправляет их команда send_queued_mail через EMAIL_SPOOL_BACKEND.
+    """
+
+    def send_messages(self, email_messages):
+        for message in email_messages:
+            message.connection = None
+            write_envelope({'message': message, 'attempts': 0, 'due': 0})
+        return len(email_messages)
+
+
+def claim_batch(size, now=None):
+    """Забирает в работу до size писем, срок которых подошёл.
+
+    Переименование в каталог sending атомарно, так что одно письмо
+    не возьмут два обработчика. Время изменения файла — время захвата,
+    по нему requeue_stale находит зависшие письма.
+    """
+    now = time.time() if now is None else now
+    os.makedirs(spool_path(SENDING), exist_ok=True)
+    try:
+        names = sorted(
+            name for name in os.listdir(spool_path(QUEUE))
+            if name.endswith('.msg')
+        )
+    except FileNotFoundError:
+        return []
+    claimed = []
+    for name in names:
+        if len(claimed) >= size or float(name.split('-')[0]) > now:
+            break
+        try:
+            os.rename(spool_path(QUEUE, name), spool_path(SENDING, name))
+            # rename сохраняет время записи в очередь
+            os.utime(spool_path(SENDING, name))
+        except FileNotFoundError:
+            continue
+        claimed.append(name)
+    return claimed
+
+
+def requeue_stale(timeout, now=None):
+    """Возвращает в очередь письма, зависшие в sending после сбоя."""
+    now = time.time() if now is None else now
+    try:
+        names = os.listdir(spool_path(SENDING))
+    except FileNotFoundError:
+        return 0
+    requeued = 0
+    for name in names:
+        path = spool_path(SENDING, name)
+        if now - os.path.getmtime(path) > timeout:
+            os.replace(path, spool_path(QUEUE, name))
+            requeued += 1
+    return requeued
+
+
+def retry_or_fail(envelope, error, now):
+    envelope['attempts'] += 1
+    if envelope['attempts'] >= settings.EMAIL_SPOOL_MAX_ATTEMPTS:
+        os.makedirs(spool_path(FAILED), exist_ok=True)
+        name = f'{now:014.3f}-{uuid.uuid4().hex}.msg'
+        with open(spool_path(FAILED, name), 'wb') as file:
+            pickle.dump(envelope, file)
+        logger.error('Письмо не отправлено и отложено в %s: %s', name, error)
+        return
+    delay = settings.EMAIL_SPOOL_RETRY_DELAY * 2 ** (envelope['attempts'] - 1)
+    envelope['due'] = now + delay
+    write_envelope(envelope)
+
+
+def read_envelope(name):
+    with open(spool_path(SENDING, name), 'rb') as file:
+        return pickle.load(file)
+
+
+def send_batch(connection=None, size=None, now=None):
+    """Отправляет одну пачку писем через одно соединение.
+
+    Возвращает (отправлено, отложено до следующей попытки). Если
+    соединение не открылось, откладывается вся пачка.
+    """
+    now = time.time() if now is None else now
+    names = claim_batch(size or settings.EMAIL_SPOOL_BATCH, now)
+    if not names:
+        return 0, 0
+    connection = connection or get_connection(settings.EMAIL_SPOOL_BACKEND)
+    try:
+        connection.open()
+    except Exception as error:
+        for name in names:
+            retry_or_fail(read_envelope(name), error, now)
+            os.remove(spool_path(SENDING, name))
+        return 0, len(names)
+    sent = failed = 0
+    try:
+        for name in names:
+            path = spool_path(SENDING, name)
+            envelope = read_envelope(name)
+            try:
+                connection.send_messages([envelope['message']])
+            except Exception as error:
+                retry_or_fail(envelope, error, now)
+                failed += 1
+            else:
+                sent += 1
+            os.remove(path)
+    finally:
+        connection.close()
+    return sent, failed
@@ -0,0 +1,49 @@
+import time
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.http import HttpResponse
+from django.test import RequestFactory, override_settings
+
+from core.ratelimit import ratelimit
+
+BUDGET_MS = 1
+
+
+class Command(BaseCommand):
+    help = 'Измеряет накладные расходы декоратора ratelimit на один запрос'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=20000)
+
+    def handle(self, *args, **options):
+        total = options['requests']
+        factory = RequestFactory()
+
+        def view(request):
+            return HttpResponse()
+
+        limited = ratelimit('bench', methods=None)(view)
+        requests = []
+        for number in range(total):
+            request = factory.post('/', REMOTE_ADDR=f'10.0.{number % 256}.1')
+            request.user = AnonymousUser()
+            requests.append(request)
+        cache.clear()
+        with override_settings(RATELIMIT_RATES={'bench': f'{total}/h'}):
+            started = time.perf_counter()
+            for request in requests:
+                view(request)
+            plain = time.perf_counter() - started
+            started = time.perf_counter()
+            for request in requests:
+                limited(request)
+            decorated = time.perf_counter() - started
+        overhead_ms = (decorated - plain) / total * 1000
+        self.stdout.write(
+            f'Накладные расходы ratelimit: {overhead_ms * 1000:.1f} мкс '
+            f'на запрос (бюджет {BUDGET_MS} мс)'
+        )
+        if overhead_ms > BUDGET_MS:
+            self.stderr.write('Бюджет превышен')
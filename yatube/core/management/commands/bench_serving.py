@@ -0,0 +1,96 @@
+import asyncio
+import io
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.core.wsgi import get_wsgi_application
+
+from core.asgi import WsgiToAsgi
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает WSGI и ASGI-обёртку при одновременных медленных клиентах'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--path', default='/')
+        parser.add_argument('--clients', type=int, default=50)
+        parser.add_argument('--workers', type=int, default=8)
+        parser.add_argument(
+            '--client-delay',
+            type=float,
+            default=0.2,
+            help='Секунды, которые клиент тратит на отправку и на приём',
+        )
+
+    def handle(self, *args, **options):
+        self.path = options['path']
+        self.delay = options['client_delay']
+        self.adapter = WsgiToAsgi(
+            get_wsgi_application(), max_workers=options['workers']
+        )
+        clients, workers = options['clients'], options['workers']
+        self.report('wsgi', self.run_sync(clients, workers))
+        self.report('asgi', asyncio.run(self.run_async(clients)))
+
+    def scope(self):
+        return {
+            'type': 'http',
+            'method': 'GET',
+            'path': self.path,
+            'query_string': b'',
+            'headers': [(b'host', b'localhost')],
+            'server': ('localhost', 80),
+            'client': ('127.0.0.1', 50000),
+        }
+
+    def run_sync(self, clients, workers):
+        def client(started):
+            # синхронный воркер занят всё время жизни медленного клиента
+            time.sleep(self.delay)
+            environ = self.adapter.build_environ(self.scope(), io.BytesIO())
+            self.adapter.run_wsgi(environ)
+            time.sleep(self.delay)
+            return time.perf_counter() - started
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [
+                executor.submit(client, started) for _ in range(clients)
+            ]
+            latencies = [future.result() for future in futures]
+        return time.perf_counter() - started, latencies
+
+    async def run_async(self, clients):
+        async def client(started):
+            async def receive():
+                await asyncio.sleep(self.delay)
+                return {'type': 'http.request', 'body': b''}
+
+            async def send(message):
+                if (
+                    message['type'] == 'http.response.body'
+                    and not message.get('more_body')
+                ):
+                    await asyncio.sleep(self.delay)
+
+            await self.adapter(self.scope(), receive, send)
+            return time.perf_counter() - started
+
+        started = time.perf_counter()
+        latencies = await asyncio.gather(
+            *(client(started) for _ in range(clients))
+        )
+        return time.perf_counter() - started, latencies
+
+    def report(self, name, result):
+        elapsed, latencies = result
+        latencies = sorted(latencies)
+        self.stdout.write(
+            f'{name}: {len(latencies) / elapsed:.1f} запросов/с, '
+            f'p50 {statistics.median(latencies) * 1000:.0f} мс, '
+            f'p95 {latencies[int(len(latencies) * 0.95) - 1] * 1000:.0f} мс'
+        )
@@ -0,0 +1,69 @@
+import time
+from importlib import import_module
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from core.sessions import flush_pending
+
+ENGINES = (
+    'django.contrib.sessions.backends.db',
+    'django.contrib.sessions.backends.cached_db',
+    'core.sessions',
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает хранилища сессий: сессий в секунду и запросов к БД '
+        'на один запрос пользователя'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sessions', type=int, default=200)
+        parser.add_argument('--requests', type=int, default=10)
+        parser.add_argument(
+            '--write-every', type=int, default=5,
+            help='Каждый N-й запрос меняет сессию',
+        )
+
+    def handle(self, *args, **options):
+        results = {}
+        for engine in ENGINES:
+            results[engine] = self.run(engine, options)
+        baseline = results[ENGINES[0]][1]
+        for engine, (rate, queries) in results.items():
+            self.stdout.write(
+                f'{engine}: {rate:.0f} сессий/с, '
+                f'{queries:.2f} запросов к БД на запрос, '
+                f'сэкономлено {baseline - queries:.2f}'
+            )
+
+    def run(self, engine, options):
+        store_class = import_module(engine).SessionStore
+        cache.clear()
+        keys = []
+        for number in range(options['sessions']):
+            store = store_class()
+            store['_auth_user_id'] = str(number)
+            store.create()
+            keys.append(store.session_key)
+        total = 0
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            for step in range(options['requests']):
+                for key in keys:
+                    store = store_class(key)
+                    store.get('_auth_user_id')
+                    if step % options['write_every'] == 0:
+                        store['last_seen'] = step
+                        store.save()
+                    total += 1
+            if engine == 'core.sessions':
+                flush_pending()
+            elapsed = time.perf_counter() - started
+        for key in keys:
+            store_class(key).delete()
+        return total / elapsed, len(queries) / total
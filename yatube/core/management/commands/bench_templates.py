@@ -0,0 +1,105 @@
+import time
+from datetime import datetime
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.forms import AuthenticationForm
+from django.contrib.auth.models import AnonymousUser
+from django.core.paginator import Paginator
+from django.core.management.base import BaseCommand
+from django.template import Engine, RequestContext
+from django.test import RequestFactory
+from django.utils import timezone
+
+from core.template_cache import template_names
+from posts.forms import CommentForm, PostForm
+from posts.models import Comment, Group, Post
+from users.forms import CreationForm
+
+PREFIXES = ('posts/', 'users/', 'about/', 'core/')
+FORMS = {
+    'posts/post_detail.html': CommentForm,
+    'users/login.html': AuthenticationForm,
+    'users/signup.html': CreationForm,
+}
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        'Измеряет время рендеринга каждой страницы из templates/ '
+        'с разбором шаблонов на каждый запрос и с кешем'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=200)
+
+    def handle(self, *args, **options):
+        iterations = options['iterations']
+        base = Engine.get_default()
+        engines = {
+            'без кеша': self.engine(base, settings.TEMPLATE_LOADERS),
+            'с кешем': self.engine(base, [
+                ('django.template.loaders.cached.Loader',
+                 settings.TEMPLATE_LOADERS),
+            ]),
+        }
+        request = RequestFactory().get('/')
+        request.user = AnonymousUser()
+        self.stdout.write(f'{"шаблон":32} ' + ' '.join(
+            f'{name:>12}' for name in engines
+        ))
+        for name in template_names(PREFIXES, pages_only=True):
+            context = self.context(name)
+            timings = []
+            for engine in engines.values():
+                engine.get_template(name)
+                started = time.perf_counter()
+                for _ in range(iterations):
+                    engine.get_template(name).render(
+                        RequestContext(request, context)
+                    )
+                timings.append(
+                    (time.perf_counter() - started) / iterations * 1000
+                )
+            self.stdout.write(f'{name:32} ' + ' '.join(
+                f'{timing:>9.2f} мс' for timing in timings
+            ))
+
+    def engine(self, base, loaders):
+        return Engine(
+            dirs=base.dirs,
+            loaders=loaders,
+            context_processors=base.context_processors,
+            libraries=base.libraries,
+            builtins=base.builtins[len(Engine.default_builtins):],
+        )
+
+    def context(self, template_name):
+        author = User(pk=1, username='bench', first_name='Автор')
+        group = Group(pk=1, title='Группа', slug='bench', description='...')
+        posts = [
+            Post(
+                pk=number,
+                author=author,
+                group=group,
+                text='Текст поста ' * 20,
+                pub_date=timezone.make_aware(datetime(2023, 1, 1)),
+            )
+            for number in range(1, 11)
+        ]
+        comments = [
+            Comment(pk=number, post=posts[0], author=author, text='Ответ')
+            for number in range(1, 21)
+        ]
+        return {
+            'page_obj': Paginator(posts, 10).get_page(1),
+            'post': posts[0],
+            'author': author,
+            'group': group,
+            'comments': comments,
+            'author_posts_count': len(posts),
+            'form': FORMS.get(template_name, PostForm)(),
+            'path': '/not-found/',
+        }
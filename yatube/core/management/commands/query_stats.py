@@ -0,0 +1,57 @@
+import csv
+import json
+
+from django.core.management.base import BaseCommand
+
+from core.querylog import aggregate, read_stats, reset_stats
+
+GROUPINGS = {
+    'fingerprint': ('fingerprint',),
+    'view': ('view', 'fingerprint'),
+    'origin': ('view', 'origin', 'fingerprint'),
+}
+FIELDS = ('count', 'total_ms', 'max_ms')
+
+
+class Command(BaseCommand):
+    help = (
+        'Выгружает статистику запросов к БД из QUERY_STATS_DIR, '
+        'самые затратные по суммарному времени первыми'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--by',
+            choices=GROUPINGS,
+            default='fingerprint',
+            help='fingerprint — по отпечаткам, view — по представлениям, '
+                 'origin — по представлениям и строкам кода или шаблонов',
+        )
+        parser.add_argument('--limit', type=int, default=20)
+        parser.add_argument(
+            '--format', choices=('text', 'json', 'csv'), default='text'
+        )
+        parser.add_argument(
+            '--reset',
+            action='store_true',
+            help='Удалить статистику после выгрузки',
+        )
+
+    def handle(self, *args, **options):
+        by = GROUPINGS[options['by']]
+        rows = aggregate(read_stats(), by)[:options['limit'] or None]
+        if options['format'] == 'json':
+            self.stdout.write(json.dumps(rows, ensure_ascii=False, indent=2))
+        elif options['format'] == 'csv':
+            writer = csv.DictWriter(self.stdout, fieldnames=by + FIELDS)
+            writer.writeheader()
+            writer.writerows(rows)
+        else:
+            for row in rows:
+                self.stdout.write(
+                    f'{row["total_ms"]:10.1f} мс  {row["count"]:7}  '
+                    f'макс. {row["max_ms"]:8.1f} мс  '
+                    + '  '.join(str(row[field] or '-') for field in by)
+                )
+        if options['reset']:
+            self.stderr.write(f'Удалено файлов: {reset_stats()}')
@@ -0,0 +1,47 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.mail import requeue_stale, send_batch
+
+
+class Command(BaseCommand):
+    help = 'Отправляет письма из очереди EMAIL_SPOOL_DIR пачками'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=settings.EMAIL_SPOOL_BATCH,
+        )
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Не завершаться, а проверять очередь каждые '
+                 'EMAIL_SPOOL_POLL_INTERVAL секунд',
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            requeue_stale(settings.EMAIL_SPOOL_LOCK_TIMEOUT)
+            total_sent = total_failed = 0
+            while True:
+                try:
+                    sent, failed = send_batch(size=options['batch_size'])
+                except Exception as error:
+                    # письма пачки остались в sending, их вернёт
+                    # requeue_stale; цикл отправки не должен падать
+                    self.stderr.write(f'Пачка не отправлена: {error}')
+                    break
+                if not sent and not failed:
+                    break
+                total_sent += sent
+                total_failed += failed
+            if total_sent or total_failed or not options['loop']:
+                self.stdout.write(
+                    f'Отправлено: {total_sent}, отложено: {total_failed}'
+                )
+            if not options['loop']:
+                return
+            time.sleep(settings.EMAIL_SPOOL_POLL_INTERVAL)
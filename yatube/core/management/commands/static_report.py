@@ -0,0 +1,72 @@
+import os
+import re
+
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.management.base import BaseCommand
+from django.test import Client
+from django.urls import reverse
+
+from core.staticfiles import encodings
+
+PAGES = (
+    'posts:index',
+    'about:author',
+    'about:tech',
+    'users:login',
+    'users:signup',
+    'users:password_reset_form',
+)
+ASSET_RE = re.compile(r'(?:href|src)="({}[^"]+)"'.format(
+    re.escape(settings.STATIC_URL)
+))
+
+
+class Command(BaseCommand):
+    help = 'Показывает, сколько байт статики загружает каждая страница'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'urls', nargs='*', help='Адреса страниц, по умолчанию основные'
+        )
+
+    def handle(self, *args, **options):
+        urls = options['urls'] or [reverse(name) for name in PAGES]
+        client = Client()
+        for url in urls:
+            html = client.get(url, HTTP_HOST='localhost').content.decode()
+            assets = sorted(set(ASSET_RE.findall(html)))
+            sizes = [self.asset_sizes(asset) for asset in assets]
+            self.stdout.write(
+                f'{url}: {len(assets)} файлов, '
+                f'{len(html.encode())} байт HTML, '
+                + ', '.join(
+                    f'{encoding} {sum(size[encoding] for size in sizes)}'
+                    for encoding in ('identity', *self.encodings())
+                )
+            )
+            for asset, size in zip(assets, sizes):
+                self.stdout.write(f'    {asset}: {size["identity"]}')
+
+    def encodings(self):
+        return [encoding for encoding, _, _ in encodings()]
+
+    def asset_sizes(self, url):
+        name = url[len(settings.STATIC_URL):]
+        path = (
+            staticfiles_storage.path(name)
+            if staticfiles_storage.exists(name) else finders.find(name)
+        )
+        if not path:
+            self.stderr.write(f'Файл не найден: {url}')
+            return dict.fromkeys(('identity', *self.encodings()), 0)
+        with open(path, 'rb') as file:
+            content = file.read()
+        sizes = {'identity': len(content)}
+        for encoding, suffix, compress in encodings():
+            if os.path.isfile(path + suffix):
+                sizes[encoding] = os.path.getsize(path + suffix)
+            else:
+                sizes[encoding] = min(len(compress(content)), len(content))
+        return sizes
@@ -0,0 +1,157 @@
+import re
+import zlib
+
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+from django.utils.deprecation import MiddlewareMixin
+
+from core.querylog import current_view
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+STRONG_ETAG_RE = re.compile(r'^"[^"]*"$')
+
+
+class GzipCompressor:
+    encoding = 'gzip'
+
+    def __init__(self):
+        # wbits=31 — формат gzip с заголовком и контрольной суммой
+        self.compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+
+    def compress(self, data):
+        return self.compressor.compress(data)
+
+    def flush(self):
+        return self.compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        return self.compressor.flush(zlib.Z_FINISH)
+
+
+class BrotliCompressor:
+    encoding = 'br'
+
+    def __init__(self):
+        self.compressor = brotli.Compressor(quality=5)
+
+    def compress(self, data):
+        return self.compressor.process(data)
+
+    def flush(self):
+        return self.compressor.flush()
+
+    def finish(self):
+        return self.compressor.finish()
+
+
+def get_compressor(accept_encoding):
+    if brotli is not None and re.search(r'\bbr\b', accept_encoding):
+        return BrotliCompressor()
+    if re.search(r'\bgzip\b', accept_encoding):
+        return GzipCompressor()
+    return None
+
+
+def compress_stream(compressor, chunks):
+    # каждый кусок сбрасывается сразу, чтобы клиент получал начало
+    # страницы, пока остальное ещё рендерится
+    for chunk in chunks:
+        data = compressor.compress(chunk) + compressor.flush()
+        if data:
+            yield data
+    yield compressor.finish()
+
+
+class CompressionMiddleware(MiddlewareMixin):
+    """Сжатие ответов gzip или brotli по правилам из настроек.
+
+    Сжимаются только типы из COMPRESSION_CONTENT_TYPES и обычные ответы
+    не короче COMPRESSION_MIN_SIZE байт. Потоковые ответы сжимаются
+    по кускам с flush после каждого.
+    """
+
+    def process_response(self, request, response):
+        if (
+            not settings.COMPRESSION_ENABLED
+            or response.has_header('Content-Encoding')
+        ):
+            return response
+        content_type = response.get('Content-Type', '').split(';')[0].strip()
+        if content_type not in settings.COMPRESSION_CONTENT_TYPES:
+            return response
+        if (
+            not response.streaming
+            and len(response.content) < settings.COMPRESSION_MIN_SIZE
+        ):
+            return response
+        patch_vary_headers(response, ('Accept-Encoding',))
+        compressor = get_compressor(
+            request.META.get('HTTP_ACCEPT_ENCODING', '')
+        )
+        if compressor is None:
+            return response
+        if response.streaming:
+            response.streaming_content = compress_stream(
+                compressor, response.streaming_content
+            )
+            del response['Content-Length']
+        else:
+            compressed = (
+                compressor.compress(response.content) + compressor.finish()
+            )
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response['Content-Length'] = str(len(compressed))
+        etag = response.get('ETag')
+        if etag and STRONG_ETAG_RE.match(etag):
+            response['ETag'] = 'W/' + etag
+        response['Content-Encoding'] = compressor.encoding
+        return response
+
+
+def view_stream(view, chunks):
+    # тело читается уже после выхода из middleware, а при ASGI ещё и
+    # в другом потоке, поэтому представление выставляется на время
+    # каждого куска и сразу сбрасывается
+    chunks = iter(chunks)
+    while True:
+        token = current_view.set(view)
+        try:
+            chunk = next(chunks)
+        except StopIteration:
+            return
+        finally:
+            current_view.reset(token)
+        yield chunk
+
+
+class QueryStatsMiddleware:
+    """Помечает запросы к БД именем представления для core.querylog.
+
+    Запросы из тела потокового ответа тоже помечаются: streaming_content
+    оборачивается в view_stream.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        token = current_view.set(None)
+        try:
+            response = self.get_response(request)
+            view = current_view.get()
+        finally:
+            current_view.reset(token)
+        if response.streaming and view is not None:
+            response.streaming_content = view_stream(
+                view, response.streaming_content
+            )
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        current_view.set(request.resolver_match.view_name)
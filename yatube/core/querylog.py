@@ -0,0 +1,220 @@
+"""Статистика запросов к БД по отпечаткам SQL.
+
+Обёртка выполнения запросов ставится на каждое соединение при его
+создании и, пока включён QUERY_STATS_ENABLED, считает для каждой пары
+(отпечаток, представление, место вызова) число запросов, суммарное и
+максимальное время. Место вызова — строка шаблона, если запрос выполнил
+шаблон (ленивый QuerySet), иначе строка кода проекта. Запросы дольше
+QUERY_SLOW_MS пишутся в лог вместе с планом EXPLAIN.
+
+Каждый процесс раз в QUERY_STATS_FLUSH_INTERVAL секунд и при выходе
+переписывает свой файл в QUERY_STATS_DIR; команда query_stats
+складывает файлы всех процессов.
+"""
+import atexit
+import contextvars
+import json
+import logging
+import os
+import re
+import socket
+import sys
+import threading
+import time
+
+from django.conf import settings
+from django.db import DatabaseError
+
+logger = logging.getLogger(__name__)
+
+LITERAL_RE = re.compile(r"'(?:[^']|'')*'|%s|\b\d+(?:\.\d+)?\b")
+IN_LIST_RE = re.compile(r'\bIN \(\?(?:, \?)*\)')
+
+current_view = contextvars.ContextVar('query_view', default=None)
+
+_stats = {}
+_lock = threading.Lock()
+_flushed_at = time.monotonic()
+_written_path = None
+
+
+def fingerprint(sql):
+    """SQL без литералов: одинаковые запросы с разными значениями и
+    разной длиной списков IN (...) дают один отпечаток."""
+    return IN_LIST_RE.sub('IN (...)', LITERAL_RE.sub('?', sql))
+
+
+def stats_path():
+    return os.path.join(
+        settings.QUERY_STATS_DIR, f'{socket.gethostname()}-{os.getpid()}.json'
+    )
+
+
+def query_origin():
+    """Строка шаблона или кода проекта, откуда пришёл запрос."""
+    frame = sys._getframe(2)
+    code_line = None
+    while frame is not None:
+        node = frame.f_locals.get('self')
+        if frame.f_code.co_name == 'render_annotated' and hasattr(
+            node, 'token'
+        ):
+            return f'{node.origin.template_name}:{node.token.lineno}'
+        path = frame.f_code.co_filename
+        if code_line is None and path.startswith(settings.BASE_DIR) and (
+            path != __file__ and 'site-packages' not in path
+        ):
+            code_line = '{}:{}'.format(
+                os.path.relpath(path, settings.BASE_DIR), frame.f_lineno
+            )
+        frame = frame.f_back
+    return code_line
+
+
+def record(sql, elapsed, view, origin):
+    key = (fingerprint(sql), view, origin)
+    with _lock:
+        row = _stats.get(key)
+        if row is None:
+            _stats[key] = [1, elapsed, elapsed]
+        else:
+            row[0] += 1
+            row[1] += elapsed
+            row[2] = max(row[2], elapsed)
+        due = (
+            time.monotonic() - _flushed_at
+            >= settings.QUERY_STATS_FLUSH_INTERVAL
+        )
+    if due:
+        flush_stats()
+
+
+def flush_stats():
+    """Переписывает файл статистики процесса, возвращает число строк.
+
+    Если файл удалили (query_stats --reset), всё накопленное к этому
+    сбросу отбрасывается и счёт начинается заново.
+    """
+    global _flushed_at, _written_path
+    path = stats_path()
+    with _lock:
+        if _written_path == path and not os.path.exists(path):
+            _stats.clear()
+        rows = [
+            {
+                'fingerprint': sql, 'view': view, 'origin': origin,
+                'count': count, 'total_ms': total, 'max_ms': longest,
+            }
+            for (sql, view, origin), (count, total, longest) in _stats.items()
+        ]
+        _flushed_at = time.monotonic()
+        _written_path = path if rows else None
+    if not rows:
+        return 0
+    os.makedirs(settings.QUERY_STATS_DIR, exist_ok=True)
+    temporary = f'{path}.tmp'
+    with open(temporary, 'w') as file:
+        json.dump(rows, file, ensure_ascii=False)
+    os.replace(temporary, path)
+    return len(rows)
+
+
+@atexit.register
+def flush_at_exit():
+    try:
+        flush_stats()
+    except Exception as error:
+        logger.warning('Статистика запросов не записана: %s', error)
+
+
+def explain(connection, sql, params):
+    # курсор бэкенда в обход обёрток, чтобы EXPLAIN сам не попал в лог
+    cursor = connection.create_cursor()
+    try:
+        cursor.execute(
+            f'{connection.ops.explain_query_prefix()} {sql}', params
+        )
+        return '\n'.join(
+            ' '.join(str(value) for value in row) for row in cursor.fetchall()
+        )
+    finally:
+        cursor.close()
+
+
+def log_slow_query(connection, sql, params, elapsed, view, origin):
+    plan = None
+    if sql.lstrip()[:6].upper() == 'SELECT':
+        try:
+            plan = explain(connection, sql, params)
+        except DatabaseError as error:
+            plan = f'EXPLAIN не выполнен: {error}'
+    logger.warning(
+        'Медленный запрос %.1f мс [%s] %s, %s\n%s\n%s',
+        elapsed, connection.alias, view or '-', origin or '-', sql, plan or '',
+    )
+
+
+def query_logger(execute, sql, params, many, context):
+    if not settings.QUERY_STATS_ENABLED:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        elapsed = (time.perf_counter() - started) * 1000
+        view = current_view.get()
+        origin = query_origin()
+        record(sql, elapsed, view, origin)
+        if elapsed >= settings.QUERY_SLOW_MS:
+            log_slow_query(
+                context['connection'], sql, params, elapsed, view, origin
+            )
+
+
+def install_query_logger(sender, connection, **kwargs):
+    """Обработчик connection_created."""
+    if query_logger not in connection.execute_wrappers:
+        connection.execute_wrappers.append(query_logger)
+
+
+def read_stats(directory=None):
+    """Строки статистики из файлов всех процессов."""
+    directory = directory or settings.QUERY_STATS_DIR
+    if not os.path.isdir(directory):
+        return []
+    rows = []
+    for name in sorted(os.listdir(directory)):
+        if not name.endswith('.json'):
+            continue
+        try:
+            with open(os.path.join(directory, name)) as file:
+                rows.extend(json.load(file))
+        except (OSError, ValueError):
+            # файл процесса переписывается прямо сейчас или удалён
+            continue
+    return rows
+
+
+def aggregate(rows, by=('fingerprint',)):
+    """Складывает строки по полям by, самые затратные первыми."""
+    groups = {}
+    for row in rows:
+        key = tuple(row[field] for field in by)
+        group = groups.setdefault(key, {
+            **dict(zip(by, key)), 'count': 0, 'total_ms': 0.0, 'max_ms': 0.0,
+        })
+        group['count'] += row['count']
+        group['total_ms'] += row['total_ms']
+        group['max_ms'] = max(group['max_ms'], row['max_ms'])
+    return sorted(groups.values(), key=lambda group: -group['total_ms'])
+
+
+def reset_stats(directory=None):
+    directory = directory or settings.QUERY_STATS_DIR
+    removed = 0
+    if os.path.isdir(directory):
+        for name in os.listdir(directory):
+            if name.endswith('.json'):
+                os.remove(os.path.join(directory, name))
+                removed += 1
+    return removed
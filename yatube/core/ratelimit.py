@@ -0,0 +1,84 @@
+import math
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+
+PERIODS = {'s': 1, 'm': 60, 'h': 60 * 60, 'd': 24 * 60 * 60}
+
+
+def parse_rate(rate):
+    """'10/m' -> (10, 60): десять запросов в минутном окне."""
+    capacity, period = rate.split('/')
+    return int(capacity), PERIODS[period]
+
+
+def consume(scope, ident, capacity, period, now=None):
+    """Учитывает запрос в скользящем окне, возвращает примерные секунды
+    до следующего разрешённого запроса, если лимит исчерпан, иначе 0.
+
+    Счётчики ведутся по окнам длиной period секунд, а запросы за
+    последние period секунд оцениваются как счётчик текущего окна плюс
+    счётчик прошлого с весом, который падает от 1 до 0 по ходу текущего.
+    Так на стыке окон не проходит 2 * capacity запросов. cache.incr
+    атомарен в memcached и redis, и лимит там общий для всех процессов;
+    с LocMemCache у каждого процесса свой счётчик и свой лимит.
+    """
+    now = time.time() if now is None else now
+    window, elapsed = divmod(now, period)
+    key = f'ratelimit:{scope}:{ident}:{int(window)}'
+    try:
+        used = cache.incr(key)
+    except ValueError:
+        # счётчик нужен и в следующем окне — как прошлый
+        if cache.add(key, 1, 2 * period + 1):
+            used = 1
+        else:
+            used = cache.incr(key)
+    previous = cache.get(f'ratelimit:{scope}:{ident}:{int(window) - 1}', 0)
+    if previous * (1 - elapsed / period) + used <= capacity:
+        return 0
+    if used < capacity:
+        # вес прошлого окна упадёт настолько, что следующий запрос пройдёт
+        return period * (1 - (capacity - used - 1) / previous) - elapsed
+    return period - elapsed
+
+
+def get_client_ip(request):
+    return request.META.get('REMOTE_ADDR', '')
+
+
+def ratelimit(scope, methods=('POST',)):
+    """Ограничивает частоту запросов к представлению по пользователю и IP.
+
+    Лимит берётся из settings.RATELIMIT_RATES[scope]. При превышении
+    возвращается 429 с заголовком Retry-After.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if (
+                not settings.RATELIMIT_ENABLED
+                or methods and request.method not in methods
+            ):
+                return view(request, *args, **kwargs)
+            capacity, period = parse_rate(settings.RATELIMIT_RATES[scope])
+            idents = [f'ip:{get_client_ip(request)}']
+            if request.user.is_authenticated:
+                idents.append(f'user:{request.user.pk}')
+            retry_after = max(
+                consume(scope, ident, capacity, period) for ident in idents
+            )
+            if retry_after:
+                response = HttpResponse(
+                    'Слишком много запросов, попробуйте позже.',
+                    status=429,
+                    content_type='text/plain; charset=utf-8',
+                )
+                response['Retry-After'] = str(math.ceil(retry_after))
+                return response
+            return view(request, *args, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,142 @@
+import atexit
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.contrib.sessions.backends import cached_db, db
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import DatabaseError
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+_pending = {}
+_lock = threading.Lock()
+_flushed_at = time.monotonic()
+
+
+def flush_pending():
+    """Пишет отложенные изменения сессий в БД одним bulk_update."""
+    global _flushed_at
+    with _lock:
+        sessions = list(_pending.values())
+        _pending.clear()
+        _flushed_at = time.monotonic()
+    if not sessions:
+        return 0
+    try:
+        SessionStore.get_model_class().objects.bulk_update(
+            sessions,
+            ['session_data', 'expire_date'],
+            batch_size=settings.SESSION_WRITE_BEHIND_BATCH,
+        )
+    except Exception:
+        # вернуть в очередь, если сессию не успели изменить ещё раз
+        with _lock:
+            for session in sessions:
+                _pending.setdefault(session.session_key, session)
+        raise
+    return len(sessions)
+
+
+def cache_is_shared(cache):
+    """Видят ли кеш другие процессы.
+
+    Кеш в памяти процесса — нет: выход в одном процессе не удалил бы
+    сессию из кеша других, а другой процесс при промахе прочитал бы
+    из БД устаревшую сессию. С таким кешем сессии хранятся только в БД.
+    """
+    return not isinstance(cache, (LocMemCache, DummyCache))
+
+
+@atexit.register
+def flush_at_exit():
+    try:
+        flush_pending()
+    except Exception as error:
+        logger.warning('Отложенные сессии не записаны: %s', error)
+
+
+class SessionStore(cached_db.SessionStore):
+    """Сессии в кеше с отложенной записью в БД.
+
+    Чтение идёт из кеша, БД — только при промахе. Новые сессии (вход,
+    смена ключа) пишутся сразу, а изменения существующих копятся в
+    процессе и сбрасываются пачкой, когда их набирается
+    SESSION_WRITE_BEHIND_BATCH или прошло SESSION_WRITE_BEHIND_INTERVAL
+    секунд. Кеш и отложенная запись работают только с общим для всех
+    процессов кешем (memcached, redis, файловый); с кешем в памяти
+    процесса хранилище ведёт себя как обычное db.
+    """
+
+    @property
+    def cache_shared(self):
+        return cache_is_shared(self._cache)
+
+    def exists(self, session_key):
+        if not self.cache_shared:
+            return db.SessionStore.exists(self, session_key)
+        return super().exists(session_key)
+
+    def load(self):
+        if not self.cache_shared:
+            return db.SessionStore.load(self)
+        # ещё не записанные в БД изменения этого процесса важнее БД,
+        # если запись успели вытеснить из кеша
+        with _lock:
+            session = _pending.get(self.session_key)
+        if session is None or session.expire_date <= timezone.now():
+            return super().load()
+        data = self.decode(session.session_data)
+        self._cache.set(
+            self.cache_key,
+            data,
+            self.get_expiry_age(expiry=session.expire_date),
+        )
+        return data
+
+    def save(self, must_create=False):
+        if not self.cache_shared:
+            return db.SessionStore.save(self, must_create=must_create)
+        if must_create or self.session_key is None:
+            return super().save(must_create=must_create)
+        data = self._get_session(no_load=must_create)
+        self._cache.set(self.cache_key, data, self.get_expiry_age())
+        session = self.create_model_instance(data)
+        with _lock:
+            _pending[self.session_key] = session
+            due = (
+                len(_pending) >= settings.SESSION_WRITE_BEHIND_BATCH
+                or time.monotonic() - _flushed_at
+                >= settings.SESSION_WRITE_BEHIND_INTERVAL
+            )
+        if due:
+            try:
+                flush_pending()
+            except DatabaseError:
+                # сессии уже в кеше, запишем при следующем сбросе
+                pass
+
+    def delete(self, session_key=None):
+        if not self.cache_shared:
+            return db.SessionStore.delete(self, session_key)
+        with _lock:
+            _pending.pop(session_key or self.session_key, None)
+        super().delete(session_key)
+
+    @classmethod
+    def clear_expired(cls, batch_size=None):
+        """Удаляет истёкшие сессии пачками, не блокируя всю таблицу."""
+        batch_size = batch_size or settings.SESSION_CLEANUP_BATCH
+        model = cls.get_model_class()
+        deleted = 0
+        while True:
+            keys = list(
+                model.objects.filter(expire_date__lt=timezone.now())
+                .values_list('session_key', flat=True)[:batch_size]
+            )
+            if not keys:
+                return deleted
+            deleted += model.objects.filter(session_key__in=keys).delete()[0]
@@ -0,0 +1,101 @@
+import gzip
+import hashlib
+import os
+import re
+import shutil
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_EXTENSIONS = (
+    '.css', '.js', '.svg', '.ico', '.html', '.txt', '.json', '.xml', '.map'
+)
+HASHED_NAME_RE = re.compile(r'\.[0-9a-f]{12}\.[^./]+$')
+
+
+def encodings():
+    available = [('gzip', '.gz', lambda data: gzip.compress(data, 9, mtime=0))]
+    if brotli is not None:
+        available.insert(0, ('br', '.br', brotli.compress))
+    return available
+
+
+def is_hashed(name):
+    return bool(HASHED_NAME_RE.search(name))
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """Хешированные имена, без дублей и с заранее сжатыми копиями.
+
+    После обычной обработки ManifestStaticFilesStorage файлы с одинаковым
+    содержимым сводятся в манифесте к одному хешированному имени, а для
+    текстовых форматов рядом кладутся .gz и, если установлен brotli, .br.
+    """
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run, **options)
+        if dry_run:
+            return
+        duplicates = self.deduplicate()
+        self.save_manifest()
+        for name in sorted(set(self.hashed_files.values())):
+            for compressed_name in self.compress(name):
+                yield name, compressed_name, True
+        for name, source in sorted(duplicates.items()):
+            for _, suffix, _ in encodings():
+                if self.exists(source + suffix):
+                    self.link(source + suffix, name + suffix)
+
+    def deduplicate(self):
+        """Сводит в манифесте одинаковые файлы к одному имени.
+
+        Сами дубли остаются: на них ссылаются url() в уже обработанных
+        CSS. Каждый дубль заменяется жёсткой ссылкой на канонический
+        файл. Возвращает {дубль: канонический файл}.
+        """
+        canonical = {}
+        duplicates = {}
+        for name, hashed_name in sorted(self.hashed_files.items()):
+            with self.open(hashed_name) as file:
+                digest = hashlib.md5(file.read()).hexdigest()
+            source = canonical.setdefault(digest, hashed_name)
+            if source == hashed_name:
+                continue
+            self.hashed_files[name] = source
+            duplicates[hashed_name] = source
+            self.link(source, hashed_name)
+        return duplicates
+
+    def link(self, source, name):
+        """Делает name жёсткой ссылкой на source, где их нет — копией."""
+        temporary = self.path(name) + '.tmp'
+        try:
+            os.link(self.path(source), temporary)
+        except OSError:
+            shutil.copyfile(self.path(source), temporary)
+        os.replace(temporary, self.path(name))
+
+    def compress(self, name):
+        if not name.endswith(COMPRESSIBLE_EXTENSIONS):
+            return
+        with self.open(name) as file:
+            content = file.read()
+        for _, suffix, compress in encodings():
+            compressed = compress(content)
+            if len(compressed) >= len(content):
+                continue
+            with open(self.path(name + suffix), 'wb') as file:
+                file.write(compressed)
+            yield name + suffix
+
+
+def precompressed_path(path, accept_encoding):
+    """Лучший из заранее сжатых вариантов файла, который примет клиент."""
+    for encoding, suffix, _ in encodings():
+        if encoding in accept_encoding and os.path.isfile(path + suffix):
+            return path + suffix, encoding
+    return path, None
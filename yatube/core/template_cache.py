@@ -0,0 +1,85 @@
+import logging
+import os
+import time
+
+from django.conf import settings
+from django.template import TemplateDoesNotExist, TemplateSyntaxError, engines
+from django.template.loaders import cached
+from django.template.utils import get_app_template_dirs
+
+logger = logging.getLogger(__name__)
+
+
+class ReloadingCachedLoader(cached.Loader):
+    """Кеширующий загрузчик, который замечает изменённые файлы.
+
+    Шаблоны компилируются один раз на процесс. Не чаще чем раз в
+    TEMPLATES_RELOAD_INTERVAL секунд загрузчик сверяет время изменения
+    уже скомпилированных файлов и при расхождении сбрасывает кеш.
+    None отключает проверку.
+    """
+
+    def __init__(self, engine, loaders):
+        super().__init__(engine, loaders)
+        self.mtimes = {}
+        self.checked_at = time.monotonic()
+
+    def get_template(self, template_name, skip=None):
+        self.reload_if_changed()
+        template = super().get_template(template_name, skip)
+        name = template.origin.name
+        if name not in self.mtimes and os.path.isfile(name):
+            self.mtimes[name] = os.path.getmtime(name)
+        return template
+
+    def reload_if_changed(self):
+        interval = settings.TEMPLATES_RELOAD_INTERVAL
+        if interval is None or time.monotonic() - self.checked_at < interval:
+            return
+        self.checked_at = time.monotonic()
+        for name, mtime in list(self.mtimes.items()):
+            if not os.path.isfile(name) or os.path.getmtime(name) != mtime:
+                logger.info('Шаблон %s изменился, кеш сброшен', name)
+                self.reset()
+                return
+
+    def reset(self):
+        super().reset()
+        self.mtimes = {}
+
+
+def template_dirs():
+    engine = engines['django'].engine
+    return [*engine.dirs, *get_app_template_dirs('templates')]
+
+
+def template_names(prefixes=None, pages_only=False):
+    """Имена всех .html шаблонов проекта относительно каталогов шаблонов."""
+    names = set()
+    for directory in template_dirs():
+        for root, _, files in os.walk(directory):
+            for file_name in files:
+                if not file_name.endswith('.html'):
+                    continue
+                name = os.path.relpath(
+                    os.path.join(root, file_name), directory
+                ).replace(os.sep, '/')
+                if prefixes and not name.startswith(tuple(prefixes)):
+                    continue
+                if pages_only and 'includes/' in name:
+                    continue
+                names.add(name)
+    return sorted(names)
+
+
+def warm_templates():
+    engine = engines['django'].engine
+    loaded = 0
+    for name in template_names():
+        try:
+            engine.get_template(name)
+        except (TemplateDoesNotExist, TemplateSyntaxError) as error:
+            logger.warning('Шаблон %s не прогрет: %s', name, error)
+            continue
+        loaded += 1
+    return loaded
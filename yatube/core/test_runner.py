@@ -0,0 +1,129 @@
+import os
+import time
+import unittest
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import connections
+from django.test.runner import (
+    DiscoverRunner, ParallelTestSuite, RemoteTestResult, RemoteTestRunner,
+    default_test_processes,
+)
+
+
+class TimedRemoteTestResult(RemoteTestResult):
+    """Результат в процессе-исполнителе: добавляет время каждого теста
+    к событиям, которые пересылаются в основной процесс."""
+
+    def startTest(self, test):
+        super().startTest(test)
+        self.started = time.perf_counter()
+
+    def stopTest(self, test):
+        self.events.append((
+            'addDuration', self.test_index, time.perf_counter() - self.started
+        ))
+        super().stopTest(test)
+
+
+class TimedRemoteTestRunner(RemoteTestRunner):
+    resultclass = TimedRemoteTestResult
+
+
+class TimedParallelTestSuite(ParallelTestSuite):
+    runner_class = TimedRemoteTestRunner
+
+
+class TimedTextTestResult(unittest.TextTestResult):
+    """Запоминает время тестов: своё или присланное исполнителем."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.durations = {}
+
+    def startTest(self, test):
+        super().startTest(test)
+        self.started = time.perf_counter()
+
+    def addDuration(self, test, elapsed):
+        self.durations[test.id()] = elapsed
+
+    def stopTest(self, test):
+        self.durations.setdefault(
+            test.id(), time.perf_counter() - self.started
+        )
+        super().stopTest(test)
+
+
+def module_timings(durations):
+    """Суммарное время тестов по модулям, самые медленные первыми."""
+    modules = defaultdict(lambda: [0, 0.0])
+    for test_id, elapsed in durations.items():
+        module = modules[test_id.rsplit('.', 2)[0]]
+        module[0] += 1
+        module[1] += elapsed
+    return sorted(modules.items(), key=lambda item: -item[1][1])
+
+
+class ParallelTestRunner(DiscoverRunner):
+    """manage.py test: параллельно и без пересоздания тестовых баз.
+
+    По умолчанию тесты идут во столько процессов, сколько ядер
+    (DJANGO_TEST_PROCESSES=1 — последовательно). Каждый процесс
+    работает со своей копией тестовой SQLite-базы. Сама база
+    с применёнными миграциями сохраняется между запусками
+    (--fresh-db — создать заново), а копии для процессов каждый раз
+    снимаются с неё заново простым копированием файла.
+    В конце печатается время тестов по модулям.
+
+    cache.clear() в setUp тестов дешёвый и остаётся: кеш по умолчанию —
+    LocMem, у каждого процесса свой. Общий кеш лежит в таблице тестовой
+    базы и в TestCase откатывается вместе с транзакцией; чистить его
+    нужно только в TransactionTestCase.
+    """
+
+    parallel_test_suite = TimedParallelTestSuite
+
+    def __init__(self, fresh_db=False, keepdb=False, parallel=1, **kwargs):
+        if parallel == 1:
+            parallel = default_test_processes()
+        self.fresh_db = fresh_db
+        super().__init__(keepdb=True, parallel=parallel, **kwargs)
+
+    @classmethod
+    def add_arguments(cls, parser):
+        super().add_arguments(parser)
+        parser.add_argument(
+            '--fresh-db', action='store_true',
+            help='Создать тестовые базы заново, а не переиспользовать.',
+        )
+
+    def get_resultclass(self):
+        return super().get_resultclass() or TimedTextTestResult
+
+    def setup_databases(self, **kwargs):
+        for alias in connections:
+            name = connections[alias].settings_dict['TEST']['NAME']
+            if not name:
+                continue
+            creation = connections[alias].creation
+            # копии прошлого запуска могли отстать от миграций
+            names = [
+                creation.get_test_db_clone_settings(str(index))['NAME']
+                for index in range(1, self.parallel + 1)
+            ]
+            if self.fresh_db:
+                names.append(name)
+            for name in names:
+                if os.path.exists(name):
+                    os.remove(name)
+        return super().setup_databases(**kwargs)
+
+    def run_suite(self, suite, **kwargs):
+        result = super().run_suite(suite, **kwargs)
+        durations = getattr(result, 'durations', {})
+        for module, (tests, elapsed) in module_timings(durations)[
+            :settings.TEST_TIMINGS_REPORT
+        ]:
+            result.stream.writeln(f'{elapsed:7.2f} с  {tests:4}  {module}')
+        return result
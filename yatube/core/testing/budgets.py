@@ -0,0 +1,70 @@
+"""Бюджеты представлений: сколько запросов, миллисекунд рендеринга
+шаблонов и байт ответа допустимо на каждый URL.
+
+Замеры — на данных core.tests.test_budgets: несколько авторов с постами
+в группе, комментарии, подписка. Бюджет запросов не должен зависеть от
+числа постов на странице; если после изменения он вырос, это почти
+всегда N+1 — тест покажет повторяющиеся запросы. Числа сняты без
+шардирования: с шардами ленты делают по запросу на каждую базу.
+Время рендеринга зависит от машины и нагрузки, поэтому его бюджет
+проверяется только с BUDGET_RENDER_TIME=1.
+"""
+from importlib import import_module
+
+BUDGET_URLCONFS = ('posts.urls', 'users.urls', 'about.urls')
+GUEST, USER, AUTHOR = 'guest', 'user', 'author'
+
+
+class Budget:
+    def __init__(
+        self, queries, render_ms=100, size=20000, method='get',
+        client=GUEST, data=None,
+    ):
+        self.queries = queries
+        self.render_ms = render_ms
+        self.size = size
+        self.method = method
+        self.client = client
+        self.data = data
+
+
+BUDGETS = {
+    'posts:index': Budget(6),
+    'posts:group_index': Budget(2),
+    'posts:group_list': Budget(5),
+    'posts:profile': Budget(7),
+    'posts:post_detail': Budget(5),
+    'posts:post_edit': Budget(5, client=AUTHOR),
+    'posts:post_history': Budget(4, client=AUTHOR),
+    'posts:post_like': Budget(7, method='post', client=USER),
+    'posts:post_unlike': Budget(5, method='post', client=USER),
+    'posts:post_create': Budget(3, client=USER),
+    'posts:drafts': Budget(3, client=AUTHOR),
+    'posts:add_comment': Budget(
+        5, method='post', client=USER, data={'text': 'Комментарий'}
+    ),
+    'posts:follow_index': Budget(6, client=USER),
+    'posts:live_index': Budget(1),
+    'posts:live_group': Budget(2),
+    'posts:live_follow': Budget(4, client=USER),
+    'posts:profile_follow': Budget(5, client=USER),
+    'posts:profile_unfollow': Budget(5, client=USER),
+    'users:signup': Budget(0),
+    'users:logout': Budget(4, client=USER),
+    'users:login': Budget(0),
+    'users:password_reset_form': Budget(0),
+    'about:author': Budget(0),
+    'about:tech': Budget(0),
+}
+
+
+def url_patterns():
+    """{'app:name': имена параметров URL} для всех BUDGET_URLCONFS."""
+    patterns = {}
+    for path in BUDGET_URLCONFS:
+        urlconf = import_module(path)
+        for pattern in urlconf.urlpatterns:
+            patterns[f'{urlconf.app_name}:{pattern.name}'] = list(
+                pattern.pattern.converters
+            )
+    return patterns
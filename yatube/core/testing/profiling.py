@@ -0,0 +1,130 @@
+import time
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.db import connections
+from django.template.base import Template
+from django.test.utils import CaptureQueriesContext
+
+from core.querylog import fingerprint
+
+
+@contextmanager
+def render_timer():
+    """Суммарное время рендеринга шаблонов в мс.
+
+    Вложенные шаблоны (include, extends) входят во время внешнего и
+    отдельно не считаются.
+    """
+    timing = {'ms': 0.0, 'depth': 0}
+    original = Template._render
+
+    def timed_render(template, context):
+        timing['depth'] += 1
+        started = time.perf_counter()
+        try:
+            return original(template, context)
+        finally:
+            timing['depth'] -= 1
+            if not timing['depth']:
+                timing['ms'] += (time.perf_counter() - started) * 1000
+
+    Template._render = timed_render
+    try:
+        yield timing
+    finally:
+        Template._render = original
+
+
+class Measurement:
+    def __init__(self, response, queries, render_ms, size):
+        self.response = response
+        self.queries = queries
+        self.render_ms = render_ms
+        self.size = size
+
+    def repeated(self):
+        """Запросы, выполненные больше одного раза, — кандидаты в N+1."""
+        counts = Counter(fingerprint(query['sql']) for query in self.queries)
+        return [(sql, count) for sql, count in counts.most_common()
+                if count > 1]
+
+
+def measure(client, method, url, data=None, databases=None):
+    """Выполняет запрос и считает запросы к БД, рендеринг и размер ответа.
+
+    Потоковый ответ читается целиком: запросы и шаблоны внутри генератора
+    тоже входят в замер.
+    """
+    aliases = list(connections) if databases is None else list(databases)
+    with ExitStack() as stack:
+        captured = [
+            (alias, stack.enter_context(
+                CaptureQueriesContext(connections[alias])
+            ))
+            for alias in aliases
+        ]
+        timing = stack.enter_context(render_timer())
+        response = getattr(client, method)(url, data or {})
+        if response.streaming:
+            size = sum(len(chunk) for chunk in response.streaming_content)
+        else:
+            size = len(response.content)
+    queries = [
+        dict(query, alias=alias)
+        for alias, context in captured
+        for query in context.captured_queries
+    ]
+    return Measurement(response, queries, timing['ms'], size)
+
+
+def explain_queries(measurement, limit):
+    """Перечень запросов: повторяющиеся и все по порядку, со знаком «+»
+    у тех, что вышли за бюджет."""
+    lines = []
+    repeated = measurement.repeated()
+    if repeated:
+        lines.append('Повторяются:')
+        lines.extend(f'  {count} × {sql}' for sql, count in repeated)
+    lines.append('Запросы:')
+    for number, query in enumerate(measurement.queries, 1):
+        mark = '+' if number > limit else ' '
+        lines.append(
+            f'{mark}{number:3}. [{query["alias"]}] {query["time"]} с  '
+            f'{query["sql"]}'
+        )
+    return '\n'.join(lines)
+
+
+def budget_violations(budget, measurement):
+    """Описание превышений бюджета, пустой список — всё в пределах."""
+    problems = []
+    if len(measurement.queries) > budget.queries:
+        problems.append(
+            f'запросов {len(measurement.queries)} при бюджете '
+            f'{budget.queries}\n'
+            + explain_queries(measurement, budget.queries)
+        )
+    if (
+        settings.BUDGET_RENDER_TIME
+        and measurement.render_ms > budget.render_ms
+    ):
+        problems.append(
+            f'рендеринг {measurement.render_ms:.1f} мс при бюджете '
+            f'{budget.render_ms} мс'
+        )
+    if measurement.size > budget.size:
+        problems.append(
+            f'ответ {measurement.size} байт при бюджете {budget.size}'
+        )
+    return problems
+
+
+class BudgetAssertionsMixin:
+    """assertWithinBudget для TestCase."""
+
+    def assertWithinBudget(self, name, budget, measurement):
+        problems = budget_violations(budget, measurement)
+        if problems:
+            self.fail(f'{name}: ' + '\n'.join(problems))
@@ -0,0 +1,75 @@
+import asyncio
+import threading
+from http import HTTPStatus
+
+from django.core.wsgi import get_wsgi_application
+from django.test import SimpleTestCase
+
+from core.asgi import WsgiToAsgi
+
+
+class ThreadRecordingStream:
+    streaming = True
+
+    def __init__(self):
+        self.threads = []
+
+    def __iter__(self):
+        for _ in range(5):
+            self.threads.append(threading.current_thread().name)
+            yield b'chunk'
+
+    def close(self):
+        self.threads.append(threading.current_thread().name)
+
+
+class WsgiToAsgiTests(SimpleTestCase):
+    def request(self, path, headers=(), application=None):
+        messages = []
+
+        async def receive():
+            return {'type': 'http.request', 'body': b''}
+
+        async def send(message):
+            messages.append(message)
+
+        application = WsgiToAsgi(
+            application or get_wsgi_application(), max_workers=4
+        )
+        asyncio.run(application({
+            'type': 'http',
+            'method': 'GET',
+            'path': path,
+            'query_string': b'',
+            'headers': [(b'host', b'localhost'), *headers],
+        }, receive, send))
+        return messages
+
+    def test_page_served_through_asgi(self):
+        """Страница отдаётся через ASGI-обёртку"""
+        start, *body = self.request('/about/author/')
+        self.assertEqual(start['type'], 'http.response.start')
+        self.assertEqual(start['status'], HTTPStatus.OK)
+        content = b''.join(message['body'] for message in body)
+        self.assertIn(b'<html', content)
+
+    def test_not_found_through_asgi(self):
+        """Несуществующая страница возвращает 404 через ASGI"""
+        start, *body = self.request('/not_exist/')
+        self.assertEqual(start['status'], HTTPStatus.NOT_FOUND)
+
+    def test_stream_read_in_one_thread(self):
+        """Ответ-поток читается и закрывается в одном своём потоке"""
+        stream = ThreadRecordingStream()
+
+        def application(environ, start_response):
+            start_response('200 OK', [])
+            return stream
+
+        start, *body = self.request('/', application=application)
+        self.assertEqual(
+            b''.join(message['body'] for message in body), b'chunk' * 5
+        )
+        self.assertEqual(len(stream.threads), 6)
+        self.assertEqual(len(set(stream.threads)), 1)
+        self.assertTrue(stream.threads[0].startswith('asgi-stream'))
@@ -0,0 +1,136 @@
+from unittest import skipIf
+
+from django.core.cache import cache
+from django.db import transaction
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from core.testing.budgets import (
+    AUTHOR, BUDGETS, GUEST, USER, Budget, url_patterns,
+)
+from core.testing.profiling import (
+    BudgetAssertionsMixin, Measurement, budget_violations, measure,
+)
+from posts import sharding
+from posts.archive import archive_version
+from posts.cache import feeds_version
+from posts.groups import get_group_by_slug
+from posts.models import Comment, Follow, Group, Post, User
+from posts.revisions import recent_revisions
+from users.cache import get_user_by_username
+
+AUTHORS = 5
+POSTS_PER_AUTHOR = 3
+
+
+@override_settings(LIVE_STREAM_TIMEOUT=0)
+class ViewBudgetTests(BudgetAssertionsMixin, TestCase):
+    databases = '__all__'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+        cls.authors = [
+            User.objects.create_user(username=f'author{number}')
+            for number in range(AUTHORS)
+        ]
+        cls.user = User.objects.create_user(username='reader')
+        for author in cls.authors:
+            Follow.objects.create(user=cls.user, author=author)
+            for _ in range(POSTS_PER_AUTHOR):
+                cls.post = Post.objects.create(
+                    author=author, group=cls.group, text='Пост'
+                )
+                for commenter in cls.authors:
+                    Comment.objects.create(
+                        post=cls.post, author=commenter, text='Комментарий'
+                    )
+        cls.author = cls.post.author
+        # версии кешей, автор, группа и список правок уже лежат в общем
+        # кеше, как на работающем сайте
+        feeds_version()
+        archive_version()
+        get_user_by_username(cls.author.username)
+        get_group_by_slug(cls.group.slug)
+        recent_revisions(cls.post.pk)
+        cls.url_kwargs = {
+            'post_id': cls.post.pk,
+            'slug': cls.group.slug,
+            'username': cls.author.username,
+        }
+
+    def client_for(self, role):
+        client = Client()
+        if role != GUEST:
+            user = {USER: self.user, AUTHOR: self.author}[role]
+            client.force_login(user)
+            # вход сохраняет last_login и сбрасывает пользователя в кеше
+            get_user_by_username(user.username)
+        return client
+
+    def test_every_url_has_budget(self):
+        """У каждого URL приложений есть бюджет, лишних бюджетов нет"""
+        self.assertEqual(set(BUDGETS), set(url_patterns()))
+
+    @skipIf(sharding.is_enabled(), 'бюджеты сняты без шардирования')
+    def test_views_within_budget(self):
+        """Представления укладываются в бюджет запросов, времени и размера"""
+        for name, params in url_patterns().items():
+            budget = BUDGETS[name]
+            with self.subTest(name=name):
+                cache.clear()
+                url = reverse(name, kwargs={
+                    param: self.url_kwargs[param] for param in params
+                })
+                client = self.client_for(budget.client)
+                # каждый замер откатывается, чтобы не влиять на следующий
+                with transaction.atomic():
+                    measurement = measure(
+                        client, budget.method, url, budget.data
+                    )
+                    transaction.set_rollback(True)
+                self.assertLess(measurement.response.status_code, 400)
+                self.assertWithinBudget(name, budget, measurement)
+
+    def test_violation_lists_queries_over_budget(self):
+        """Превышение объясняется списком запросов и повторами"""
+        url = reverse('posts:profile', kwargs={
+            'username': self.author.username
+        })
+        measurement = measure(self.client, 'get', url)
+        problems = budget_violations(Budget(1, size=100), measurement)
+        self.assertEqual(len(problems), 2)
+        queries = BUDGETS['posts:profile'].queries
+        self.assertIn(f'запросов {queries} при бюджете 1', problems[0])
+        self.assertIn('+  2. [default]', problems[0])
+        self.assertNotIn('+  1.', problems[0])
+        self.assertIn('байт при бюджете 100', problems[1])
+
+    def test_render_time_checked_on_demand(self):
+        """Время рендеринга проверяется только с BUDGET_RENDER_TIME"""
+        measurement = Measurement(None, [], 500, 0)
+        with override_settings(BUDGET_RENDER_TIME=False):
+            self.assertEqual(budget_violations(Budget(0), measurement), [])
+        with override_settings(BUDGET_RENDER_TIME=True):
+            self.assertEqual(
+                budget_violations(Budget(0), measurement),
+                ['рендеринг 500.0 мс при бюджете 100 мс'],
+            )
+
+    def test_repeated_queries_reported(self):
+        """Запросы, отличающиеся только значениями, считаются повторами"""
+        queries = [
+            {'sql': sql, 'time': '0.000', 'alias': 'default'}
+            for sql in (
+                "SELECT * FROM t WHERE id = 1 AND name = 'a''b'",
+                "SELECT * FROM t WHERE id = 25 AND name = 'c'",
+            )
+        ]
+        problems = budget_violations(
+            Budget(1), Measurement(None, queries, 0, 0)
+        )
+        self.assertIn(
+            '2 × SELECT * FROM t WHERE id = ? AND name = ?', problems[0]
+        )
@@ -0,0 +1,67 @@
+import threading
+
+from django.core.paginator import Paginator
+from django.db import connection
+from django.test import (
+    SimpleTestCase, TransactionTestCase, override_settings,
+)
+
+from core.concurrent import QueryBatch
+
+
+class CountableList(list):
+    def count(self):
+        return len(self)
+
+
+@override_settings(QUERY_EXECUTOR_THREADS=4)
+class QueryBatchTests(SimpleTestCase):
+    def test_queries_run_in_pool(self):
+        """Запросы выполняются в потоках пула"""
+        with QueryBatch() as batch:
+            names = [
+                batch.submit(lambda: threading.current_thread().name)
+                for _ in range(3)
+            ]
+        for name in names:
+            self.assertTrue(name.result().startswith('queries'))
+
+    @override_settings(QUERY_EXECUTOR_THREADS=0)
+    def test_queries_run_inline_when_disabled(self):
+        """Без пула запросы выполняются в текущем потоке"""
+        with QueryBatch() as batch:
+            name = batch.submit(lambda: threading.current_thread().name)
+        self.assertEqual(name.result(), threading.current_thread().name)
+
+    def test_page_and_count_together(self):
+        """Страница собирается из параллельных count и среза"""
+        paginator = Paginator(CountableList(range(25)), 10)
+        with QueryBatch() as batch:
+            page = batch.page(paginator, '2')
+        page = page.result()
+        self.assertEqual(list(page), list(range(10, 20)))
+        self.assertEqual(page.paginator.num_pages, 3)
+
+    def test_page_out_of_range_falls_back_to_last(self):
+        """Номер за пределами ленты даёт последнюю страницу"""
+        paginator = Paginator(CountableList(range(25)), 10)
+        with QueryBatch() as batch:
+            page = batch.page(paginator, '9')
+        self.assertEqual(list(page.result()), list(range(20, 25)))
+
+
+@override_settings(QUERY_EXECUTOR_THREADS=1)
+class PooledConnectionTests(TransactionTestCase):
+    databases = '__all__'
+
+    def connection_id(self):
+        connection.ensure_connection()
+        return id(connection.connection)
+
+    def test_worker_keeps_connection(self):
+        """Поток пула не переоткрывает соединение на каждый запрос"""
+        ids = []
+        for _ in range(2):
+            with QueryBatch() as batch:
+                ids.append(batch.submit(self.connection_id))
+        self.assertEqual(ids[0].result(), ids[1].result())
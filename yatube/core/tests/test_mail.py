@@ -0,0 +1,132 @@
+import os
+import shutil
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.mail import EmailMessage
+from django.core.mail.backends.locmem import EmailBackend
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from core.mail import (
+    SpoolEmailBackend, claim_batch, requeue_stale, send_batch, spool_path,
+)
+
+User = get_user_model()
+
+
+class FlakyBackend(EmailBackend):
+    opened = 0
+
+    def open(self):
+        FlakyBackend.opened += 1
+
+    def send_messages(self, messages):
+        if any('fail' in message.subject for message in messages):
+            raise ConnectionError('SMTP недоступен')
+        return super().send_messages(messages)
+
+
+class DownBackend(EmailBackend):
+    def open(self):
+        raise ConnectionRefusedError('SMTP не отвечает')
+
+
+@override_settings(
+    EMAIL_SPOOL_BACKEND='core.tests.test_mail.FlakyBackend',
+    EMAIL_SPOOL_MAX_ATTEMPTS=2,
+    EMAIL_SPOOL_RETRY_DELAY=60,
+)
+class SpoolEmailBackendTests(TestCase):
+    databases = '__all__'
+
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        override = override_settings(EMAIL_SPOOL_DIR=directory)
+        override.enable()
+        self.addCleanup(override.disable)
+        FlakyBackend.opened = 0
+
+    def queue(self, *subjects):
+        SpoolEmailBackend().send_messages([
+            EmailMessage(subject, 'текст', to=['user@example.com'])
+            for subject in subjects
+        ])
+
+    def test_messages_queued_not_sent(self):
+        """Письма ложатся в очередь, а не уходят сразу"""
+        self.queue('Первое')
+        self.assertEqual(len(os.listdir(spool_path('queue'))), 1)
+        self.assertEqual(mail.outbox, [])
+
+    def test_batch_sent_over_one_connection(self):
+        """Пачка отправляется через одно соединение"""
+        self.queue('Первое', 'Второе', 'Третье')
+        self.assertEqual(send_batch(now=1), (3, 0))
+        self.assertEqual(FlakyBackend.opened, 1)
+        self.assertEqual(
+            [message.subject for message in mail.outbox],
+            ['Первое', 'Второе', 'Третье'],
+        )
+        self.assertEqual(os.listdir(spool_path('queue')), [])
+
+    def test_failed_message_retried_with_backoff(self):
+        """Неудачное письмо повторяется позже, затем откладывается"""
+        self.queue('fail')
+        self.assertEqual(send_batch(now=1000), (0, 1))
+        self.assertEqual(send_batch(now=1059), (0, 0))
+        with self.assertLogs('core.mail', 'ERROR'):
+            self.assertEqual(send_batch(now=1060), (0, 1))
+        self.assertEqual(os.listdir(spool_path('queue')), [])
+        self.assertEqual(len(os.listdir(spool_path('failed'))), 1)
+
+    @override_settings(EMAIL_SPOOL_BACKEND='core.tests.test_mail.DownBackend')
+    def test_server_down_batch_retried_with_backoff(self):
+        """Если сервер недоступен, вся пачка повторяется позже"""
+        self.queue('Первое', 'Второе')
+        self.assertEqual(send_batch(now=1000), (0, 2))
+        self.assertEqual(os.listdir(spool_path('sending')), [])
+        self.assertEqual(send_batch(now=1059), (0, 0))
+        with self.assertLogs('core.mail', 'ERROR'):
+            self.assertEqual(send_batch(now=1060), (0, 2))
+        self.assertEqual(len(os.listdir(spool_path('failed'))), 2)
+
+    def test_command_survives_batch_error(self):
+        """Ошибка пачки не роняет команду отправки"""
+        stderr = StringIO()
+        with mock.patch(
+            'core.management.commands.send_queued_mail.send_batch',
+            side_effect=OSError('диск недоступен'),
+        ):
+            call_command(
+                'send_queued_mail', stdout=StringIO(), stderr=stderr
+            )
+        self.assertIn('диск недоступен', stderr.getvalue())
+
+    def test_claimed_message_not_stale(self):
+        """Давно лежавшее в очереди письмо не считается зависшим при захвате"""
+        self.queue('Первое')
+        name, = os.listdir(spool_path('queue'))
+        os.utime(spool_path('queue', name), (0, 0))
+        self.assertEqual(claim_batch(10), [name])
+        self.assertEqual(requeue_stale(timeout=60), 0)
+        self.assertEqual(os.listdir(spool_path('sending')), [name])
+
+    @override_settings(EMAIL_BACKEND='core.mail.SpoolEmailBackend')
+    def test_password_reset_is_queued(self):
+        """Письмо сброса пароля ставится в очередь"""
+        User.objects.create_user(
+            username='auth', email='auth@example.com', password='secret'
+        )
+        self.client.post(
+            reverse('users:password_reset_form'),
+            {'email': 'auth@example.com'},
+        )
+        self.assertEqual(mail.outbox, [])
+        self.assertEqual(send_batch(), (1, 0))
+        self.assertEqual(mail.outbox[0].to, ['auth@example.com'])
@@ -0,0 +1,43 @@
+import gzip
+
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from core.middleware import CompressionMiddleware
+
+PAGE = ('<p>Тестовый текст поста</p>' * 100).encode()
+
+
+@override_settings(COMPRESSION_MIN_SIZE=1024)
+class CompressionMiddlewareTests(SimpleTestCase):
+    def process(self, response, accept_encoding='gzip'):
+        request = RequestFactory().get(
+            '/', HTTP_ACCEPT_ENCODING=accept_encoding
+        )
+        return CompressionMiddleware(lambda request: response)(request)
+
+    def test_large_html_compressed(self):
+        """Большая HTML-страница сжимается"""
+        response = self.process(HttpResponse(PAGE))
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(response.content), PAGE)
+        self.assertIn('Accept-Encoding', response['Vary'])
+
+    def test_small_response_not_compressed(self):
+        """Ответ короче минимального размера не сжимается"""
+        response = self.process(HttpResponse(b'<p>OK</p>'))
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+    def test_other_content_type_not_compressed(self):
+        """Типы вне списка не сжимаются"""
+        response = self.process(HttpResponse(PAGE, content_type='image/png'))
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+    def test_streaming_chunks_flushed(self):
+        """Каждый кусок потокового ответа можно распаковать сразу"""
+        response = self.process(
+            StreamingHttpResponse(iter([PAGE[:1000], PAGE[1000:]]))
+        )
+        chunks = list(response.streaming_content)
+        self.assertEqual(gzip.decompress(b''.join(chunks)), PAGE)
+        self.assertGreaterEqual(len(chunks), 2)
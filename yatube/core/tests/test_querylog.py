@@ -0,0 +1,121 @@
+import json
+import shutil
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from core import querylog
+from posts.models import Comment, Group, Post, User
+
+
+class FingerprintTests(SimpleTestCase):
+    def test_literals_replaced(self):
+        """Запросы с разными значениями дают один отпечаток"""
+        self.assertEqual(
+            querylog.fingerprint(
+                "SELECT * FROM t WHERE id = 1 AND name = 'a''b' AND x = %s"
+            ),
+            'SELECT * FROM t WHERE id = ? AND name = ? AND x = ?',
+        )
+
+    def test_in_lists_collapsed(self):
+        """Списки IN разной длины дают один отпечаток"""
+        self.assertEqual(
+            querylog.fingerprint('SELECT * FROM t WHERE id IN (1, 2, 3)'),
+            querylog.fingerprint('SELECT * FROM t WHERE id IN (%s)'),
+        )
+
+
+class QueryStatsTests(TestCase):
+    databases = '__all__'
+
+    @classmethod
+    def setUpTestData(cls):
+        Group.objects.create(title='Группа', slug='group', description='')
+
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        self.addCleanup(querylog._stats.clear)
+        querylog._stats.clear()
+        settings = override_settings(
+            QUERY_STATS_ENABLED=True, QUERY_STATS_DIR=directory
+        )
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+    def rows(self, **filters):
+        querylog.flush_stats()
+        return [
+            row for row in querylog.read_stats()
+            if all(row[field] == value for field, value in filters.items())
+        ]
+
+    def test_stats_by_view_and_origin(self):
+        """Запросы учитываются по представлению и строке шаблона"""
+        for _ in range(2):
+            self.client.get(reverse('posts:group_index'))
+        rows = self.rows(view='posts:group_index')
+        self.assertTrue(rows)
+        origins = {row['origin'] for row in rows}
+        self.assertIn('posts/group_index.html', '\n'.join(origins))
+        self.assertTrue(all(row['count'] == 2 for row in rows))
+        self.assertTrue(all(
+            row['max_ms'] <= row['total_ms'] for row in rows
+        ))
+
+    @override_settings(
+        POST_DETAIL_STREAM_COMMENTS=1, POST_DETAIL_STREAM_CHUNK=1
+    )
+    def test_streaming_body_queries_by_view(self):
+        """Запросы из тела потокового ответа тоже относятся к представлению"""
+        user = User.objects.create(username='NoName')
+        post = Post.objects.create(author=user, text='Пост')
+        for number in range(3):
+            Comment.objects.create(
+                post=post, author=user, text=f'Комментарий {number}'
+            )
+        response = self.client.get(
+            reverse('posts:post_detail', args=(post.pk,))
+        )
+        self.assertTrue(response.streaming)
+        b''.join(response.streaming_content)
+        self.assertIsNone(querylog.current_view.get())
+        fingerprints = [
+            row['fingerprint'] for row in self.rows(view='posts:post_detail')
+        ]
+        self.assertTrue([
+            sql for sql in fingerprints
+            if 'posts_comment' in sql and 'OFFSET' in sql
+        ])
+
+    @override_settings(QUERY_SLOW_MS=0)
+    def test_slow_query_logged_with_plan(self):
+        """Медленный запрос пишется в лог вместе с планом"""
+        with self.assertLogs('core.querylog', 'WARNING') as logs:
+            list(Group.objects.filter(slug='group'))
+        message = logs.output[-1]
+        self.assertIn('FROM "posts_group"', message)
+        self.assertIn('posts_group', message.rsplit('\n', 1)[-1])
+
+    def test_export_and_reset(self):
+        """query_stats складывает статистику и сбрасывает её"""
+        self.client.get(reverse('posts:group_index'))
+        querylog.flush_stats()
+        out = StringIO()
+        call_command(
+            'query_stats', '--by', 'view', '--format', 'json', '--reset',
+            stdout=out, stderr=StringIO(),
+        )
+        rows = json.loads(out.getvalue())
+        self.assertIn('posts:group_index', {row['view'] for row in rows})
+        self.assertEqual(querylog.read_stats(), [])
+        querylog.flush_stats()
+        list(Group.objects.all())
+        self.assertEqual(
+            [row['count'] for row in self.rows()], [1],
+            'после сброса счёт начинается заново',
+        )
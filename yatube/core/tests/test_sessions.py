@@ -0,0 +1,126 @@
+import os
+import tempfile
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.sessions.models import Session
+from django.core.cache import cache
+from django.db import DatabaseError
+from django.db.models import QuerySet
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from core.sessions import SessionStore, flush_pending
+
+
+SHARED_CACHE = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.path.join(tempfile.gettempdir(), 'yatube-sessions'),
+    }
+}
+
+
+@override_settings(
+    CACHES=SHARED_CACHE,
+    SESSION_WRITE_BEHIND_BATCH=100,
+    SESSION_WRITE_BEHIND_INTERVAL=3600,
+)
+class WriteBehindSessionTests(TestCase):
+    databases = '__all__'
+
+    def setUp(self):
+        cache.clear()
+        flush_pending()
+        self.store = SessionStore()
+        self.store['step'] = 1
+        self.store.create()
+        self.addCleanup(flush_pending)
+
+    def db_value(self):
+        session = Session.objects.get(session_key=self.store.session_key)
+        return session.get_decoded().get('step')
+
+    def test_new_session_written_immediately(self):
+        """Новая сессия сразу попадает в БД"""
+        self.assertEqual(self.db_value(), 1)
+
+    def test_changes_deferred_until_flush(self):
+        """Изменения пишутся в БД только при сбросе"""
+        self.store['step'] = 2
+        self.store.save()
+        self.assertEqual(self.db_value(), 1)
+        self.assertEqual(SessionStore(self.store.session_key)['step'], 2)
+        flush_pending()
+        self.assertEqual(self.db_value(), 2)
+
+    def test_pending_changes_survive_cache_eviction(self):
+        """Отложенные изменения читаются, даже если кеш очищен"""
+        self.store['step'] = 3
+        self.store.save()
+        cache.clear()
+        with self.assertNumQueries(0):
+            self.assertEqual(SessionStore(self.store.session_key)['step'], 3)
+
+    def test_failed_flush_keeps_changes(self):
+        """Неудачный сброс не теряет отложенные изменения"""
+        self.store['step'] = 5
+        self.store.save()
+        with mock.patch.object(
+            QuerySet, 'bulk_update', side_effect=DatabaseError
+        ):
+            with self.assertRaises(DatabaseError):
+                flush_pending()
+        self.assertEqual(self.db_value(), 1)
+        self.assertEqual(flush_pending(), 1)
+        self.assertEqual(self.db_value(), 5)
+
+    @override_settings(CACHES={
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    })
+    def test_local_cache_writes_through(self):
+        """С кешем в памяти процесса изменения пишутся сразу"""
+        store = SessionStore(self.store.session_key)
+        store['step'] = 6
+        store.save()
+        self.assertEqual(self.db_value(), 6)
+
+    @override_settings(CACHES={
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    })
+    def test_local_cache_not_read(self):
+        """С кешем в памяти процесса удалённая сессия сразу недействительна"""
+        self.assertEqual(SessionStore(self.store.session_key)['step'], 1)
+        # так выход в другом процессе удаляет сессию
+        Session.objects.filter(session_key=self.store.session_key).delete()
+        store = SessionStore(self.store.session_key)
+        self.assertFalse(store.exists(self.store.session_key))
+        self.assertIsNone(store.get('step'))
+
+    @override_settings(SESSION_WRITE_BEHIND_BATCH=2)
+    def test_flush_when_batch_full(self):
+        """Набрав пачку, изменения записываются сами"""
+        other = SessionStore()
+        other.create()
+        self.store['step'] = 4
+        self.store.save()
+        other['step'] = 4
+        other.save()
+        self.assertEqual(self.db_value(), 4)
+
+    def test_clear_expired_in_batches(self):
+        """Истёкшие сессии удаляются пачками"""
+        expired = timezone.now() - timedelta(days=1)
+        Session.objects.bulk_create(
+            Session(session_key=f'expired{number}', session_data='',
+                    expire_date=expired)
+            for number in range(5)
+        )
+        self.assertEqual(SessionStore.clear_expired(batch_size=2), 5)
+        self.assertTrue(
+            Session.objects.filter(session_key=self.store.session_key).exists()
+        )
@@ -0,0 +1,75 @@
+import json
+import os
+import re
+import shutil
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from core.views import IMMUTABLE_CACHE_CONTROL, serve_static
+
+SOURCE = tempfile.mkdtemp()
+TARGET = tempfile.mkdtemp()
+
+
+@override_settings(
+    STATICFILES_DIRS=[SOURCE],
+    STATIC_ROOT=TARGET,
+    STATICFILES_FINDERS=[
+        'django.contrib.staticfiles.finders.FileSystemFinder',
+    ],
+    STATICFILES_STORAGE=(
+        'core.staticfiles.CompressedManifestStaticFilesStorage'
+    ),
+)
+class StaticPipelineTests(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        css = 'body { color: black; }\n' * 50
+        for name in ('site.css', 'copy.css'):
+            with open(os.path.join(SOURCE, name), 'w') as file:
+                file.write(css)
+        with open(os.path.join(SOURCE, 'page.css'), 'w') as file:
+            file.write('@import url("site.css");\n')
+        call_command('collectstatic', interactive=False, stdout=StringIO())
+        with open(os.path.join(TARGET, 'staticfiles.json')) as file:
+            cls.manifest = json.load(file)['paths']
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(SOURCE, ignore_errors=True)
+        shutil.rmtree(TARGET, ignore_errors=True)
+
+    def test_duplicates_share_one_hashed_file(self):
+        """Одинаковые файлы сводятся к одному хешированному имени"""
+        self.assertEqual(self.manifest['site.css'], self.manifest['copy.css'])
+
+    def test_duplicate_referenced_from_css_kept(self):
+        """Дубль, на который ссылается CSS, остаётся ссылкой на оригинал"""
+        with open(os.path.join(TARGET, self.manifest['page.css'])) as file:
+            name = re.search(r'url\("(.+?)"\)', file.read()).group(1)
+        self.assertNotEqual(name, self.manifest['site.css'])
+        original = os.path.join(TARGET, self.manifest['site.css'])
+        for suffix in ('', '.gz'):
+            self.assertTrue(os.path.samefile(
+                os.path.join(TARGET, name + suffix), original + suffix
+            ))
+
+    def test_compressed_copies_created(self):
+        """Рядом с файлом лежит сжатая копия"""
+        self.assertTrue(os.path.isfile(
+            os.path.join(TARGET, self.manifest['site.css'] + '.gz')
+        ))
+
+    def test_hashed_file_served_immutable_and_gzipped(self):
+        """Хешированный файл отдаётся сжатым и с immutable-кешированием"""
+        request = RequestFactory().get('/', HTTP_ACCEPT_ENCODING='gzip')
+        response = serve_static(request, self.manifest['site.css'])
+        self.assertEqual(response['Cache-Control'], IMMUTABLE_CACHE_CONTROL)
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['Content-Type'], 'text/css')
+        response.close()
@@ -0,0 +1,53 @@
+import os
+import shutil
+import tempfile
+
+from django.template import Context, Engine
+from django.test import SimpleTestCase, override_settings
+
+from core.template_cache import template_names, warm_templates
+
+
+class ReloadingCachedLoaderTests(SimpleTestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'page.html')
+        self.write('Первая версия', mtime=1000)
+        self.engine = Engine(dirs=[self.directory], loaders=[
+            ('core.template_cache.ReloadingCachedLoader', [
+                'django.template.loaders.filesystem.Loader',
+            ]),
+        ])
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def write(self, content, mtime):
+        with open(self.path, 'w') as file:
+            file.write(content)
+        os.utime(self.path, (mtime, mtime))
+
+    def render(self):
+        return self.engine.get_template('page.html').render(Context())
+
+    @override_settings(TEMPLATES_RELOAD_INTERVAL=None)
+    def test_template_compiled_once(self):
+        """Без проверки изменений шаблон берётся из кеша"""
+        self.render()
+        self.write('Вторая версия', mtime=2000)
+        self.assertEqual(self.render(), 'Первая версия')
+
+    @override_settings(TEMPLATES_RELOAD_INTERVAL=0)
+    def test_changed_template_reloaded(self):
+        """Изменённый на диске шаблон перечитывается"""
+        self.render()
+        self.write('Вторая версия', mtime=2000)
+        self.assertEqual(self.render(), 'Вторая версия')
+
+
+class WarmTemplatesTests(SimpleTestCase):
+    def test_all_project_pages_compile(self):
+        """Все страницы проекта компилируются при прогреве"""
+        pages = template_names(('posts/', 'users/', 'about/', 'core/'))
+        self.assertIn('posts/index.html', pages)
+        self.assertGreaterEqual(warm_templates(), len(pages))
@@ -1,4 +1,15 @@
+import mimetypes
+import os
+
+from django.conf import settings
+from django.http import FileResponse, Http404
 from django.shortcuts import render
+from django.utils._os import safe_join
+from django.views.decorators.http import require_safe
+
+from core.staticfiles import is_hashed, precompressed_path
+
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
 
 
 def page_not_found(request, exception):
@@ -7,3 +18,30 @@ def page_not_found(request, exception):
 
 def csrf_failure(request, reason=''):
     return render(request, 'core/403csrf.html')
+
+
+@require_safe
+def serve_static(request, path):
+    """Отдаёт собранную статику с учётом сжатых копий и кеширования."""
+    try:
+        full_path = safe_join(settings.STATIC_ROOT, path)
+    except ValueError:
+        raise Http404(path)
+    if not os.path.isfile(full_path):
+        raise Http404(path)
+    content_type = mimetypes.guess_type(full_path)[0]
+    file_path, encoding = precompressed_path(
+        full_path, request.META.get('HTTP_ACCEPT_ENCODING', '')
+    )
+    response = FileResponse(
+        open(file_path, 'rb'),
+        content_type=content_type or 'application/octet-stream',
+    )
+    if encoding:
+        response['Content-Encoding'] = encoding
+    response['Vary'] = 'Accept-Encoding'
+    response['Cache-Control'] = (
+        IMMUTABLE_CACHE_CONTROL if is_hashed(path)
+        else f'public, max-age={settings.STATIC_MAX_AGE}'
+    )
+    return response
@@ -0,0 +1,121 @@
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+from notifications.models import (
+    COMMENT, POST, Notification, NotificationEvent,
+)
+from posts.models import Follow
+
+
+def enqueue_comment(comment):
+    if comment.author_id != comment.post.author_id:
+        NotificationEvent.objects.create(
+            kind=COMMENT,
+            actor_id=comment.author_id,
+            post_id=comment.post_id,
+            post_author_id=comment.post.author_id,
+        )
+
+
+def enqueue_post(post):
+    enqueue_posts([post])
+
+
+def enqueue_posts(posts):
+    NotificationEvent.objects.bulk_create(
+        NotificationEvent(
+            kind=POST,
+            actor_id=post.author_id,
+            post_id=post.pk,
+            post_author_id=post.author_id,
+        )
+        for post in posts
+    )
+
+
+def unread_key(user_id):
+    return f'notifications:unread:{user_id}'
+
+
+def unread_count(user_id):
+    """Число непрочитанных уведомлений.
+
+    Кешируется в общем кеше: сбрасывает его fanout_notifications,
+    то есть другой процесс.
+    """
+    cache = caches['shared']
+    count = cache.get(unread_key(user_id))
+    if count is None:
+        count = Notification.objects.filter(
+            user_id=user_id, is_read=False
+        ).count()
+        cache.set(
+            unread_key(user_id), count, settings.NOTIFICATIONS_CACHE_TIMEOUT
+        )
+    return count
+
+
+def mark_read(user_id, last=None):
+    """Отмечает уведомления пользователя прочитанными: все или с id
+    не больше last — те, что он успел увидеть. Возвращает их число."""
+    notifications = Notification.objects.filter(user_id=user_id, is_read=False)
+    if last is not None:
+        notifications = notifications.filter(pk__lte=last)
+    with transaction.atomic():
+        marked = notifications.update(is_read=True)
+        transaction.on_commit(
+            lambda: caches['shared'].delete(unread_key(user_id))
+        )
+    return marked
+
+
+def recipients(event):
+    if event.kind == COMMENT:
+        yield event.post_author_id
+        return
+    yield from Follow.objects.filter(author_id=event.actor_id).values_list(
+        'user_id', flat=True
+    ).iterator(chunk_size=settings.NOTIFICATIONS_BATCH_SIZE)
+
+
+def deliver(notifications):
+    Notification.objects.bulk_create(notifications)
+    keys = {unread_key(notification.user_id) for notification in notifications}
+    # счётчик сбрасываем после коммита, иначе его успеют закешировать
+    # по ещё не видимым данным
+    transaction.on_commit(lambda: caches['shared'].delete_many(keys))
+
+
+def fanout_batch(size=None):
+    """Раскладывает пачку событий по ящикам получателей.
+
+    Возвращает число обработанных событий. Уведомления пишутся
+    bulk_create пачками по size, события удаляются в той же транзакции;
+    параллельные обработчики пропускают строки, заблокированные другими.
+    """
+    size = size or settings.NOTIFICATIONS_BATCH_SIZE
+    with transaction.atomic():
+        events = list(
+            NotificationEvent.objects.select_for_update(skip_locked=True)
+            .order_by('pk')[:size]
+        )
+        pending = []
+        for event in events:
+            for user_id in recipients(event):
+                pending.append(Notification(
+                    user_id=user_id,
+                    kind=event.kind,
+                    actor_id=event.actor_id,
+                    post_id=event.post_id,
+                    created=event.created,
+                ))
+                if len(pending) >= size:
+                    deliver(pending)
+                    pending = []
+        if pending:
+            deliver(pending)
+        NotificationEvent.objects.filter(
+            pk__in=[event.pk for event in events]
+        ).delete()
+    return len(events)
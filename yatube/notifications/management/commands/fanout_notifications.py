@@ -0,0 +1,37 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from notifications.fanout import fanout_batch
+
+
+class Command(BaseCommand):
+    help = 'Рассылает события о новых постах и комментариях по ящикам'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=settings.NOTIFICATIONS_BATCH_SIZE,
+        )
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Не завершаться, а проверять очередь каждые '
+                 'NOTIFICATIONS_POLL_INTERVAL секунд',
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            total = 0
+            while True:
+                processed = fanout_batch(options['batch_size'])
+                if not processed:
+                    break
+                total += processed
+            if total or not options['loop']:
+                self.stdout.write(f'Обработано событий: {total}')
+            if not options['loop']:
+                return
+            time.sleep(settings.NOTIFICATIONS_POLL_INTERVAL)
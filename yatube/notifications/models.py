@@ -0,0 +1,53 @@
+from django.contrib.auth import get_user_model
+from django.db import models
+
+User = get_user_model()
+
+COMMENT = 1
+POST = 2
+KINDS = (
+    (COMMENT, 'Новый комментарий'),
+    (POST, 'Новый пост'),
+)
+
+
+class NotificationEvent(models.Model):
+    """Событие в очереди на рассылку командой fanout_notifications.
+
+    Пост хранится по id без внешнего ключа: посты могут лежать в шардах.
+    """
+
+    kind = models.PositiveSmallIntegerField(choices=KINDS)
+    actor = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+'
+    )
+    post_id = models.IntegerField()
+    post_author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+'
+    )
+    created = models.DateTimeField(auto_now_add=True)
+
+
+class Notification(models.Model):
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='notifications'
+    )
+    kind = models.PositiveSmallIntegerField(choices=KINDS)
+    actor = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+'
+    )
+    post_id = models.IntegerField()
+    created = models.DateTimeField()
+    is_read = models.BooleanField(default=False)
+
+    class Meta:
+        ordering = ('-created',)
+        indexes = [models.Index(fields=['user', 'is_read'])]
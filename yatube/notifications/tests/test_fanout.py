@@ -0,0 +1,135 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache, caches
+from django.test import (
+    Client, TestCase, TransactionTestCase, override_settings,
+)
+from django.urls import reverse
+from django.utils import timezone
+
+from notifications.fanout import fanout_batch, unread_key
+from notifications.models import (
+    COMMENT, POST, Notification, NotificationEvent,
+)
+from posts.models import Follow, Post
+
+User = get_user_model()
+
+
+@override_settings(RATELIMIT_ENABLED=False)
+class NotificationFanoutTests(TestCase):
+    databases = '__all__'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.followers = [
+            User.objects.create_user(username=f'follower{number}')
+            for number in range(3)
+        ]
+        Follow.objects.bulk_create(
+            Follow(user=follower, author=cls.author)
+            for follower in cls.followers
+        )
+        cls.post = Post.objects.create(author=cls.author, text='Пост')
+
+    def setUp(self):
+        cache.clear()
+        self.author_client = Client()
+        self.author_client.force_login(self.author)
+        self.follower_client = Client()
+        self.follower_client.force_login(self.followers[0])
+
+    def test_new_post_fans_out_to_followers(self):
+        """Новый пост попадает в ящики подписчиков пачками"""
+        self.author_client.post(
+            reverse('posts:post_create'), {'text': 'Новый пост'}
+        )
+        self.assertEqual(NotificationEvent.objects.count(), 1)
+        self.assertEqual(Notification.objects.count(), 0)
+        self.assertEqual(fanout_batch(size=2), 1)
+        self.assertEqual(
+            set(Notification.objects.filter(kind=POST).values_list(
+                'user', flat=True
+            )),
+            {follower.pk for follower in self.followers},
+        )
+        self.assertFalse(NotificationEvent.objects.exists())
+
+    def test_comment_notifies_post_author(self):
+        """Комментарий попадает в ящик автора поста"""
+        self.follower_client.post(
+            reverse('posts:add_comment', kwargs={'post_id': self.post.pk}),
+            {'text': 'Комментарий'},
+        )
+        fanout_batch()
+        notification = Notification.objects.get()
+        self.assertEqual(notification.user, self.author)
+        self.assertEqual(notification.kind, COMMENT)
+        self.assertEqual(notification.post_id, self.post.pk)
+
+
+@override_settings(RATELIMIT_ENABLED=False)
+class UnreadCountTests(TransactionTestCase):
+    """Кеш сбрасывается после коммита, поэтому нужны настоящие транзакции."""
+
+    databases = '__all__'
+
+    def setUp(self):
+        cache.clear()
+        # таблицу кеша очистка базы между тестами не трогает
+        caches['shared'].clear()
+        self.author = User.objects.create_user(username='author')
+        follower = User.objects.create_user(username='follower')
+        self.post = Post.objects.create(author=self.author, text='Пост')
+        self.author_client = Client()
+        self.author_client.force_login(self.author)
+        self.follower_client = Client()
+        self.follower_client.force_login(follower)
+
+    def test_unread_count_cached_and_invalidated(self):
+        """Счётчик непрочитанных кешируется и сбрасывается при рассылке"""
+        url = reverse('notifications:unread')
+        self.assertEqual(self.author_client.get(url).json(), {'unread': 0})
+        self.assertEqual(
+            caches['shared'].get(unread_key(self.author.pk)), 0,
+            'счётчик сбрасывает другой процесс, он должен быть в общем кеше',
+        )
+        Notification.objects.create(
+            user=self.author, kind=COMMENT, actor=self.author,
+            post_id=self.post.pk, created=timezone.now(),
+        )
+        self.assertEqual(self.author_client.get(url).json(), {'unread': 0})
+        self.follower_client.post(
+            reverse('posts:add_comment', kwargs={'post_id': self.post.pk}),
+            {'text': 'Комментарий'},
+        )
+        fanout_batch()
+        self.assertEqual(self.author_client.get(url).json(), {'unread': 2})
+
+    def test_inbox_and_mark_read(self):
+        """Ящик показывает уведомления, отметка прочтения сбрасывает счётчик"""
+        first, second = (
+            Notification.objects.create(
+                user=self.author, kind=COMMENT, actor=self.author,
+                post_id=self.post.pk, created=timezone.now(),
+            )
+            for _ in range(2)
+        )
+        self.assertEqual(
+            self.author_client.get(reverse('notifications:unread')).json(),
+            {'unread': 2},
+        )
+        inbox = self.author_client.get(reverse('notifications:inbox')).json()
+        self.assertEqual(
+            [notification['id'] for notification in inbox['notifications']],
+            [second.pk, first.pk],
+        )
+        url = reverse('notifications:read')
+        self.assertEqual(
+            self.author_client.post(url, {'last': first.pk}).json(),
+            {'unread': 1},
+        )
+        self.assertEqual(self.author_client.post(url).json(), {'unread': 0})
+        self.assertFalse(
+            Notification.objects.filter(is_read=False).exists()
+        )
@@ -0,0 +1,11 @@
+from django.urls import path
+
+from . import views
+
+app_name = 'notifications'
+
+urlpatterns = [
+    path('', views.inbox, name='inbox'),
+    path('unread/', views.unread, name='unread'),
+    path('read/', views.read, name='read'),
+]
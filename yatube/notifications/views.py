@@ -0,0 +1,40 @@
+from django.conf import settings
+from django.contrib.auth.decorators import login_required
+from django.http import JsonResponse
+from django.views.decorators.http import require_POST
+
+from notifications.fanout import mark_read, unread_count
+
+
+@login_required
+def unread(request):
+    return JsonResponse({'unread': unread_count(request.user.pk)})
+
+
+@login_required
+def inbox(request):
+    notifications = request.user.notifications.select_related('actor')[
+        :settings.NOTIFICATIONS_INBOX_SIZE
+    ]
+    return JsonResponse({
+        'notifications': [
+            {
+                'id': notification.pk,
+                'kind': notification.get_kind_display(),
+                'actor': notification.actor.username,
+                'post_id': notification.post_id,
+                'created': notification.created,
+                'is_read': notification.is_read,
+            }
+            for notification in notifications
+        ],
+        'unread': unread_count(request.user.pk),
+    })
+
+
+@login_required
+@require_POST
+def read(request):
+    last = request.POST.get('last', '')
+    mark_read(request.user.pk, int(last) if last.isdigit() else None)
+    return JsonResponse({'unread': unread_count(request.user.pk)})
@@ -1,15 +1,330 @@
+from django import forms
+from django.conf import settings
 from django.contrib import admin
+from django.contrib.admin import helpers
+from django.contrib.admin.views.main import ORDER_VAR, PAGE_VAR, ChangeList
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Q
+from django.http import QueryDict
+from django.template.response import TemplateResponse
+from django.utils.functional import cached_property
 
-from .models import Post, Group
+from . import fts, sharding
+from .models import Comment, Group, ModerationJob, Post
 
+CURSOR_VAR = 'after'
+SHARD_VAR = 'shard'
 
-class PostAdmin(admin.ModelAdmin):
-    list_display = ('pk', 'text', 'pub_date', 'author', 'group',)
-    list_editable = ('group',)
+
+def estimated_count(queryset):
+    """Число строк без полного COUNT(*).
+
+    Для всей таблицы в PostgreSQL берётся оценка из статистики, иначе
+    строки считаются не дальше ADMIN_COUNT_LIMIT.
+    """
+    connection = connections[queryset.db]
+    if connection.vendor == 'postgresql' and not queryset.query.where:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT reltuples::bigint FROM pg_class WHERE relname = %s',
+                [queryset.model._meta.db_table],
+            )
+            row = cursor.fetchone()
+        if row and row[0] > 0:
+            return row[0]
+    return queryset[:settings.ADMIN_COUNT_LIMIT].count()
+
+
+class EstimatedCountPaginator(Paginator):
+    @cached_property
+    def count(self):
+        return estimated_count(self.object_list)
+
+
+def request_database(request):
+    """База постов, с которой работает страница админки.
+
+    Посты и комментарии лежат в шардах, а админка читает одну базу:
+    выбранную фильтром списка, а на странице объекта — из сохранённых
+    фильтров списка. По умолчанию — первая.
+    """
+    databases = sharding.post_databases()
+    filters = QueryDict(request.GET.get('_changelist_filters', ''))
+    alias = request.GET.get(SHARD_VAR) or filters.get(SHARD_VAR)
+    return alias if alias in databases else databases[0]
+
+
+class ShardFilter(admin.SimpleListFilter):
+    title = 'шард'
+    parameter_name = SHARD_VAR
+
+    def lookups(self, request, model_admin):
+        # без шардов фильтр не показывается, но параметр принимается
+        if sharding.is_enabled():
+            return [(alias, alias) for alias in sharding.post_databases()]
+
+    def queryset(self, request, queryset):
+        # база уже выбрана в get_queryset
+        return queryset
+
+    def choices(self, changelist):
+        selected = self.value() or self.lookup_choices[0][0]
+        for alias, title in self.lookup_choices:
+            yield {
+                'selected': alias == selected,
+                'query_string': changelist.get_query_string(
+                    {self.parameter_name: alias}, [CURSOR_VAR, PAGE_VAR]
+                ),
+                'display': title,
+            }
+
+
+class ShardedAdmin(admin.ModelAdmin):
+    """Админка модели из шардов: список, объекты и действия — в базе
+    request_database, переключается фильтром «шард»."""
+
+    def get_list_filter(self, request):
+        return (ShardFilter, *super().get_list_filter(request))
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).using(request_database(request))
+
+    def formfield_for_foreignkey(self, db_field, request, **kwargs):
+        # пост комментария лежит в той же базе, что и сам комментарий
+        if db_field.related_model is Post:
+            kwargs.setdefault('using', request_database(request))
+        return super().formfield_for_foreignkey(db_field, request, **kwargs)
+
+
+class KeysetChangeList(ChangeList):
+    """Список постов, который листается по ключу, а не по смещению.
+
+    Ссылка «дальше» передаёт id последнего поста, и следующая страница
+    выбирается по индексу pub_date без OFFSET. Номера страниц остаются
+    для начала списка и для сортировки по другим колонкам.
+    """
+
+    def get_filters_params(self, params=None):
+        params = super().get_filters_params(params)
+        params.pop(CURSOR_VAR, None)
+        return params
+
+    def get_results(self, request):
+        self.next_cursor = None
+        cursor = request.GET.get(CURSOR_VAR)
+        keyset = ORDER_VAR not in self.params
+        if not cursor or not cursor.isdigit() or not keyset:
+            super().get_results(request)
+            self.result_list = list(self.result_list)
+            if keyset and self.multi_page and self.result_list:
+                self.next_cursor = self.result_list[-1]
+            return
+        last = self.queryset.filter(pk=cursor).values('pub_date', 'pk').first()
+        queryset = self.queryset.order_by('-pub_date', '-pk')
+        if last:
+            queryset = queryset.filter(
+                Q(pub_date__lt=last['pub_date'])
+                | Q(pub_date=last['pub_date'], pk__lt=last['pk'])
+            )
+        rows = list(queryset[:self.list_per_page + 1])
+        self.result_list = rows[:self.list_per_page]
+        self.result_count = len(self.result_list)
+        self.full_result_count = None
+        self.show_full_result_count = False
+        self.show_admin_actions = True
+        self.can_show_all = False
+        self.multi_page = True
+        self.paginator = self.model_admin.get_paginator(
+            request, self.queryset, self.list_per_page
+        )
+        if len(rows) > self.list_per_page:
+            self.next_cursor = self.result_list[-1]
+
+    def next_page_query(self):
+        return self.get_query_string(
+            {CURSOR_VAR: self.next_cursor.pk}, [PAGE_VAR]
+        )
+
+
+def queue_moderation_jobs(modeladmin, request, queryset, by, **fields):
+    """Ставит в очередь задачу модерации для каждого автора или группы
+    из выбранных строк."""
+    values = set(queryset.values_list(by, flat=True)) - {None}
+    lookup = 'group_id' if by.endswith('group') else 'author_id'
+    ModerationJob.objects.bulk_create(
+        ModerationJob(**fields, **{lookup: value}) for value in values
+    )
+    modeladmin.message_user(
+        request,
+        f'Поставлено задач модерации: {len(values)}. '
+        'Прогресс — в разделе «Задачи модерации».',
+    )
+
+
+def moderation_action(action, by, target, description):
+    """Действие админки: задача модерации на авторов или группы
+    выбранных строк."""
+    def queue_jobs(modeladmin, request, queryset):
+        queue_moderation_jobs(
+            modeladmin, request, queryset, by, action=action, target=target
+        )
+    queue_jobs.__name__ = f'{action}_{target}_by_{by.replace("__", "_")}'
+    queue_jobs.short_description = description
+    return queue_jobs
+
+
+class RegroupForm(forms.Form):
+    new_group = forms.ModelChoiceField(
+        Group.objects.all(),
+        required=False,
+        label='Новая группа',
+        empty_label='Без группы',
+    )
+
+
+def regroup_action(by, description):
+    """Действие админки: перенос всех постов авторов или групп выбранных
+    постов в группу, которую выбирают на промежуточной странице."""
+    def regroup(modeladmin, request, queryset):
+        form = RegroupForm(request.POST if 'apply' in request.POST else None)
+        if form.is_valid():
+            queue_moderation_jobs(
+                modeladmin, request, queryset, by,
+                action=ModerationJob.REGROUP,
+                target=ModerationJob.POSTS,
+                new_group=form.cleaned_data['new_group'],
+            )
+            return None
+        return TemplateResponse(request, 'admin/posts/post/regroup.html', {
+            **modeladmin.admin_site.each_context(request),
+            'title': description,
+            'opts': modeladmin.model._meta,
+            'form': form,
+            'queryset': queryset,
+            'action': regroup.__name__,
+            'action_checkbox_name': helpers.ACTION_CHECKBOX_NAME,
+        })
+    regroup.__name__ = f'regroup_posts_by_{by}'
+    regroup.short_description = description
+    return regroup
+
+
+class PostAdmin(ShardedAdmin):
+    list_display = (
+        'pk', 'text', 'pub_date', 'author', 'group', 'is_hidden', 'is_deleted',
+    )
+    list_select_related = ('author', 'group')
+    autocomplete_fields = ('author', 'group')
     search_fields = ('text',)
     list_filter = ('pub_date',)
     empty_value_display = '-пусто-'
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    actions = (
+        moderation_action(
+            ModerationJob.HIDE, 'author', ModerationJob.POSTS,
+            'Скрыть все посты авторов выбранных постов',
+        ),
+        moderation_action(
+            ModerationJob.DELETE, 'author', ModerationJob.POSTS,
+            'Удалить все посты авторов выбранных постов',
+        ),
+        moderation_action(
+            ModerationJob.HIDE, 'group', ModerationJob.POSTS,
+            'Скрыть все посты групп выбранных постов',
+        ),
+        moderation_action(
+            ModerationJob.DELETE, 'group', ModerationJob.POSTS,
+            'Удалить все посты групп выбранных постов',
+        ),
+        moderation_action(
+            ModerationJob.UNHIDE, 'author', ModerationJob.POSTS,
+            'Показать все посты авторов выбранных постов',
+        ),
+        moderation_action(
+            ModerationJob.UNHIDE, 'group', ModerationJob.POSTS,
+            'Показать все посты групп выбранных постов',
+        ),
+        regroup_action(
+            'author', 'Перенести все посты авторов выбранных постов в группу'
+        ),
+        regroup_action(
+            'group', 'Перенести все посты групп выбранных постов в группу'
+        ),
+    )
+
+    def get_changelist(self, request, **kwargs):
+        return KeysetChangeList
+
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term:
+            return queryset, False
+        connection = connections[queryset.db]
+        return fts.search(queryset, search_term, connection), False
+
+
+class CommentAdmin(ShardedAdmin):
+    list_display = (
+        'pk', 'text', 'created', 'author', 'post', 'is_hidden', 'is_deleted',
+    )
+    list_select_related = ('author', 'post')
+    autocomplete_fields = ('author',)
+    raw_id_fields = ('post',)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    actions = (
+        moderation_action(
+            ModerationJob.HIDE, 'author', ModerationJob.COMMENTS,
+            'Скрыть все комментарии авторов выбранных комментариев',
+        ),
+        moderation_action(
+            ModerationJob.DELETE, 'author', ModerationJob.COMMENTS,
+            'Удалить все комментарии авторов выбранных комментариев',
+        ),
+        moderation_action(
+            ModerationJob.HIDE, 'post__group', ModerationJob.COMMENTS,
+            'Скрыть все комментарии в группах выбранных комментариев',
+        ),
+        moderation_action(
+            ModerationJob.DELETE, 'post__group', ModerationJob.COMMENTS,
+            'Удалить все комментарии в группах выбранных комментариев',
+        ),
+        moderation_action(
+            ModerationJob.UNHIDE, 'author', ModerationJob.COMMENTS,
+            'Показать все комментарии авторов выбранных комментариев',
+        ),
+        moderation_action(
+            ModerationJob.UNHIDE, 'post__group', ModerationJob.COMMENTS,
+            'Показать все комментарии в группах выбранных комментариев',
+        ),
+    )
+
+
+class GroupAdmin(admin.ModelAdmin):
+    search_fields = ('title', 'slug')
+
+
+class ModerationJobAdmin(admin.ModelAdmin):
+    list_display = (
+        '__str__', 'author', 'group', 'new_group', 'status', 'progress',
+        'created', 'finished',
+    )
+    list_select_related = ('author', 'group', 'new_group')
+    list_filter = ('status', 'action')
+    autocomplete_fields = ('author', 'group', 'new_group')
+    readonly_fields = (
+        'status', 'total', 'processed', 'error', 'created', 'finished',
+    )
+
+    def progress(self, job):
+        if not job.total:
+            return '-'
+        return f'{job.processed} из {job.total}'
+    progress.short_description = 'Прогресс'
 
 
 admin.site.register(Post, PostAdmin)
-admin.site.register(Group)
+admin.site.register(Comment, CommentAdmin)
+admin.site.register(Group, GroupAdmin)
+admin.site.register(ModerationJob, ModerationJobAdmin)
@@ -0,0 +1,159 @@
+import hashlib
+import threading
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.db import transaction
+from django.utils import timezone
+
+from posts import sharding
+from posts.cache import new_version
+from posts.models import ArchivedComment, ArchivedPost, Comment, Post
+
+ARCHIVE_VERSION_KEY = 'posts:archive:version'
+
+
+def archive_cutoff(days=None):
+    if days is None:
+        days = settings.POSTS_ARCHIVE_AFTER_DAYS
+    return timezone.now() - timedelta(days=days)
+
+
+def archive_batch(using, cutoff, batch_size):
+    """Переносит одну пачку старых постов с комментариями в архив."""
+    with transaction.atomic(using=using):
+        posts = list(
+            Post.objects.using(using)
+            .filter(pub_date__lt=cutoff)
+            .order_by('pub_date')[:batch_size]
+        )
+        if not posts:
+            return 0
+        ids = [post.pk for post in posts]
+        ArchivedPost.objects.using(using).bulk_create(
+            ArchivedPost(
+                id=post.pk,
+                text=post.text,
+                pub_date=post.pub_date,
+                author_id=post.author_id,
+                group_id=post.group_id,
+                image=post.image.name,
+                likes_count=post.likes_count,
+            )
+            for post in posts
+        )
+        ArchivedComment.objects.using(using).bulk_create(
+            ArchivedComment(
+                post_id=comment.post_id,
+                author_id=comment.author_id,
+                text=comment.text,
+                created=comment.created,
+                is_hidden=comment.is_hidden,
+                is_deleted=comment.is_deleted,
+                deleted_at=comment.deleted_at,
+            )
+            for comment in Comment.all_objects.using(using).filter(
+                post_id__in=ids
+            ).order_by('pk')
+        )
+        Post.objects.using(using).filter(pk__in=ids).delete()
+    return len(ids)
+
+
+def archive_posts(cutoff, batch_size=None):
+    batch_size = batch_size or settings.POSTS_ARCHIVE_BATCH_SIZE
+    moved = 0
+    for alias in sharding.post_databases():
+        while True:
+            count = archive_batch(alias, cutoff, batch_size)
+            moved += count
+            if count < batch_size:
+                break
+    if moved:
+        bump_archive_version()
+    return moved
+
+
+def archive_version():
+    return caches['shared'].get_or_set(ARCHIVE_VERSION_KEY, new_version, None)
+
+
+def bump_archive_version():
+    """Сбрасывает закешированные размеры архива во всех процессах.
+
+    Версия лежит в общем кеше и каждый раз новая, как у лент
+    (posts.cache.invalidate_feeds).
+    """
+    caches['shared'].set(ARCHIVE_VERSION_KEY, new_version(), None)
+
+
+class ArchiveFeed:
+    """Горячая лента, продолженная архивом.
+
+    Архивные посты всегда старше горячих, поэтому глубокие страницы
+    просто дочитываются из архива после конца горячей ленты. Размер
+    архива кешируется на POSTS_ARCHIVE_COUNT_TIMEOUT секунд и
+    сбрасывается, когда архив меняется: при архивации, удалении архивных
+    постов и модерации.
+    """
+
+    ordered = True
+
+    def __init__(self, hot, archive):
+        self.hot = hot
+        self.archive = archive
+        self._hot_count = None
+        # count и срез страницы идут параллельно (QueryBatch.page)
+        self._lock = threading.Lock()
+
+    def hot_count(self):
+        with self._lock:
+            if self._hot_count is None:
+                self._hot_count = self.hot.count()
+            return self._hot_count
+
+    def archive_count(self):
+        queryset = getattr(self.archive, 'queryset', self.archive)
+        query_hash = hashlib.md5(str(queryset.query).encode()).hexdigest()
+        key = f'posts:archive:count:{archive_version()}:{query_hash}'
+        return cache.get_or_set(
+            key, self.archive.count, settings.POSTS_ARCHIVE_COUNT_TIMEOUT
+        )
+
+    def count(self):
+        return self.hot_count() + self.archive_count()
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, key):
+        if not isinstance(key, slice):
+            return self[key:key + 1][0]
+        start = key.start or 0
+        stop = key.stop if key.stop is not None else self.count()
+        # горячая часть читается без COUNT: неполный срез значит, что
+        # горячая лента кончилась внутри него
+        result = []
+        if self._hot_count is None or start < self._hot_count:
+            result = list(self.hot[start:stop])
+        if len(result) == stop - start:
+            return result
+        if result:
+            hot_count = start + len(result)
+        else:
+            hot_count = self.hot_count()
+        result.extend(
+            self.archive[max(start - hot_count, 0):stop - hot_count]
+        )
+        return result
+
+    def __iter__(self):
+        return iter(self[:])
+
+
+def with_archive(queryset, archived_queryset, databases=None):
+    return ArchiveFeed(
+        sharding.feed(queryset, databases),
+        sharding.feed(archived_queryset, databases),
+    )
@@ -0,0 +1,40 @@
+import uuid
+from functools import wraps
+
+from django.core.cache import caches
+from django.views.decorators.cache import cache_page
+
+FEEDS_VERSION_KEY = 'posts:feeds:version'
+
+
+def new_version():
+    return uuid.uuid4().hex
+
+
+def feeds_version():
+    return caches['shared'].get_or_set(FEEDS_VERSION_KEY, new_version, None)
+
+
+def invalidate_feeds():
+    """Сбрасывает все закешированные ленты разом.
+
+    Версия входит в префикс ключей cache_feed, так что старые страницы
+    просто перестают читаться и вытесняются по таймауту. Сбрасывают
+    ленты и фоновые команды, поэтому версия лежит в общем кеше. Каждый
+    раз она новая, а не следующее число: вытесненная из кеша версия не
+    совпадёт ни с одной из прежних.
+    """
+    caches['shared'].set(FEEDS_VERSION_KEY, new_version(), None)
+
+
+def cache_feed(timeout, key_prefix):
+    """cache_page с префиксом, зависящим от версии лент."""
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            cached_view = cache_page(
+                timeout, key_prefix=f'{key_prefix}:{feeds_version()}'
+            )(view)
+            return cached_view(request, *args, **kwargs)
+        return wrapper
+    return decorator
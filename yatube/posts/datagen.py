@@ -0,0 +1,339 @@
+"""Синтетическая база для нагрузочных тестов (generate_data, data_factory).
+
+Пользователи и группы пишутся через bulk_create, посты, комментарии и
+подписки — сырыми INSERT пачками через executemany. save() не
+вызывается, сигналы не отправляются; то, что делали бы сигналы
+(копии пользователей и групп в шардах, id постов), делается здесь же.
+Популярность авторов, групп и постов распределена по закону Ципфа:
+у немногих авторов большинство подписчиков и постов.
+"""
+import random
+import time
+from array import array
+from collections import defaultdict
+from datetime import datetime, timedelta
+from itertools import accumulate, islice
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.color import no_style
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from posts import sharding
+from posts.models import (
+    ArchivedPost, Comment, Follow, Group, Post, PostTicket,
+)
+
+User = get_user_model()
+
+PASSWORD = 'generated-password'
+POST_COLUMNS = ('id', 'text', 'pub_date', 'author', 'group')
+COMMENT_COLUMNS = ('id', 'post', 'author', 'text', 'created')
+WORDS = (
+    'яблоко', 'река', 'город', 'утро', 'книга', 'дорога', 'лес', 'море',
+    'друг', 'окно', 'песня', 'зима', 'лето', 'работа', 'кофе', 'поезд',
+    'небо', 'дом', 'кот', 'вечер', 'снег', 'солнце', 'гора', 'письмо',
+)
+
+
+def zipf_cum_weights(size, exponent):
+    """Накопленные веса для random.choices: элемент с рангом k
+    выбирается в k ** exponent раз реже первого."""
+    return list(
+        accumulate(1 / rank ** exponent for rank in range(1, size + 1))
+    )
+
+
+def last_id(model, using):
+    """Наибольший выданный id таблицы.
+
+    Кроме строк учитывается счётчик AUTOINCREMENT в SQLite: он помнит
+    id удалённых строк, и повторно их выдавать нельзя.
+    """
+    manager = model._base_manager.using(using)
+    last = manager.aggregate(last=Max('pk'))['last'] or 0
+    connection = connections[using]
+    if connection.vendor == 'sqlite':
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT seq FROM sqlite_sequence WHERE name = %s',
+                [model._meta.db_table],
+            )
+            row = cursor.fetchone()
+        if row is not None:
+            last = max(last, row[0])
+    return last
+
+
+def next_id(*models, using=DEFAULT_DB_ALIAS):
+    """Первый id, свободный во всех таблицах models.
+
+    Архивные посты сохраняют id горячих, поэтому id постов считаются
+    по Post и ArchivedPost вместе.
+    """
+    return max(last_id(model, using) for model in models) + 1
+
+
+def reset_sequences(using, models):
+    connection = connections[using]
+    with connection.cursor() as cursor:
+        for sql in connection.ops.sequence_reset_sql(no_style(), models):
+            cursor.execute(sql)
+
+
+def raw_insert(model, using, columns, rows, batch_size):
+    """INSERT строк пачками по batch_size, каждая в своей транзакции.
+
+    rows — кортежи значений полей columns, уже в виде для БД (даты через
+    adapt_datetime). Остальные поля получают значения по умолчанию.
+    Объекты моделей не создаются и pre_save не вызывается, поэтому
+    auto_now_add не перетирает сгенерированные даты.
+    """
+    connection = connections[using]
+    quote = connection.ops.quote_name
+    fields = [model._meta.get_field(name) for name in columns]
+    defaults = [
+        field for field in model._meta.concrete_fields
+        if field.name not in columns
+    ]
+    tail = tuple(
+        field.get_db_prep_save(field.get_default(), connection)
+        for field in defaults
+    )
+    sql = 'INSERT INTO {} ({}) VALUES ({})'.format(
+        quote(model._meta.db_table),
+        ', '.join(quote(field.column) for field in fields + defaults),
+        ', '.join(['%s'] * (len(fields) + len(defaults))),
+    )
+    rows = iter(rows)
+    inserted = 0
+    while True:
+        batch = [row + tail for row in islice(rows, batch_size)]
+        if not batch:
+            return inserted
+        with transaction.atomic(using=using), connection.cursor() as cursor:
+            cursor.executemany(sql, batch)
+        inserted += len(batch)
+
+
+def adapt_datetime(using, value):
+    return connections[using].ops.adapt_datetimefield_value(value)
+
+
+class DataGenerator:
+    def __init__(
+        self, batch_size=10000, seed=None, days=365, exponent=1.1,
+        stdout=None,
+    ):
+        self.batch_size = batch_size
+        self.random = random.Random(seed)
+        self.days = days
+        self.exponent = exponent
+        self.stdout = stdout
+        self.now = timezone.now()
+        self.report = []
+
+    def timed(self, name, create, *args):
+        started = time.perf_counter()
+        result, rows = create(*args)
+        seconds = time.perf_counter() - started
+        self.report.append((name, rows, seconds))
+        if self.stdout is not None:
+            self.stdout.write(
+                f'{name}: {rows} за {seconds:.1f} с '
+                f'({rows / max(seconds, 1e-9):.0f} строк/с)'
+            )
+        return result
+
+    def text(self, words=12):
+        return ' '.join(self.random.choices(WORDS, k=words)).capitalize()
+
+    def moment(self):
+        return self.now - timedelta(seconds=self.random.uniform(
+            0, self.days * 24 * 60 * 60
+        ))
+
+    def pick(self, items, cum_weights, count):
+        return self.random.choices(items, cum_weights=cum_weights, k=count)
+
+    def bulk_create(self, model, using, objs):
+        # Django 2.2 не ограничивает batch_size пределами бэкенда
+        limit = connections[using].ops.bulk_batch_size(
+            model._meta.concrete_fields, objs
+        )
+        batch_size = min(self.batch_size, limit)
+        model.objects.using(using).bulk_create(objs, batch_size=batch_size)
+
+    def bulk_reference(self, model, objs):
+        """Справочные строки: в default и копией во все шарды."""
+        for using in [DEFAULT_DB_ALIAS, *sharding.get_shards()]:
+            self.bulk_create(model, using, objs)
+            reset_sequences(using, [model])
+
+    def create_users(self, count):
+        start = next_id(User)
+        password = make_password(PASSWORD)
+        ids = range(start, start + count)
+        self.bulk_reference(User, [
+            User(id=pk, username=f'gen{pk}', password=password)
+            for pk in ids
+        ])
+        return ids, count
+
+    def create_groups(self, count):
+        start = next_id(Group)
+        ids = range(start, start + count)
+        self.bulk_reference(Group, [
+            Group(
+                id=pk, title=f'Группа {pk}', slug=f'gen-{pk}',
+                description=self.text(),
+            )
+            for pk in ids
+        ])
+        return ids, count
+
+    def create_follows(self, count, user_ids):
+        """Подписки: автор по Ципфу, подписчик — любой, без повторов."""
+        authors = zipf_cum_weights(len(user_ids), self.exponent)
+        # пар может быть меньше, чем просили, если пользователей мало
+        count = min(count, len(user_ids) * (len(user_ids) - 1))
+        existing = set()
+        start = next_id(Follow)
+
+        def follows():
+            pk = start
+            while len(existing) < count:
+                batch = zip(
+                    self.random.choices(user_ids, k=self.batch_size),
+                    self.pick(user_ids, authors, self.batch_size),
+                )
+                for user_id, author_id in batch:
+                    pair = (user_id, author_id)
+                    if user_id == author_id or pair in existing:
+                        continue
+                    existing.add(pair)
+                    yield pk, user_id, author_id
+                    pk += 1
+                    if len(existing) == count:
+                        return
+        inserted = raw_insert(
+            Follow, DEFAULT_DB_ALIAS, ('id', 'user', 'author'), follows(),
+            self.batch_size,
+        )
+        reset_sequences(DEFAULT_DB_ALIAS, [Follow])
+        return None, inserted
+
+    def post_ids(self, author_ids):
+        if not sharding.is_enabled():
+            start = next_id(Post, ArchivedPost)
+            return range(start, start + len(author_ids))
+        start = next_id(PostTicket)
+        tickets = range(start, start + len(author_ids))
+        self.bulk_create(
+            PostTicket, DEFAULT_DB_ALIAS, [PostTicket(id=pk) for pk in tickets]
+        )
+        reset_sequences(DEFAULT_DB_ALIAS, [PostTicket])
+        shards = len(sharding.get_shards())
+        return [
+            (start + number) * shards + author_id % shards
+            for number, author_id in enumerate(author_ids)
+        ]
+
+    def create_posts(self, count, user_ids, group_ids):
+        """Посты: автор и группа по Ципфу, треть постов без группы."""
+        posts = {'ids': array('q'), 'dates': array('d')}
+        by_database = defaultdict(list)
+        inserted = 0
+        authors = zipf_cum_weights(len(user_ids), self.exponent)
+        groups = zipf_cum_weights(len(group_ids), self.exponent)
+        for offset in range(0, count, self.batch_size):
+            size = min(self.batch_size, count - offset)
+            author_ids = self.pick(user_ids, authors, size)
+            for pk, author_id in zip(self.post_ids(author_ids), author_ids):
+                pub_date = self.moment()
+                group_id = None
+                if group_ids and self.random.random() > 1 / 3:
+                    group_id = self.pick(group_ids, groups, 1)[0]
+                using = (
+                    sharding.shard_for_author(author_id)
+                    if sharding.is_enabled() else DEFAULT_DB_ALIAS
+                )
+                by_database[using].append((
+                    pk, self.text(), adapt_datetime(using, pub_date),
+                    author_id, group_id,
+                ))
+                posts['ids'].append(pk)
+                posts['dates'].append(pub_date.timestamp())
+            for using, batch in by_database.items():
+                inserted += raw_insert(
+                    Post, using, POST_COLUMNS, batch, self.batch_size
+                )
+            by_database.clear()
+        for using in sharding.post_databases():
+            reset_sequences(using, [Post])
+        return posts, inserted
+
+    def create_comments(self, count, user_ids, posts):
+        """Комментарии: популярность постов по Ципфу в случайном порядке."""
+        if not posts['ids']:
+            return None, 0
+        order = list(range(len(posts['ids'])))
+        self.random.shuffle(order)
+        weights = zipf_cum_weights(len(order), self.exponent)
+        next_ids = {
+            using: next_id(Comment, using=using)
+            for using in sharding.post_databases()
+        }
+        inserted = 0
+        for offset in range(0, count, self.batch_size):
+            size = min(self.batch_size, count - offset)
+            by_database = defaultdict(list)
+            for index in self.pick(order, weights, size):
+                post_id = posts['ids'][index]
+                using = (
+                    sharding.shard_for_post(post_id)
+                    if sharding.is_enabled() else DEFAULT_DB_ALIAS
+                )
+                created = posts['dates'][index] + self.random.expovariate(
+                    1 / (24 * 60 * 60)
+                )
+                created = datetime.fromtimestamp(
+                    min(created, self.now.timestamp()), timezone.utc
+                )
+                by_database[using].append((
+                    next_ids[using], post_id,
+                    self.random.choice(user_ids), self.text(6),
+                    adapt_datetime(using, created),
+                ))
+                next_ids[using] += 1
+            for using, batch in by_database.items():
+                inserted += raw_insert(
+                    Comment, using, COMMENT_COLUMNS, batch, self.batch_size
+                )
+        for using in sharding.post_databases():
+            reset_sequences(using, [Comment])
+        return None, inserted
+
+    def run(self, users=0, groups=0, posts=0, comments=0, follows=0):
+        user_ids = self.timed('Пользователи', self.create_users, users)
+        group_ids = self.timed('Группы', self.create_groups, groups)
+        if user_ids:
+            self.timed('Подписки', self.create_follows, follows, user_ids)
+            created = self.timed(
+                'Посты', self.create_posts, posts, user_ids, group_ids
+            )
+            self.timed(
+                'Комментарии', self.create_comments, comments, user_ids,
+                created,
+            )
+        return self.report
+
+
+def generate(users=0, groups=0, posts=0, comments=0, follows=0, **options):
+    """Создаёт синтетические данные, возвращает [(таблица, строк, секунд)]."""
+    return DataGenerator(**options).run(
+        users=users, groups=groups, posts=posts, comments=comments,
+        follows=follows,
+    )
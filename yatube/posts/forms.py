@@ -1,13 +1,64 @@
 from django import forms
+from django.utils import timezone
 
-from .models import Post, Comment
+from .models import DRAFT, PUBLISHED, SCHEDULED, Post, Comment
 
 
 class PostForm(forms.ModelForm):
+    draft = forms.BooleanField(
+        label='Черновик',
+        required=False,
+        help_text='Черновик видите только вы'
+    )
+    publish_at = forms.DateTimeField(
+        label='Опубликовать',
+        required=False,
+        help_text='Дата и время публикации, пусто — сразу'
+    )
+
     class Meta:
         model = Post
         fields = ('text', 'group', 'image')
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.was_published = (
+            self.instance.pk is not None
+            and self.instance.status == PUBLISHED
+        )
+        if self.was_published:
+            # вышедший пост нельзя снова сделать черновиком или отложить
+            del self.fields['draft']
+            del self.fields['publish_at']
+        elif self.instance.pk is not None:
+            self.fields['draft'].initial = self.instance.status == DRAFT
+            if self.instance.status == SCHEDULED:
+                self.fields['publish_at'].initial = self.instance.publish_at
+
+    def save(self, commit=True):
+        post = super().save(commit=False)
+        publish_at = self.cleaned_data.get('publish_at')
+        now = timezone.now()
+        if self.cleaned_data.get('draft'):
+            post.status = DRAFT
+        elif publish_at and publish_at > now:
+            post.status = SCHEDULED
+            post.publish_at = publish_at
+        elif not self.was_published:
+            post.status = PUBLISHED
+            post.publish_at = None
+            if post.pk is not None:
+                # auto_now_add проставляет дату только при создании
+                post.pub_date = now
+        if commit:
+            post.save()
+        return post
+
+    @property
+    def published_now(self):
+        """Пост стал опубликованным этим сохранением."""
+        return not self.was_published and self.instance.status == PUBLISHED
+
 
 class CommentForm(forms.ModelForm):
     class Meta:
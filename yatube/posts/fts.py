@@ -0,0 +1,79 @@
+import re
+
+from django.db.models.expressions import RawSQL
+
+SQLITE_TABLE = 'posts_post_fts'
+SQLITE_SETUP = (
+    "CREATE TRIGGER IF NOT EXISTS posts_post_fts_insert "
+    "AFTER INSERT ON posts_post BEGIN "
+    "INSERT INTO posts_post_fts(rowid, text) VALUES (new.id, new.text); END",
+    "CREATE TRIGGER IF NOT EXISTS posts_post_fts_delete "
+    "AFTER DELETE ON posts_post BEGIN "
+    "INSERT INTO posts_post_fts(posts_post_fts, rowid, text) "
+    "VALUES ('delete', old.id, old.text); END",
+    "CREATE TRIGGER IF NOT EXISTS posts_post_fts_update "
+    "AFTER UPDATE OF text ON posts_post BEGIN "
+    "INSERT INTO posts_post_fts(posts_post_fts, rowid, text) "
+    "VALUES ('delete', old.id, old.text); "
+    "INSERT INTO posts_post_fts(rowid, text) VALUES (new.id, new.text); END",
+)
+POSTGRES_SETUP = (
+    "CREATE INDEX IF NOT EXISTS posts_post_text_fts ON posts_post "
+    "USING gin (to_tsvector('russian', text))",
+)
+WORD_RE = re.compile(r'\w+')
+
+
+def install(connection):
+    """Создаёт полнотекстовый индекс по тексту постов, если его нет.
+
+    Вызывается после каждого migrate: SQLite при изменении таблицы
+    пересоздаёт её и теряет триггеры, здесь они ставятся обратно.
+    """
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            for statement in POSTGRES_SETUP:
+                cursor.execute(statement)
+            return
+        if connection.vendor != 'sqlite':
+            return
+        tables = connection.introspection.table_names(cursor)
+        if 'posts_post' not in tables:
+            return
+        created = SQLITE_TABLE not in tables
+        if created:
+            cursor.execute(
+                f'CREATE VIRTUAL TABLE {SQLITE_TABLE} USING fts5('
+                "text, content='posts_post', content_rowid='id')"
+            )
+        for statement in SQLITE_SETUP:
+            cursor.execute(statement)
+        if created:
+            cursor.execute(
+                f'INSERT INTO {SQLITE_TABLE}({SQLITE_TABLE}) '
+                "VALUES ('rebuild')"
+            )
+
+
+def search(queryset, term, connection):
+    """Посты, в тексте которых есть все слова из term."""
+    words = WORD_RE.findall(term)
+    if not words:
+        return queryset.none()
+    if connection.vendor == 'postgresql':
+        return queryset.extra(
+            where=[
+                "to_tsvector('russian', posts_post.text) "
+                "@@ plainto_tsquery('russian', %s)"
+            ],
+            params=[' '.join(words)],
+        )
+    if connection.vendor == 'sqlite':
+        query = ' '.join(f'"{word}"' for word in words)
+        return queryset.filter(pk__in=RawSQL(
+            f'SELECT rowid FROM {SQLITE_TABLE} WHERE {SQLITE_TABLE} MATCH %s',
+            [query],
+        ))
+    for word in words:
+        queryset = queryset.filter(text__icontains=word)
+    return queryset
@@ -0,0 +1,99 @@
+import json
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models import Count, Max
+from django.http import Http404
+
+from posts import sharding
+from posts.models import ArchivedPost, Group, GroupStats, Post
+
+User = get_user_model()
+
+# Общий кеш: переименованная или удалённая группа сбрасывается
+# во всех процессах сразу, а не через GROUP_CACHE_TIMEOUT.
+cache = caches['shared']
+
+
+def slug_key(slug):
+    return f'group:slug:{slug}'
+
+
+def get_group_by_slug(slug):
+    """Группа по slug из кеша, при промахе — из БД."""
+    group = cache.get(slug_key(slug))
+    if group is None:
+        group = Group.objects.filter(slug=slug).first()
+        if group is not None:
+            cache.set(slug_key(slug), group, settings.GROUP_CACHE_TIMEOUT)
+    return group
+
+
+def get_group_or_404(slug):
+    group = get_group_by_slug(slug)
+    if group is None:
+        raise Http404('Группа не найдена')
+    return group
+
+
+def invalidate_group(*slugs):
+    cache.delete_many([slug_key(slug) for slug in slugs if slug])
+
+
+def collect_stats():
+    """Число постов, дата последнего и посты по авторам для каждой группы.
+
+    Один GROUP BY на каждую базу постов и архив, без запросов по группам.
+    """
+    stats = defaultdict(lambda: {'posts_count': 0, 'last_post_at': None})
+    authors = defaultdict(Counter)
+    for using in sharding.post_databases():
+        for model in (Post, ArchivedPost):
+            rows = (
+                model.objects.using(using).filter(group__isnull=False)
+                .values('group_id', 'author_id')
+                .annotate(posts=Count('pk'), last=Max('pub_date'))
+                .order_by()
+            )
+            for row in rows.iterator():
+                group = stats[row['group_id']]
+                group['posts_count'] += row['posts']
+                if group['last_post_at'] is None or (
+                    row['last'] > group['last_post_at']
+                ):
+                    group['last_post_at'] = row['last']
+                authors[row['group_id']][row['author_id']] += row['posts']
+    return stats, authors
+
+
+def refresh_group_stats():
+    """Пересчитывает GroupStats целиком, возвращает число групп."""
+    stats, authors = collect_stats()
+    top = {
+        group_id: counter.most_common(settings.GROUP_STATS_TOP_AUTHORS)
+        for group_id, counter in authors.items()
+    }
+    usernames = dict(
+        User.objects.filter(
+            pk__in={pk for group in top.values() for pk, _ in group}
+        ).values_list('pk', 'username')
+    )
+    rows = [
+        GroupStats(
+            group_id=group_id,
+            top_authors=json.dumps([
+                [usernames[pk], posts]
+                for pk, posts in top.get(group_id, [])
+                if pk in usernames
+            ], ensure_ascii=False),
+            **stats.get(group_id, {'posts_count': 0, 'last_post_at': None}),
+        )
+        for group_id in Group.objects.values_list('pk', flat=True)
+    ]
+    with transaction.atomic():
+        GroupStats.objects.all().delete()
+        GroupStats.objects.bulk_create(rows)
+    return len(rows)
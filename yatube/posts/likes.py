@@ -0,0 +1,218 @@
+import bisect
+import random
+from array import array
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, IntegrityError, transaction
+from django.db.models import Case, F, When
+
+from posts import sharding
+from posts.models import Like, Post
+
+SIGNS = {'up': 1, 'down': -1}
+
+
+def counter_key(post_id, epoch, sign, number):
+    return f'likes:{sign}:{post_id}:{epoch}:{number}'
+
+
+def counter_keys(post_id, epoch):
+    for sign in SIGNS:
+        for number in range(settings.LIKES_COUNTER_SHARDS):
+            yield counter_key(post_id, epoch, sign, number)
+
+
+def likes_epoch(post_id):
+    """Текущая эпоха счётчиков поста, None — если поста нет."""
+    return Post.objects.with_id(post_id).values_list(
+        'likes_epoch', flat=True
+    ).first()
+
+
+def bump(post_id, epoch, delta):
+    """Прибавляет delta к горячему счётчику поста в эпохе epoch.
+
+    Счётчик разбит на LIKES_COUNTER_SHARDS ключей, запись идёт в
+    случайный, так что лайки популярного поста не упираются в один
+    ключ. Плюсы и минусы считаются отдельно: memcached не уходит
+    в минус при decr. Сброс в БД не удаляет счётчики, а начинает
+    новую эпоху (Post.likes_epoch): старые ключи больше не читаются
+    и истекают через LIKES_COUNTER_TIMEOUT.
+    """
+    sign = 'up' if delta > 0 else 'down'
+    key = counter_key(
+        post_id, epoch, sign, random.randrange(settings.LIKES_COUNTER_SHARDS)
+    )
+    try:
+        cache.incr(key, abs(delta))
+    except ValueError:
+        if not cache.add(key, abs(delta), settings.LIKES_COUNTER_TIMEOUT):
+            cache.incr(key, abs(delta))
+
+
+def pending_deltas(posts):
+    """Ещё не сброшенные в БД изменения счётчиков, один get_many.
+
+    posts — пары (id поста, эпоха).
+    """
+    keys = {
+        key: post_id
+        for post_id, epoch in posts
+        for key in counter_keys(post_id, epoch)
+    }
+    deltas = defaultdict(int)
+    for key, value in cache.get_many(list(keys)).items():
+        deltas[keys[key]] += SIGNS[key.split(':')[1]] * value
+    return deltas
+
+
+def attach_likes(posts):
+    """Проставляет постам likes — число лайков без COUNT по таблице.
+
+    У архивных постов эпохи нет, их лайки уже не меняются.
+    """
+    posts = list(posts)
+    deltas = pending_deltas([
+        (post.pk, post.likes_epoch) for post in posts
+        if hasattr(post, 'likes_epoch')
+    ])
+    for post in posts:
+        post.likes = max(post.likes_count + deltas[post.pk], 0)
+    return posts
+
+
+def liked_key(user_id):
+    return f'likes:user:{user_id}'
+
+
+def liked_posts(user_id):
+    """Отсортированный массив id постов, лайкнутых пользователем.
+
+    В кеше лежит array('q'): восемь байт на лайк, проверка — бинарный
+    поиск без запроса к БД.
+    """
+    data = cache.get(liked_key(user_id))
+    ids = array('q')
+    if data is not None:
+        ids.frombytes(data)
+        return ids
+    ids.extend(
+        Like.objects.filter(user_id=user_id).exclude(pending=-1)
+        .order_by('post_id').values_list('post_id', flat=True)
+    )
+    cache.set(
+        liked_key(user_id), ids.tobytes(), settings.LIKES_USER_CACHE_TIMEOUT
+    )
+    return ids
+
+
+def has_liked(user_id, post_id):
+    ids = liked_posts(user_id)
+    index = bisect.bisect_left(ids, post_id)
+    return index < len(ids) and ids[index] == post_id
+
+
+def remember(user_id, post_id, liked):
+    data = cache.get(liked_key(user_id))
+    if data is None:
+        return
+    ids = array('q')
+    ids.frombytes(data)
+    index = bisect.bisect_left(ids, post_id)
+    present = index < len(ids) and ids[index] == post_id
+    if liked and not present:
+        ids.insert(index, post_id)
+    elif not liked and present:
+        del ids[index]
+    cache.set(
+        liked_key(user_id), ids.tobytes(), settings.LIKES_USER_CACHE_TIMEOUT
+    )
+
+
+# like и unlike решают по БД, а не по кешу лайкнутых: кеш другого
+# процесса может отставать
+
+
+def like(user, post_id, epoch):
+    """Ставит лайк, False — если он уже стоял."""
+    likes = Like.objects.filter(user=user, post_id=post_id)
+    # лайк сняли и поставили снова до сброса — в счётчике его не было
+    if not likes.filter(pending=-1).update(pending=0):
+        try:
+            with transaction.atomic():
+                Like.objects.create(user=user, post_id=post_id)
+        except IntegrityError:
+            remember(user.pk, post_id, True)
+            return False
+    bump(post_id, epoch, 1)
+    remember(user.pk, post_id, True)
+    return True
+
+
+def unlike(user, post_id, epoch):
+    """Снимает лайк, False — если его не было."""
+    likes = Like.objects.filter(user=user, post_id=post_id)
+    deleted, _ = likes.filter(pending=1).delete()
+    if not deleted and not likes.filter(pending=0).update(pending=-1):
+        remember(user.pk, post_id, False)
+        return False
+    bump(post_id, epoch, -1)
+    remember(user.pk, post_id, False)
+    return True
+
+
+def flush_batch(batch_size):
+    """Переносит пачку лайков в Post.likes_count.
+
+    Изменения суммируются по постам и пишутся одним UPDATE на базу
+    постов, тот же UPDATE начинает у постов новую эпоху счётчиков.
+    Кеш не трогается, поэтому сброс работает из любого процесса.
+    Лайк, поставленный между выборкой и сбросом, пропадёт из счётчика
+    до следующего прохода, но не из БД.
+    """
+    with transaction.atomic():
+        likes = list(
+            Like.objects.select_for_update(skip_locked=True)
+            .exclude(pending=0).order_by('pk')
+            .values_list('pk', 'post_id', 'pending')[:batch_size]
+        )
+        if not likes:
+            return 0
+        deltas = defaultdict(int)
+        for _, post_id, pending in likes:
+            deltas[post_id] += pending
+        by_database = defaultdict(dict)
+        for post_id, delta in deltas.items():
+            # эпоху меняем и при нулевой сумме: лайки пачки уже в БД
+            using = (
+                sharding.shard_for_post(post_id) if sharding.is_enabled()
+                else DEFAULT_DB_ALIAS
+            )
+            by_database[using][post_id] = delta
+        for using, batch in by_database.items():
+            Post.all_objects.using(using).filter(pk__in=batch).update(
+                likes_count=Case(
+                    *(
+                        When(pk=pk, then=F('likes_count') + delta)
+                        for pk, delta in batch.items()
+                    ),
+                    default=F('likes_count'),
+                ),
+                likes_epoch=F('likes_epoch') + 1,
+            )
+        ids = [pk for pk, _, _ in likes]
+        Like.objects.filter(pk__in=ids, pending=-1).delete()
+        Like.objects.filter(pk__in=ids).update(pending=0)
+    return len(likes)
+
+
+def flush_likes(batch_size=None):
+    batch_size = batch_size or settings.LIKES_FLUSH_BATCH_SIZE
+    flushed = 0
+    while True:
+        count = flush_batch(batch_size)
+        flushed += count
+        if count < batch_size:
+            return flushed
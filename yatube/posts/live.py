@@ -0,0 +1,200 @@
+import logging
+import queue
+import threading
+import time
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import DatabaseError
+from django.db.models import Max
+from django.utils import timezone
+
+from core.concurrent import release_connections
+from posts.models import LiveEvent
+
+logger = logging.getLogger(__name__)
+
+
+class Subscription:
+    def __init__(self, hub, channels):
+        self.hub = hub
+        self.channels = channels
+        self.queue = queue.Queue(maxsize=settings.LIVE_BUFFER_SIZE)
+        self.closed = False
+
+    def put(self, message):
+        # медленный клиент теряет самые старые сообщения, а не память сервера
+        while True:
+            try:
+                self.queue.put_nowait(message)
+                return
+            except queue.Full:
+                try:
+                    self.queue.get_nowait()
+                except queue.Empty:
+                    pass
+
+    def get(self, timeout):
+        try:
+            return self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def close(self):
+        if not self.closed:
+            self.closed = True
+            self.hub.unsubscribe(self)
+
+
+class Hub:
+    """Подписки процесса на новые посты.
+
+    Посты публикуют разные процессы, поэтому publish_posts пишет события
+    в таблицу LiveEvent, а хаб, пока у него есть подписчики, раз в
+    LIVE_POLL_INTERVAL секунд читает новые события одним запросом в
+    фоновом потоке и раздаёт их по каналам. У каждого подписчика своя
+    очередь на LIVE_BUFFER_SIZE сообщений, подписчиков не больше
+    LIVE_MAX_STREAMS.
+    """
+
+    def __init__(self, background=True):
+        self.background = background
+        self.lock = threading.Lock()
+        self.poll_lock = threading.Lock()
+        self.subscriptions = defaultdict(set)
+        self.count = 0
+        self.last_event = None
+        self.poller = None
+
+    def subscribe(self, channels):
+        """Новая подписка или None, если мест нет."""
+        with self.lock:
+            if self.count >= settings.LIVE_MAX_STREAMS:
+                return None
+            subscription = Subscription(self, tuple(channels))
+            for channel in subscription.channels:
+                self.subscriptions[channel].add(subscription)
+            self.count += 1
+            start = self.background and self.poller is None
+            if start:
+                self.poller = threading.Thread(
+                    target=self.run, name='live', daemon=True
+                )
+        if self.last_event is None:
+            self.poll()
+        if start:
+            self.poller.start()
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self.lock:
+            for channel in subscription.channels:
+                self.subscriptions[channel].discard(subscription)
+                if not self.subscriptions[channel]:
+                    del self.subscriptions[channel]
+            self.count -= 1
+            if not self.count:
+                # без подписчиков события не читаются, новый подписчик
+                # начнёт с последнего, а не получит накопившееся
+                self.last_event = None
+
+    def publish(self, channel, message):
+        with self.lock:
+            subscriptions = list(self.subscriptions.get(channel, ()))
+        for subscription in subscriptions:
+            subscription.put(message)
+        return len(subscriptions)
+
+    def poll(self):
+        """Раздаёт события, записанные с прошлого опроса.
+
+        Первый опрос только запоминает последнее событие. Возвращает
+        число розданных событий.
+        """
+        with self.poll_lock:
+            if self.last_event is None:
+                self.last_event = LiveEvent.objects.aggregate(
+                    last=Max('pk')
+                )['last'] or 0
+                return 0
+            events = list(
+                LiveEvent.objects.filter(pk__gt=self.last_event)
+                .order_by('pk')[:settings.LIVE_POLL_BATCH_SIZE]
+            )
+            for event in events:
+                for channel in post_channels(event):
+                    self.publish(channel, event.post_id)
+            if events:
+                self.last_event = events[-1].pk
+            return len(events)
+
+    def run(self):
+        while True:
+            time.sleep(settings.LIVE_POLL_INTERVAL)
+            if not self.count:
+                continue
+            try:
+                self.poll()
+            except DatabaseError:
+                logger.exception('События живой ленты не прочитаны')
+            finally:
+                release_connections()
+
+
+hub = Hub()
+
+
+def post_channels(post):
+    channels = ['index', f'author:{post.author_id}']
+    if post.group_id:
+        channels.append(f'group:{post.group_id}')
+    return channels
+
+
+def publish_posts(posts):
+    """Записывает новые посты для хабов всех процессов."""
+    LiveEvent.objects.bulk_create(
+        LiveEvent(
+            post_id=post.pk, author_id=post.author_id, group_id=post.group_id
+        )
+        for post in posts
+    )
+    LiveEvent.objects.filter(
+        created__lt=timezone.now() - timedelta(seconds=settings.LIVE_EVENT_TTL)
+    ).delete()
+
+
+def publish_post(post):
+    publish_posts([post])
+
+
+def event_stream(channels, timeout=None):
+    """События text/event-stream с id новых постов.
+
+    Пока нового нет, раз в LIVE_HEARTBEAT секунд уходит комментарий, чтобы
+    прокси не закрывали соединение. Через LIVE_STREAM_TIMEOUT секунд
+    поток завершается и браузер переподключается сам. Подписка
+    оформляется при первом чтении, так что оборванный до начала ответа
+    запрос не оставляет её висеть. Если мест в хабе нет, поток сразу
+    завершается и браузер переподключается через LIVE_BUSY_RETRY_MS.
+    """
+    timeout = settings.LIVE_STREAM_TIMEOUT if timeout is None else timeout
+    deadline = time.monotonic() + timeout
+    subscription = hub.subscribe(channels)
+    if subscription is None:
+        yield f'retry: {settings.LIVE_BUSY_RETRY_MS}\n\n'
+        return
+    try:
+        yield f'retry: {settings.LIVE_RETRY_MS}\n\n'
+        while True:
+            left = deadline - time.monotonic()
+            if left <= 0:
+                return
+            post_id = subscription.get(min(settings.LIVE_HEARTBEAT, left))
+            if post_id is None:
+                yield ': ping\n\n'
+            else:
+                yield f'event: post\ndata: {post_id}\n\n'
+    finally:
+        subscription.close()
@@ -0,0 +1,27 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from posts.archive import archive_cutoff, archive_posts
+
+
+class Command(BaseCommand):
+    help = 'Переносит старые посты и комментарии к ним в архивные таблицы'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=settings.POSTS_ARCHIVE_AFTER_DAYS,
+            help='Архивировать посты старше указанного числа дней',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=settings.POSTS_ARCHIVE_BATCH_SIZE,
+        )
+
+    def handle(self, *args, **options):
+        moved = archive_posts(
+            archive_cutoff(options['days']), options['batch_size']
+        )
+        self.stdout.write(f'Перенесено в архив постов: {moved}')
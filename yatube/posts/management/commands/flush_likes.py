@@ -0,0 +1,32 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from posts.likes import flush_likes
+
+
+class Command(BaseCommand):
+    help = 'Переносит накопленные лайки в счётчики постов'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=settings.LIKES_FLUSH_BATCH_SIZE,
+        )
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Не завершаться, а сбрасывать лайки каждые '
+                 'LIKES_FLUSH_POLL_INTERVAL секунд',
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            flushed = flush_likes(options['batch_size'])
+            if flushed or not options['loop']:
+                self.stdout.write(f'Учтено лайков: {flushed}')
+            if not options['loop']:
+                return
+            time.sleep(settings.LIKES_FLUSH_POLL_INTERVAL)
@@ -0,0 +1,50 @@
+from django.core.management.base import BaseCommand
+
+from posts.datagen import PASSWORD, DataGenerator
+
+
+class Command(BaseCommand):
+    help = (
+        'Заполняет базу синтетическими пользователями, группами, постами, '
+        'комментариями и подписками для нагрузочных тестов'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=10000)
+        parser.add_argument('--groups', type=int, default=100)
+        parser.add_argument('--posts', type=int, default=100000)
+        parser.add_argument('--comments', type=int, default=300000)
+        parser.add_argument('--follows', type=int, default=100000)
+        parser.add_argument('--batch-size', type=int, default=10000)
+        parser.add_argument(
+            '--days', type=int, default=365,
+            help='Посты распределяются по последним N дням',
+        )
+        parser.add_argument(
+            '--exponent', type=float, default=1.1,
+            help='Показатель закона Ципфа для популярности',
+        )
+        parser.add_argument('--seed', type=int)
+
+    def handle(self, *args, **options):
+        generator = DataGenerator(
+            batch_size=options['batch_size'],
+            seed=options['seed'],
+            days=options['days'],
+            exponent=options['exponent'],
+            stdout=self.stdout,
+        )
+        report = generator.run(
+            users=options['users'],
+            groups=options['groups'],
+            posts=options['posts'],
+            comments=options['comments'],
+            follows=options['follows'],
+        )
+        rows = sum(rows for _, rows, _ in report)
+        seconds = sum(seconds for _, _, seconds in report)
+        self.stdout.write(
+            f'Всего: {rows} строк за {seconds:.1f} с '
+            f'({rows / max(seconds, 1e-9):.0f} строк/с). '
+            f'Пароль пользователей: {PASSWORD}'
+        )
@@ -0,0 +1,32 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from posts.publishing import publish_due
+
+
+class Command(BaseCommand):
+    help = 'Публикует отложенные посты, срок которых наступил'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=settings.PUBLISH_BATCH_SIZE,
+        )
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Не завершаться, а проверять каждые '
+                 'PUBLISH_POLL_INTERVAL секунд',
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            published = publish_due(options['batch_size'])
+            if published or not options['loop']:
+                self.stdout.write(f'Опубликовано постов: {published}')
+            if not options['loop']:
+                return
+            time.sleep(settings.PUBLISH_POLL_INTERVAL)
@@ -0,0 +1,29 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from posts.moderation import purge_deleted
+
+
+class Command(BaseCommand):
+    help = 'Физически удаляет посты и комментарии, удалённые модератором'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=settings.SOFT_DELETE_PURGE_AFTER_DAYS,
+            help='Удалять строки, помеченные удалёнными раньше этого срока',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=settings.MODERATION_BATCH_SIZE,
+        )
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=options['days'])
+        purged = purge_deleted(cutoff, options['batch_size'])
+        self.stdout.write(f'Удалено строк: {purged}')
@@ -0,0 +1,26 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from posts.groups import refresh_group_stats
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает сводку по группам для каталога групп'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Не завершаться, а пересчитывать каждые '
+                 'GROUP_STATS_REFRESH_INTERVAL секунд',
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            groups = refresh_group_stats()
+            self.stdout.write(f'Пересчитано групп: {groups}')
+            if not options['loop']:
+                return
+            time.sleep(settings.GROUP_STATS_REFRESH_INTERVAL)
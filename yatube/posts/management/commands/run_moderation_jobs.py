@@ -0,0 +1,32 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from posts.moderation import run_pending_jobs
+
+
+class Command(BaseCommand):
+    help = 'Выполняет задачи модерации из очереди пачками'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=settings.MODERATION_BATCH_SIZE,
+        )
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Не завершаться, а проверять очередь каждые '
+                 'MODERATION_POLL_INTERVAL секунд',
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            done = run_pending_jobs(options['batch_size'])
+            if done or not options['loop']:
+                self.stdout.write(f'Выполнено задач: {done}')
+            if not options['loop']:
+                return
+            time.sleep(settings.MODERATION_POLL_INTERVAL)
@@ -0,0 +1,48 @@
+# Generated by Django 2.2.16 on 2026-10-19 07:59
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('posts', '0011_post_pub_date_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='is_hidden',
+            field=models.BooleanField(default=False, verbose_name='Скрыт модератором'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='is_hidden',
+            field=models.BooleanField(default=False, verbose_name='Скрыт модератором'),
+        ),
+        migrations.CreateModel(
+            name='ModerationJob',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('action', models.CharField(choices=[('delete', 'Удалить'), ('hide', 'Скрыть'), ('unhide', 'Показать'), ('regroup', 'Перенести в группу')], max_length=10, verbose_name='Действие')),
+                ('target', models.CharField(choices=[('posts', 'Посты'), ('comments', 'Комментарии')], default='posts', max_length=10, verbose_name='Что')),
+                ('status', models.CharField(choices=[('pending', 'В очереди'), ('running', 'Выполняется'), ('done', 'Готово'), ('failed', 'Ошибка')], default='pending', max_length=10, verbose_name='Статус')),
+                ('total', models.PositiveIntegerField(default=0, verbose_name='Всего')),
+                ('processed', models.PositiveIntegerField(default=0, verbose_name='Обработано')),
+                ('error', models.TextField(blank=True, verbose_name='Ошибка')),
+                ('created', models.DateTimeField(auto_now_add=True, verbose_name='Создано')),
+                ('finished', models.DateTimeField(blank=True, null=True, verbose_name='Завершено')),
+                ('author', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Автор')),
+                ('group', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='posts.Group', verbose_name='Группа')),
+                ('new_group', models.ForeignKey(blank=True, help_text='Только для переноса постов; пусто — убрать из группы', null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='posts.Group', verbose_name='Новая группа')),
+            ],
+            options={
+                'verbose_name': 'Задача модерации',
+                'verbose_name_plural': 'Задачи модерации',
+                'ordering': ['-created'],
+            },
+        ),
+    ]
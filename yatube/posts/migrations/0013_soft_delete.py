@@ -0,0 +1,57 @@
+# Generated by Django 2.2.16 on 2026-10-19 08:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0012_moderation'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='deleted_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Дата удаления'),
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='is_deleted',
+            field=models.BooleanField(default=False, verbose_name='Удалён'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='deleted_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Дата удаления'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='is_deleted',
+            field=models.BooleanField(default=False, verbose_name='Удалён'),
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(condition=models.Q(('is_deleted', False), ('is_hidden', False)), fields=['post', 'id'], name='comment_visible_post_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(condition=models.Q(is_deleted=True), fields=['deleted_at'], name='comment_deleted_at_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(condition=models.Q(('is_deleted', False), ('is_hidden', False)), fields=['-pub_date'], name='post_visible_pub_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(condition=models.Q(('is_deleted', False), ('is_hidden', False)), fields=['author', '-pub_date'], name='post_visible_author_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(condition=models.Q(('is_deleted', False), ('is_hidden', False)), fields=['group', '-pub_date'], name='post_visible_group_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(condition=models.Q(is_deleted=True), fields=['deleted_at'], name='post_deleted_at_idx'),
+        ),
+    ]
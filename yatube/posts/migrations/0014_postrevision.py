@@ -0,0 +1,28 @@
+# Generated by Django 2.2.16 on 2026-10-19 08:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0013_soft_delete'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PostRevision',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('post_id', models.IntegerField()),
+                ('number', models.PositiveIntegerField()),
+                ('is_checkpoint', models.BooleanField(default=False)),
+                ('data', models.BinaryField()),
+                ('created', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['-number'],
+                'unique_together': {('post_id', 'number')},
+            },
+        ),
+    ]
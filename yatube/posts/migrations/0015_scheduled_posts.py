@@ -0,0 +1,51 @@
+# Generated by Django 2.2.16 on 2026-10-19 08:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0014_postrevision'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='post',
+            name='post_visible_pub_date_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='post',
+            name='post_visible_author_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='post',
+            name='post_visible_group_idx',
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='publish_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Опубликовать в'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='status',
+            field=models.CharField(choices=[('draft', 'Черновик'), ('scheduled', 'Запланирован'), ('published', 'Опубликован')], default='published', max_length=10, verbose_name='Статус'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(condition=models.Q(('is_deleted', False), ('is_hidden', False), ('status', 'published')), fields=['-pub_date'], name='post_visible_pub_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(condition=models.Q(('is_deleted', False), ('is_hidden', False), ('status', 'published')), fields=['author', '-pub_date'], name='post_visible_author_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(condition=models.Q(('is_deleted', False), ('is_hidden', False), ('status', 'published')), fields=['group', '-pub_date'], name='post_visible_group_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(condition=models.Q(status='scheduled'), fields=['publish_at'], name='post_scheduled_due_idx'),
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 2.2.16 on 2026-10-19 08:10
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('posts', '0015_scheduled_posts'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='archivedpost',
+            name='likes_count',
+            field=models.PositiveIntegerField(default=0, verbose_name='Лайки'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='likes_count',
+            field=models.PositiveIntegerField(default=0, verbose_name='Лайки'),
+        ),
+        migrations.CreateModel(
+            name='Like',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('post_id', models.IntegerField()),
+                ('pending', models.SmallIntegerField(default=1)),
+                ('created', models.DateTimeField(auto_now_add=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='likes', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='like',
+            index=models.Index(condition=models.Q(_negated=True, pending=0), fields=['id'], name='like_pending_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='like',
+            unique_together={('user', 'post_id')},
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 2.2.16 on 2026-10-19 08:13
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0016_likes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GroupStats',
+            fields=[
+                ('group', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='posts.Group')),
+                ('posts_count', models.PositiveIntegerField(default=0, verbose_name='Постов')),
+                ('last_post_at', models.DateTimeField(null=True, verbose_name='Последний пост')),
+                ('top_authors', models.TextField(default='[]', verbose_name='Активные авторы')),
+                ('updated', models.DateTimeField(auto_now=True, verbose_name='Пересчитано')),
+            ],
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 2.2.16 on 2026-10-19 08:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0017_group_stats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='likes_epoch',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+    ]
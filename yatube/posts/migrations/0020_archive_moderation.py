@@ -0,0 +1,51 @@
+# Generated by Django 2.2.16 on 2026-10-19 08:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0019_live_event'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='archivedcomment',
+            name='deleted_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Дата удаления'),
+        ),
+        migrations.AddField(
+            model_name='archivedcomment',
+            name='is_deleted',
+            field=models.BooleanField(default=False, verbose_name='Удалён'),
+        ),
+        migrations.AddField(
+            model_name='archivedcomment',
+            name='is_hidden',
+            field=models.BooleanField(default=False, verbose_name='Скрыт модератором'),
+        ),
+        migrations.AddField(
+            model_name='archivedpost',
+            name='deleted_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Дата удаления'),
+        ),
+        migrations.AddField(
+            model_name='archivedpost',
+            name='is_deleted',
+            field=models.BooleanField(default=False, verbose_name='Удалён'),
+        ),
+        migrations.AddField(
+            model_name='archivedpost',
+            name='is_hidden',
+            field=models.BooleanField(default=False, verbose_name='Скрыт модератором'),
+        ),
+        migrations.AddIndex(
+            model_name='archivedcomment',
+            index=models.Index(condition=models.Q(is_deleted=True), fields=['deleted_at'], name='archived_comment_deleted_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='archivedpost',
+            index=models.Index(condition=models.Q(is_deleted=True), fields=['deleted_at'], name='archived_post_deleted_idx'),
+        ),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 2.2.16 on 2026-10-19 09:20
+
+from django.db import migrations
+import django.db.models.manager
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0020_archive_moderation'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='archivedcomment',
+            options={'default_manager_name': 'all_objects'},
+        ),
+        migrations.AlterModelOptions(
+            name='archivedpost',
+            options={'default_manager_name': 'all_objects', 'ordering': ['-pub_date']},
+        ),
+        migrations.AlterModelOptions(
+            name='comment',
+            options={'default_manager_name': 'all_objects'},
+        ),
+        migrations.AlterModelOptions(
+            name='post',
+            options={'default_manager_name': 'all_objects', 'ordering': ['-pub_date']},
+        ),
+        migrations.AlterModelManagers(
+            name='archivedcomment',
+            managers=[
+                ('all_objects', django.db.models.manager.Manager()),
+            ],
+        ),
+        migrations.AlterModelManagers(
+            name='archivedpost',
+            managers=[
+                ('all_objects', django.db.models.manager.Manager()),
+            ],
+        ),
+        migrations.AlterModelManagers(
+            name='comment',
+            managers=[
+                ('all_objects', django.db.models.manager.Manager()),
+            ],
+        ),
+        migrations.AlterModelManagers(
+            name='post',
+            managers=[
+                ('all_objects', django.db.models.manager.Manager()),
+            ],
+        ),
+    ]
@@ -1,6 +1,12 @@
+import json
+
+from django.core.exceptions import ValidationError
 from django.db import models
+from django.utils import timezone
 from django.contrib.auth import get_user_model
 
+from posts import sharding
+
 User = get_user_model()
 
 
@@ -13,12 +19,95 @@ class Group(models.Model):
         return self.title
 
 
+class GroupStats(models.Model):
+    """Сводка по группе для каталога, пересчитывается refresh_group_stats."""
+
+    group = models.OneToOneField(
+        Group,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='stats'
+    )
+    posts_count = models.PositiveIntegerField('Постов', default=0)
+    last_post_at = models.DateTimeField('Последний пост', null=True)
+    # [[username, число постов], ...] по убыванию
+    top_authors = models.TextField('Активные авторы', default='[]')
+    updated = models.DateTimeField('Пересчитано', auto_now=True)
+
+    def authors(self):
+        return [
+            {'username': username, 'posts': posts}
+            for username, posts in json.loads(self.top_authors)
+        ]
+
+
+DRAFT = 'draft'
+SCHEDULED = 'scheduled'
+PUBLISHED = 'published'
+VISIBLE = {'is_deleted': False, 'is_hidden': False}
+PUBLISHED_VISIBLE = {**VISIBLE, 'status': PUBLISHED}
+
+
+class SoftDeleteQuerySet(models.QuerySet):
+    def soft_delete(self):
+        return self.update(is_deleted=True, deleted_at=timezone.now())
+
+
+class VisibleManager(models.Manager):
+    """Менеджер objects: без удалённых и скрытых строк.
+
+    Условие совпадает с условием частичных индексов модели, поэтому
+    ленты и списки комментариев читают только индекс видимых строк.
+    Все строки — через all_objects; он же менеджер по умолчанию, чтобы
+    админка, проверка внешних ключей и dumpdata видели и скрытые строки.
+    """
+
+    conditions = VISIBLE
+
+    def get_queryset(self):
+        return super().get_queryset().filter(**self.conditions)
+
+
+class PublishedManager(VisibleManager):
+    """Как VisibleManager, но ещё и без черновиков и отложенных постов."""
+
+    conditions = PUBLISHED_VISIBLE
+
+
+class PostQuerySet(SoftDeleteQuerySet):
+    def of_author(self, author):
+        queryset = self.filter(author=author)
+        if sharding.is_enabled():
+            queryset = queryset.using(sharding.shard_for_author(author.pk))
+        return queryset
+
+    def with_id(self, post_id):
+        queryset = self.filter(pk=post_id)
+        if sharding.is_enabled():
+            queryset = queryset.using(sharding.shard_for_post(post_id))
+        return queryset
+
+
+class CommentQuerySet(SoftDeleteQuerySet):
+    def of_post(self, post_id):
+        queryset = self.filter(post_id=post_id)
+        if sharding.is_enabled():
+            queryset = queryset.using(sharding.shard_for_post(post_id))
+        return queryset
+
+
+class PostTicket(models.Model):
+    """Источник глобальных id постов при включённом шардировании."""
+
+
 class Post(models.Model):
     text = models.TextField(
         verbose_name='Текс поста',
         help_text='Введите текст поста'
     )
-    pub_date = models.DateTimeField('Дата публикации', auto_now_add=True)
+    pub_date = models.DateTimeField(
+        'Дата публикации', auto_now_add=True, db_index=True
+    )
     author = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
@@ -39,13 +128,69 @@ class Post(models.Model):
         upload_to='posts/',
         blank=True
     )
+    is_hidden = models.BooleanField('Скрыт модератором', default=False)
+    is_deleted = models.BooleanField('Удалён', default=False)
+    deleted_at = models.DateTimeField('Дата удаления', blank=True, null=True)
+    status = models.CharField(
+        'Статус',
+        max_length=10,
+        choices=(
+            (DRAFT, 'Черновик'),
+            (SCHEDULED, 'Запланирован'),
+            (PUBLISHED, 'Опубликован'),
+        ),
+        default=PUBLISHED,
+    )
+    publish_at = models.DateTimeField(
+        'Опубликовать в', blank=True, null=True
+    )
+    # лайки, уже перенесённые в БД командой flush_likes, см. posts.likes
+    likes_count = models.PositiveIntegerField('Лайки', default=0)
+    likes_epoch = models.PositiveIntegerField(default=0, editable=False)
+
+    objects = PublishedManager.from_queryset(PostQuerySet)()
+    all_objects = PostQuerySet.as_manager()
 
     class Meta:
+        default_manager_name = 'all_objects'
         ordering = ['-pub_date']
+        indexes = [
+            models.Index(
+                fields=['-pub_date'],
+                name='post_visible_pub_date_idx',
+                condition=models.Q(**PUBLISHED_VISIBLE),
+            ),
+            models.Index(
+                fields=['author', '-pub_date'],
+                name='post_visible_author_idx',
+                condition=models.Q(**PUBLISHED_VISIBLE),
+            ),
+            models.Index(
+                fields=['group', '-pub_date'],
+                name='post_visible_group_idx',
+                condition=models.Q(**PUBLISHED_VISIBLE),
+            ),
+            models.Index(
+                fields=['deleted_at'],
+                name='post_deleted_at_idx',
+                condition=models.Q(is_deleted=True),
+            ),
+            models.Index(
+                fields=['publish_at'],
+                name='post_scheduled_due_idx',
+                condition=models.Q(status=SCHEDULED),
+            ),
+        ]
 
     def __str__(self):
         return self.text[:15]
 
+    def save(self, *args, **kwargs):
+        # create() передаёт using='default', шард выбираем сами
+        if sharding.is_enabled():
+            kwargs['using'] = sharding.shard_for_instance(self)
+        super().save(*args, **kwargs)
+
 
 class Comment(models.Model):
     post = models.ForeignKey(
@@ -60,6 +205,33 @@ class Comment(models.Model):
     )
     text = models.TextField()
     created = models.DateTimeField(auto_now_add=True)
+    is_hidden = models.BooleanField('Скрыт модератором', default=False)
+    is_deleted = models.BooleanField('Удалён', default=False)
+    deleted_at = models.DateTimeField('Дата удаления', blank=True, null=True)
+
+    objects = VisibleManager.from_queryset(CommentQuerySet)()
+    all_objects = CommentQuerySet.as_manager()
+
+    class Meta:
+        default_manager_name = 'all_objects'
+        indexes = [
+            models.Index(
+                fields=['post', 'id'],
+                name='comment_visible_post_idx',
+                condition=models.Q(**VISIBLE),
+            ),
+            models.Index(
+                fields=['deleted_at'],
+                name='comment_deleted_at_idx',
+                condition=models.Q(is_deleted=True),
+            ),
+        ]
+
+    def save(self, *args, **kwargs):
+        # create() передаёт using='default', шард выбираем сами
+        if sharding.is_enabled():
+            kwargs['using'] = sharding.shard_for_instance(self)
+        super().save(*args, **kwargs)
 
 
 class Follow(models.Model):
@@ -73,3 +245,224 @@ class Follow(models.Model):
         on_delete=models.CASCADE,
         related_name='following'
     )
+
+
+class Like(models.Model):
+    """Лайк поста, см. posts.likes.
+
+    pending — ещё не учтённое в Post.likes_count изменение: 1 — новый
+    лайк, -1 — снятый (строка удаляется при сбросе), 0 — учтён.
+    """
+
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='likes'
+    )
+    post_id = models.IntegerField()
+    pending = models.SmallIntegerField(default=1)
+    created = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ('user', 'post_id')
+        indexes = [
+            models.Index(
+                fields=['id'],
+                name='like_pending_idx',
+                condition=~models.Q(pending=0),
+            ),
+        ]
+
+
+class ModerationJob(models.Model):
+    """Массовое действие модератора, выполняется run_moderation_jobs.
+
+    Затрагивает все посты или комментарии автора и/или группы.
+    """
+
+    DELETE = 'delete'
+    HIDE = 'hide'
+    UNHIDE = 'unhide'
+    REGROUP = 'regroup'
+    ACTIONS = (
+        (DELETE, 'Удалить'),
+        (HIDE, 'Скрыть'),
+        (UNHIDE, 'Показать'),
+        (REGROUP, 'Перенести в группу'),
+    )
+    POSTS = 'posts'
+    COMMENTS = 'comments'
+    TARGETS = (
+        (POSTS, 'Посты'),
+        (COMMENTS, 'Комментарии'),
+    )
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUSES = (
+        (PENDING, 'В очереди'),
+        (RUNNING, 'Выполняется'),
+        (DONE, 'Готово'),
+        (FAILED, 'Ошибка'),
+    )
+
+    action = models.CharField('Действие', max_length=10, choices=ACTIONS)
+    target = models.CharField(
+        'Что', max_length=10, choices=TARGETS, default=POSTS
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        blank=True,
+        null=True,
+        related_name='+',
+        verbose_name='Автор'
+    )
+    group = models.ForeignKey(
+        Group,
+        on_delete=models.CASCADE,
+        blank=True,
+        null=True,
+        related_name='+',
+        verbose_name='Группа'
+    )
+    new_group = models.ForeignKey(
+        Group,
+        on_delete=models.CASCADE,
+        blank=True,
+        null=True,
+        related_name='+',
+        verbose_name='Новая группа',
+        help_text='Только для переноса постов; пусто — убрать из группы'
+    )
+    status = models.CharField(
+        'Статус', max_length=10, choices=STATUSES, default=PENDING
+    )
+    total = models.PositiveIntegerField('Всего', default=0)
+    processed = models.PositiveIntegerField('Обработано', default=0)
+    error = models.TextField('Ошибка', blank=True)
+    created = models.DateTimeField('Создано', auto_now_add=True)
+    finished = models.DateTimeField('Завершено', blank=True, null=True)
+
+    class Meta:
+        ordering = ['-created']
+        verbose_name = 'Задача модерации'
+        verbose_name_plural = 'Задачи модерации'
+
+    def __str__(self):
+        return f'{self.get_action_display()} {self.get_target_display()}'
+
+    def clean(self):
+        if self.author_id is None and self.group_id is None:
+            raise ValidationError('Укажите автора или группу.')
+        if self.action == self.REGROUP and self.target != self.POSTS:
+            raise ValidationError('Переносить в группу можно только посты.')
+
+
+class PostRevision(models.Model):
+    """Версия текста поста, см. posts.revisions.
+
+    Пост хранится по id без внешнего ключа: он может лежать в шарде
+    или в архиве.
+    """
+
+    post_id = models.IntegerField()
+    number = models.PositiveIntegerField()
+    is_checkpoint = models.BooleanField(default=False)
+    data = models.BinaryField()
+    created = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-number']
+        unique_together = ('post_id', 'number')
+
+
+class LiveEvent(models.Model):
+    """Новый пост для живых лент всех процессов, см. posts.live.
+
+    Пост хранится по id без внешнего ключа: он может лежать в шарде.
+    """
+
+    post_id = models.IntegerField()
+    author_id = models.IntegerField()
+    group_id = models.IntegerField(null=True)
+    created = models.DateTimeField(auto_now_add=True, db_index=True)
+
+
+class ArchivedPost(models.Model):
+    """Пост, перенесённый из горячей таблицы командой archive_posts.
+
+    Модерация скрывает и удаляет архивные посты так же, как горячие.
+    """
+
+    id = models.IntegerField(primary_key=True)
+    text = models.TextField('Текс поста')
+    pub_date = models.DateTimeField('Дата публикации', db_index=True)
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='archived_posts',
+        verbose_name='Автор'
+    )
+    group = models.ForeignKey(
+        Group,
+        on_delete=models.SET_NULL,
+        blank=True,
+        null=True,
+        related_name='archived_posts',
+        verbose_name='Группа'
+    )
+    image = models.ImageField('Картинка', upload_to='posts/', blank=True)
+    likes_count = models.PositiveIntegerField('Лайки', default=0)
+    is_hidden = models.BooleanField('Скрыт модератором', default=False)
+    is_deleted = models.BooleanField('Удалён', default=False)
+    deleted_at = models.DateTimeField('Дата удаления', blank=True, null=True)
+
+    objects = VisibleManager.from_queryset(PostQuerySet)()
+    all_objects = PostQuerySet.as_manager()
+
+    class Meta:
+        default_manager_name = 'all_objects'
+        ordering = ['-pub_date']
+        indexes = [
+            models.Index(
+                fields=['deleted_at'],
+                name='archived_post_deleted_idx',
+                condition=models.Q(is_deleted=True),
+            ),
+        ]
+
+    def __str__(self):
+        return self.text[:15]
+
+
+class ArchivedComment(models.Model):
+    post = models.ForeignKey(
+        ArchivedPost,
+        on_delete=models.CASCADE,
+        related_name='comments'
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='archived_comments'
+    )
+    text = models.TextField()
+    created = models.DateTimeField()
+    is_hidden = models.BooleanField('Скрыт модератором', default=False)
+    is_deleted = models.BooleanField('Удалён', default=False)
+    deleted_at = models.DateTimeField('Дата удаления', blank=True, null=True)
+
+    objects = VisibleManager.from_queryset(CommentQuerySet)()
+    all_objects = CommentQuerySet.as_manager()
+
+    class Meta:
+        default_manager_name = 'all_objects'
+        indexes = [
+            models.Index(
+                fields=['deleted_at'],
+                name='archived_comment_deleted_idx',
+                condition=models.Q(is_deleted=True),
+            ),
+        ]
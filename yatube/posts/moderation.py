@@ -0,0 +1,166 @@
+import logging
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.db.models.deletion import Collector
+from django.utils import timezone
+
+from posts import sharding
+from posts.archive import bump_archive_version
+from posts.cache import invalidate_feeds
+from posts.models import (
+    ArchivedComment, ArchivedPost, Comment, ModerationJob, Post,
+)
+
+logger = logging.getLogger(__name__)
+
+# горячая таблица и архив: модерация проходит по обеим
+TABLES = {
+    ModerationJob.POSTS: (Post, ArchivedPost),
+    ModerationJob.COMMENTS: (Comment, ArchivedComment),
+}
+
+
+def job_queryset(job, model, using):
+    queryset = model.all_objects.using(using)
+    if job.target == ModerationJob.POSTS:
+        group_lookup = 'group_id'
+    else:
+        group_lookup = 'post__group_id'
+    if job.author_id is not None:
+        queryset = queryset.filter(author_id=job.author_id)
+    if job.group_id is not None:
+        queryset = queryset.filter(**{group_lookup: job.group_id})
+    if job.action == ModerationJob.DELETE:
+        queryset = queryset.filter(is_deleted=False)
+    elif job.action == ModerationJob.HIDE:
+        queryset = queryset.filter(is_hidden=False)
+    elif job.action == ModerationJob.UNHIDE:
+        queryset = queryset.filter(is_hidden=True)
+    return queryset
+
+
+def delete_chunk(queryset):
+    """Удаляет пачку одним DELETE, если на модель не завязаны каскады
+    и сигналы, иначе — обычным delete() в пределах пачки."""
+    if Collector(using=queryset.db).can_fast_delete(queryset):
+        return queryset._raw_delete(queryset.db)
+    return queryset.delete()[0]
+
+
+def apply_chunk(job, model, using, ids):
+    queryset = model.all_objects.using(using).filter(pk__in=ids)
+    # удаление мягкое, строки физически убирает purge_deleted
+    if job.action == ModerationJob.DELETE:
+        queryset.soft_delete()
+    elif job.action == ModerationJob.REGROUP:
+        queryset.update(group_id=job.new_group_id)
+    else:
+        queryset.update(is_hidden=job.action == ModerationJob.HIDE)
+
+
+def purge_batch(using, cutoff, batch_size, post_model=Post,
+                comment_model=Comment):
+    """Физически удаляет пачку постов, помеченных удалёнными до cutoff,
+    вместе с комментариями, затем пачку таких же комментариев."""
+    with transaction.atomic(using=using):
+        ids = list(
+            post_model.all_objects.using(using)
+            .filter(is_deleted=True, deleted_at__lt=cutoff)
+            .values_list('pk', flat=True)[:batch_size]
+        )
+        if ids:
+            delete_chunk(
+                comment_model.all_objects.using(using).filter(post_id__in=ids)
+            )
+            delete_chunk(
+                post_model.all_objects.using(using).filter(pk__in=ids)
+            )
+        comment_ids = list(
+            comment_model.all_objects.using(using)
+            .filter(is_deleted=True, deleted_at__lt=cutoff)
+            .values_list('pk', flat=True)[:batch_size]
+        )
+        if comment_ids:
+            delete_chunk(
+                comment_model.all_objects.using(using)
+                .filter(pk__in=comment_ids)
+            )
+    return len(ids) + len(comment_ids)
+
+
+def purge_deleted(cutoff, batch_size=None):
+    batch_size = batch_size or settings.MODERATION_BATCH_SIZE
+    purged = 0
+    for using in sharding.post_databases():
+        for post_model, comment_model in zip(
+            TABLES[ModerationJob.POSTS], TABLES[ModerationJob.COMMENTS]
+        ):
+            while True:
+                count = purge_batch(
+                    using, cutoff, batch_size, post_model, comment_model
+                )
+                purged += count
+                if not count:
+                    break
+    return purged
+
+
+def run_job(job, batch_size=None):
+    """Выполняет задачу пачками по batch_size строк.
+
+    Задача проходит и горячие, и архивные таблицы. После каждой пачки
+    в задаче обновляется счётчик processed, по нему в админке виден
+    прогресс. Кеш лент и размеров архива сбрасывается один раз в конце.
+    """
+    batch_size = batch_size or settings.MODERATION_BATCH_SIZE
+    tables = [
+        (model, using)
+        for using in sharding.post_databases()
+        for model in TABLES[job.target]
+    ]
+    job.total = sum(
+        job_queryset(job, model, using).count() for model, using in tables
+    )
+    job.save(update_fields=['total'])
+    for model, using in tables:
+        last = 0
+        while True:
+            ids = list(
+                job_queryset(job, model, using)
+                .filter(pk__gt=last)
+                .order_by('pk')
+                .values_list('pk', flat=True)[:batch_size]
+            )
+            if not ids:
+                break
+            apply_chunk(job, model, using, ids)
+            last = ids[-1]
+            ModerationJob.objects.filter(pk=job.pk).update(
+                processed=F('processed') + len(ids)
+            )
+    invalidate_feeds()
+    bump_archive_version()
+
+
+def run_pending_jobs(batch_size=None):
+    done = 0
+    for job in ModerationJob.objects.filter(status=ModerationJob.PENDING):
+        claimed = ModerationJob.objects.filter(
+            pk=job.pk, status=ModerationJob.PENDING
+        ).update(status=ModerationJob.RUNNING)
+        if not claimed:
+            continue
+        try:
+            run_job(job, batch_size)
+        except Exception as error:
+            logger.exception('Задача модерации %s не выполнена', job.pk)
+            job.status = ModerationJob.FAILED
+            job.error = str(error)
+        else:
+            job.status = ModerationJob.DONE
+            done += 1
+        job.finished = timezone.now()
+        job.save(update_fields=['status', 'error', 'finished'])
+    return done
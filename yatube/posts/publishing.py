@@ -0,0 +1,72 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from notifications.fanout import enqueue_posts
+from posts import live, sharding
+from posts.cache import invalidate_feeds
+from posts.models import PUBLISHED, SCHEDULED, Post
+
+
+def announce(posts, using=None):
+    """Побочные эффекты публикации для пачки постов разом: одна вставка
+    событий для подписчиков и один сброс кеша лент на всю пачку."""
+    enqueue_posts(posts)
+
+    def after_commit():
+        invalidate_feeds()
+        live.publish_posts(posts)
+    transaction.on_commit(after_commit, using)
+
+
+def due_posts(using, batch_size, now):
+    return list(
+        Post.all_objects.using(using)
+        .select_for_update(skip_locked=True)
+        .filter(status=SCHEDULED, publish_at__lte=now)
+        .order_by('publish_at')[:batch_size]
+    )
+
+
+def publish_batch(using, batch_size, now):
+    """Публикует пачку наступивших постов, возвращает их число.
+
+    skip_locked разводит параллельные публикаторы не во всех базах
+    (SQLite его не умеет), поэтому пачка публикуется, только если все её
+    посты ещё отложены. Если часть успел опубликовать другой процесс,
+    транзакция откатывается и пачка выбирается заново.
+    """
+    while True:
+        with transaction.atomic(using=using):
+            posts = due_posts(using, batch_size, now)
+            if not posts:
+                return 0
+            updated = Post.all_objects.using(using).filter(
+                pk__in=[post.pk for post in posts], status=SCHEDULED
+            ).update(status=PUBLISHED, pub_date=F('publish_at'))
+            if updated == len(posts):
+                for post in posts:
+                    post.status = PUBLISHED
+                    post.pub_date = post.publish_at
+                announce(posts, using)
+                return len(posts)
+            transaction.set_rollback(True, using=using)
+
+
+def publish_due(batch_size=None, now=None):
+    """Публикует отложенные посты, чей срок наступил.
+
+    Срок ищется одним запросом по частичному индексу
+    post_scheduled_due_idx, который содержит только отложенные посты.
+    """
+    batch_size = batch_size or settings.PUBLISH_BATCH_SIZE
+    now = now or timezone.now()
+    published = 0
+    for using in sharding.post_databases():
+        while True:
+            count = publish_batch(using, batch_size, now)
+            published += count
+            if count < batch_size:
+                break
+    return published
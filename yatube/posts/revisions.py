@@ -0,0 +1,158 @@
+import difflib
+import json
+import zlib
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.db import IntegrityError, transaction
+
+from posts.models import PostRevision
+
+RECORD_ATTEMPTS = 3
+
+# Текст версии по номеру не меняется и может лежать в кеше процесса,
+# а список последних версий сбрасывается при правке — он в общем кеше.
+shared_cache = caches['shared']
+
+
+def make_delta(old, new):
+    """Построчная разница: копии строк old и вставки новых строк."""
+    old_lines = old.splitlines(keepends=True)
+    new_lines = new.splitlines(keepends=True)
+    matcher = difflib.SequenceMatcher(None, old_lines, new_lines, False)
+    delta = []
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == 'equal':
+            delta.append([i1, i2])
+        elif j1 != j2:
+            delta.append(''.join(new_lines[j1:j2]))
+    return delta
+
+
+def apply_delta(old, delta):
+    old_lines = old.splitlines(keepends=True)
+    parts = []
+    for op in delta:
+        if isinstance(op, str):
+            parts.append(op)
+        else:
+            parts.extend(old_lines[op[0]:op[1]])
+    return ''.join(parts)
+
+
+def pack(value):
+    return zlib.compress(json.dumps(value, ensure_ascii=False).encode())
+
+
+def unpack(data):
+    return json.loads(zlib.decompress(bytes(data)).decode())
+
+
+def recent_key(post_id):
+    return f'posts:revisions:{post_id}'
+
+
+def text_key(post_id, number):
+    return f'posts:revision:{post_id}:{number}'
+
+
+def append_revision(post, old_text):
+    every = settings.POST_REVISION_CHECKPOINT_EVERY
+    last = (
+        PostRevision.objects.select_for_update()
+        .filter(post_id=post.pk)
+        .values_list('number', flat=True)
+        .first()
+    )
+    if last is None:
+        PostRevision.objects.create(
+            post_id=post.pk, number=0, is_checkpoint=True,
+            data=pack(old_text),
+        )
+        last, base = 0, old_text
+    else:
+        base = revision_text(post.pk, last)
+    if base == post.text:
+        return None
+    number = last + 1
+    if number % every == 0:
+        revision = PostRevision(is_checkpoint=True, data=pack(post.text))
+    else:
+        revision = PostRevision(data=pack(make_delta(base, post.text)))
+    revision.post_id = post.pk
+    revision.number = number
+    revision.save()
+    return revision
+
+
+def record_edit(post, old_text):
+    """Сохраняет правку поста.
+
+    Первая правка записывает исходный текст полной копией (версия 0).
+    Дальше каждая версия — сжатая разница с последней сохранённой, а
+    каждая POST_REVISION_CHECKPOINT_EVERY-я — снова полная копия.
+    Разница строится не от old_text: пост могли править мимо post_edit
+    (админка) или одновременно. Одновременные правки получат один номер,
+    проигравшая упрётся в unique_together и повторит попытку.
+    """
+    if post.text == old_text:
+        return None
+    for attempt in range(RECORD_ATTEMPTS):
+        try:
+            with transaction.atomic(using=PostRevision.objects.db):
+                revision = append_revision(post, old_text)
+            break
+        except IntegrityError:
+            if attempt == RECORD_ATTEMPTS - 1:
+                raise
+    if revision is None:
+        return None
+    shared_cache.delete(recent_key(post.pk))
+    cache.set(
+        text_key(post.pk, revision.number), post.text,
+        settings.POST_REVISIONS_CACHE_TIMEOUT,
+    )
+    return revision
+
+
+def revision_text(post_id, number):
+    """Текст версии number: ближайшая полная копия не новее неё плюс
+    разницы после копии — не больше POST_REVISION_CHECKPOINT_EVERY штук."""
+    key = text_key(post_id, number)
+    text = cache.get(key)
+    if text is not None:
+        return text
+    checkpoint = (
+        PostRevision.objects
+        .filter(post_id=post_id, number__lte=number, is_checkpoint=True)
+        .values_list('number', flat=True)
+        .first()
+    )
+    if checkpoint is None:
+        return None
+    revisions = PostRevision.objects.filter(
+        post_id=post_id, number__gte=checkpoint, number__lte=number
+    ).order_by('number')
+    text = None
+    for revision in revisions:
+        value = unpack(revision.data)
+        text = value if revision.is_checkpoint else apply_delta(text, value)
+    if revision.number != number:
+        return None
+    cache.set(key, text, settings.POST_REVISIONS_CACHE_TIMEOUT)
+    return text
+
+
+def recent_revisions(post_id):
+    """Номера и даты последних POST_REVISIONS_RECENT версий, из кеша."""
+    revisions = shared_cache.get(recent_key(post_id))
+    if revisions is None:
+        revisions = list(
+            PostRevision.objects.filter(post_id=post_id)
+            .values('number', 'created')[:settings.POST_REVISIONS_RECENT]
+        )
+        shared_cache.set(
+            recent_key(post_id), revisions,
+            settings.POST_REVISIONS_CACHE_TIMEOUT,
+        )
+    return revisions
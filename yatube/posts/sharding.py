@@ -0,0 +1,155 @@
+import heapq
+from itertools import islice
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import DEFAULT_DB_ALIAS
+
+
+def get_shards():
+    return list(getattr(settings, 'POST_SHARDS', []))
+
+
+def is_enabled():
+    return bool(get_shards())
+
+
+def shard_for_author(author_id):
+    shards = get_shards()
+    return shards[author_id % len(shards)]
+
+
+def shard_for_post(post_id):
+    """Номер шарда зашит в младшие разряды глобального id поста."""
+    shards = get_shards()
+    return shards[post_id % len(shards)]
+
+
+def post_databases():
+    """Базы, в которых лежат посты: шарды или одна default."""
+    return get_shards() or [DEFAULT_DB_ALIAS]
+
+
+def allocate_post_id(author_id):
+    from posts.models import PostTicket
+
+    ticket = PostTicket.objects.using(DEFAULT_DB_ALIAS).create()
+    shards_count = len(get_shards())
+    return ticket.pk * shards_count + author_id % shards_count
+
+
+def shard_for_instance(instance):
+    from posts.models import ArchivedComment, ArchivedPost, Comment, Post
+
+    if instance is None:
+        return None
+    if isinstance(instance, (Post, ArchivedPost)):
+        return shard_for_author(instance.author_id)
+    if isinstance(instance, (Comment, ArchivedComment)):
+        return shard_for_post(instance.post_id)
+    if isinstance(instance, get_user_model()):
+        return shard_for_author(instance.pk)
+    return None
+
+
+class ShardRouter:
+    """Роутер постов и комментариев по author_id.
+
+    Пост и все комментарии к нему лежат в шарде автора поста,
+    архивные копии — там же.
+    Пользователи и группы — справочные таблицы: пишутся в default
+    и копируются во все шарды (см. replicate_reference), чтобы
+    select_related и внешние ключи работали внутри шарда.
+    """
+
+    sharded_models = {'post', 'comment', 'archivedpost', 'archivedcomment'}
+
+    def _route(self, model, hints):
+        if not is_enabled():
+            return None
+        if (
+            model._meta.app_label != 'posts'
+            or model._meta.model_name not in self.sharded_models
+        ):
+            return DEFAULT_DB_ALIAS
+        return shard_for_instance(hints.get('instance'))
+
+    def db_for_read(self, model, **hints):
+        return self._route(model, hints)
+
+    def db_for_write(self, model, **hints):
+        return self._route(model, hints)
+
+    def allow_relation(self, obj1, obj2, **hints):
+        if is_enabled():
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if app_label == 'posts' and model_name == 'postticket':
+            return db == DEFAULT_DB_ALIAS
+        return None
+
+
+class ShardedFeed:
+    """Scatter-gather лента поверх шардов.
+
+    Каждый шард отдаёт свой поток, упорядоченный по -pub_date, а
+    срез собирается k-way слиянием. Объект понимает count() и срезы,
+    поэтому его можно передавать в Paginator вместо QuerySet.
+    """
+
+    ordered = True
+
+    def __init__(self, queryset, databases=None):
+        self.queryset = queryset
+        self.databases = databases or post_databases()
+
+    def count(self):
+        return sum(
+            self.queryset.using(alias).count() for alias in self.databases
+        )
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, key):
+        if not isinstance(key, slice):
+            return self[key:key + 1][0]
+        start = key.start or 0
+        stop = key.stop
+        streams = [
+            self.queryset.using(alias)[:stop] if stop is not None
+            else self.queryset.using(alias)
+            for alias in self.databases
+        ]
+        merged = heapq.merge(
+            *streams, key=lambda post: post.pub_date, reverse=True
+        )
+        return list(islice(merged, start, stop))
+
+    def __iter__(self):
+        return iter(self[:])
+
+
+def feed(queryset, databases=None):
+    # queryset, уже привязанный к шарду (of_author, with_id), не разносим
+    if is_enabled() and queryset._db is None:
+        return ShardedFeed(queryset, databases)
+    return queryset
+
+
+def replicate_reference(instance, deleted=False):
+    """Копирует пользователя или группу во все шарды."""
+    model = type(instance)
+    for alias in get_shards():
+        manager = model._base_manager.using(alias)
+        if deleted:
+            manager.filter(pk=instance.pk).delete()
+            continue
+        values = {
+            field.attname: getattr(instance, field.attname)
+            for field in model._meta.concrete_fields
+            if not field.primary_key
+        }
+        manager.update_or_create(pk=instance.pk, defaults=values)
@@ -0,0 +1,69 @@
+from django.contrib.auth import get_user_model
+from django.db import connections, transaction
+from django.db.models.signals import (
+    post_delete, post_migrate, post_save, pre_save,
+)
+from django.dispatch import receiver
+
+from posts import fts, live, sharding
+from posts.archive import bump_archive_version
+from posts.groups import invalidate_group
+from posts.models import PUBLISHED, ArchivedPost, Group, Post
+
+User = get_user_model()
+
+
+@receiver(pre_save, sender=Post)
+def assign_global_post_id(sender, instance, raw, **kwargs):
+    if sharding.is_enabled() and instance.pk is None and not raw:
+        instance.pk = sharding.allocate_post_id(instance.author_id)
+
+
+@receiver(post_save, sender=Post)
+def publish_new_post(sender, instance, created, raw, using, **kwargs):
+    if created and not raw and instance.status == PUBLISHED:
+        transaction.on_commit(lambda: live.publish_post(instance), using)
+
+
+@receiver(post_delete, sender=ArchivedPost)
+def reset_archive_counts(sender, using, **kwargs):
+    # пачка удалённых постов сбрасывает версию один раз на транзакцию
+    if not any(
+        func is bump_archive_version
+        for _, func in connections[using].run_on_commit
+    ):
+        transaction.on_commit(bump_archive_version, using)
+
+
+@receiver(pre_save, sender=Group)
+def remember_group_slug(sender, instance, raw, **kwargs):
+    if instance.pk is not None and not raw:
+        instance.old_slug = Group.objects.filter(pk=instance.pk).values_list(
+            'slug', flat=True
+        ).first()
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def invalidate_cached_group(sender, instance, **kwargs):
+    invalidate_group(instance.slug, getattr(instance, 'old_slug', None))
+
+
+@receiver(post_save, sender=User)
+@receiver(post_save, sender=Group)
+def replicate_reference_save(sender, instance, using, **kwargs):
+    if sharding.is_enabled() and using not in sharding.get_shards():
+        sharding.replicate_reference(instance)
+
+
+@receiver(post_delete, sender=User)
+@receiver(post_delete, sender=Group)
+def replicate_reference_delete(sender, instance, using, **kwargs):
+    if sharding.is_enabled() and using not in sharding.get_shards():
+        sharding.replicate_reference(instance, deleted=True)
+
+
+@receiver(post_migrate)
+def install_full_text_search(sender, using, **kwargs):
+    if sender.name == 'posts':
+        fts.install(connections[using])
@@ -0,0 +1,115 @@
+from django.contrib.auth import get_user_model
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import reverse
+from django.utils.http import urlencode
+
+from posts import sharding
+from posts.admin import request_database
+from posts.models import Comment, Group, Post
+
+User = get_user_model()
+
+
+class PostAdminTests(TestCase):
+    databases = '__all__'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser(
+            'admin', 'admin@example.com', 'password'
+        )
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+        # create, а не bulk_create: посты должны попасть в шард автора
+        for n in range(150):
+            Post.objects.create(
+                author=cls.admin, group=cls.group, text=f'Пост номер {n}'
+            )
+        Post.objects.create(author=cls.admin, text='Редкое слово здесь')
+        cls.posts = Post.objects.of_author(cls.admin)
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+        self.url = reverse('admin:posts_post_changelist')
+        self.shard = {'shard': self.posts.db}
+
+    def test_changelist_queries_do_not_grow_with_rows(self):
+        """Автор и группа подгружаются вместе с постами"""
+        self.client.get(self.url, self.shard)
+        # ограниченный COUNT и посты; без шардов в той же базе ещё
+        # сессия и пользователь из общего кеша
+        queries = 2 if sharding.is_enabled() else 4
+        with self.assertNumQueries(queries, using=self.posts.db):
+            response = self.client.get(self.url, self.shard)
+        self.assertEqual(len(response.context['cl'].result_list), 100)
+
+    def test_keyset_pages_cover_all_posts(self):
+        """Ссылки «дальше» проходят все посты без повторов"""
+        seen = []
+        response = self.client.get(self.url, self.shard)
+        while True:
+            changelist = response.context['cl']
+            seen.extend(post.pk for post in changelist.result_list)
+            if not changelist.next_cursor:
+                break
+            response = self.client.get(
+                self.url + changelist.next_page_query()
+            )
+        self.assertEqual(sorted(seen), sorted(
+            self.posts.values_list('pk', flat=True)
+        ))
+        self.assertEqual(len(seen), len(set(seen)))
+
+    @override_settings(ADMIN_COUNT_LIMIT=120)
+    def test_count_is_capped(self):
+        """Строки считаются не дальше предела"""
+        response = self.client.get(self.url, self.shard)
+        self.assertEqual(response.context['cl'].result_count, 120)
+
+    def test_search_uses_full_text_index(self):
+        """Поиск находит пост по словам из полнотекстового индекса"""
+        response = self.client.get(self.url, {**self.shard, 'q': 'редкое'})
+        self.assertEqual(
+            [post.text for post in response.context['cl'].result_list],
+            ['Редкое слово здесь'],
+        )
+
+    def test_full_text_index_follows_edits(self):
+        """Изменённый текст ищется по новым словам"""
+        post = self.posts.get(text='Редкое слово здесь')
+        post.text = 'Другой текст'
+        post.save()
+        response = self.client.get(self.url, {**self.shard, 'q': 'редкое'})
+        self.assertEqual(list(response.context['cl'].result_list), [])
+        response = self.client.get(self.url, {**self.shard, 'q': 'другой'})
+        self.assertEqual(list(response.context['cl'].result_list), [post])
+
+    def test_comment_on_hidden_post_editable(self):
+        """Комментарий к скрытому посту сохраняется в админке"""
+        post = Post.objects.create(
+            author=self.admin, text='Скрытый', is_hidden=True
+        )
+        comment = Comment.objects.create(
+            post=post, author=self.admin, text='Ответ'
+        )
+        url = reverse('admin:posts_comment_change', args=(comment.pk,))
+        filters = urlencode({'_changelist_filters': urlencode(self.shard)})
+        response = self.client.post(
+            f'{url}?{filters}',
+            {'post': post.pk, 'author': self.admin.pk, 'text': 'Исправлено'},
+        )
+        self.assertEqual(response.status_code, 302)
+        comment.refresh_from_db()
+        self.assertEqual(comment.text, 'Исправлено')
+
+    def test_database_from_saved_filters(self):
+        """Страница объекта читает базу из сохранённых фильтров списка"""
+        factory = RequestFactory()
+        last = sharding.post_databases()[-1]
+        request = factory.get('/', {'_changelist_filters': f'shard={last}'})
+        self.assertEqual(request_database(request), last)
+        request = factory.get('/', {'shard': 'unknown'})
+        self.assertEqual(
+            request_database(request), sharding.post_databases()[0]
+        )
@@ -0,0 +1,116 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from posts.archive import with_archive
+from posts.models import ArchivedComment, ArchivedPost, Comment, Post, User
+
+POSTS_PER_PAGE = settings.POSTS_PER_PAGE
+
+
+class ArchiveTests(TestCase):
+    databases = '__all__'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username='NoName')
+        for number in range(POSTS_PER_PAGE + 5):
+            Post.objects.create(author=cls.user, text=f'Пост {number}')
+        old = timezone.now() - timedelta(days=400)
+        posts = Post.objects.of_author(cls.user)
+        cls.old_ids = list(
+            posts.order_by('pk').values_list('pk', flat=True)[:8]
+        )
+        for offset, post_id in enumerate(cls.old_ids):
+            posts.filter(pk=post_id).update(
+                pub_date=old + timedelta(minutes=offset)
+            )
+        cls.old_post = posts.get(pk=cls.old_ids[0])
+        Comment.objects.create(
+            post=cls.old_post, author=cls.user, text='Старый комментарий'
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        call_command('archive_posts', batch_size=3, stdout=StringIO())
+
+    def test_old_posts_moved_to_archive(self):
+        """Старые посты и комментарии переносятся в архив"""
+        self.assertFalse(
+            Post.objects.of_author(self.user)
+            .filter(pk__in=self.old_ids).exists()
+        )
+        self.assertEqual(
+            ArchivedPost.objects.of_author(self.user)
+            .filter(pk__in=self.old_ids).count(),
+            len(self.old_ids),
+        )
+        self.assertTrue(
+            ArchivedComment.objects.of_post(self.old_post.pk).exists()
+        )
+
+    def test_post_detail_reads_through_archive(self):
+        """Страница поста открывает пост из архива"""
+        response = self.client.get(
+            reverse('posts:post_detail', args=(self.old_post.pk,))
+        )
+        self.assertEqual(response.context['post'].text, self.old_post.text)
+        self.assertTrue(response.context['is_archived'])
+        self.assertEqual(len(response.context['comments']), 1)
+        self.assertEqual(
+            response.context['author_posts_count'], POSTS_PER_PAGE + 5
+        )
+
+    def test_feed_slice_without_count(self):
+        """Срез ленты не ждёт COUNT, который идёт параллельно"""
+        feed = with_archive(Post.objects.all(), ArchivedPost.objects.all())
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(len(feed[:3]), 3)
+            self.assertEqual(len(feed[5:POSTS_PER_PAGE + 5]), POSTS_PER_PAGE)
+        self.assertFalse(
+            [query for query in queries if 'COUNT(' in query['sql']]
+        )
+
+    def test_deep_pages_continue_into_archive(self):
+        """Последняя страница ленты дочитывается из архива"""
+        response = self.client.get(reverse('posts:index') + '?page=2')
+        page = response.context['page_obj']
+        self.assertEqual(page.paginator.count, POSTS_PER_PAGE + 5)
+        self.assertEqual(
+            [post.pk for post in page], self.old_ids[::-1][3:]
+        )
+
+
+class ArchiveCountTests(TransactionTestCase):
+    databases = '__all__'
+
+    def setUp(self):
+        cache.clear()
+        caches['shared'].clear()
+        self.user = User.objects.create(username='NoName')
+        for number in range(3):
+            Post.objects.create(author=self.user, text=f'Пост {number}')
+        Post.objects.of_author(self.user).update(
+            pub_date=timezone.now() - timedelta(days=400)
+        )
+        call_command('archive_posts', stdout=StringIO())
+
+    def archive_count(self):
+        return with_archive(
+            Post.objects.all(), ArchivedPost.objects.all()
+        ).archive_count()
+
+    def test_count_reset_on_archive_delete(self):
+        """Удаление из архива сбрасывает закешированный размер архива"""
+        self.assertEqual(self.archive_count(), 3)
+        ArchivedPost.objects.of_author(self.user).first().delete()
+        self.assertEqual(self.archive_count(), 2)
@@ -0,0 +1,88 @@
+from collections import Counter
+from datetime import timedelta
+
+from django.test import TestCase
+from django.utils import timezone
+
+from posts import sharding
+from posts.datagen import PASSWORD, generate, next_id
+from posts.models import (
+    ArchivedPost, Comment, Follow, Group, Post, User,
+)
+
+
+def count(model):
+    return sum(
+        model.objects.using(using).count()
+        for using in sharding.post_databases()
+    )
+
+
+class DataGeneratorTests(TestCase):
+    databases = '__all__'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.report = generate(
+            users=200, groups=10, posts=2000, comments=3000, follows=2000,
+            batch_size=500, seed=1,
+        )
+
+    def test_counts(self):
+        """Генератор создаёт ровно столько строк, сколько просили"""
+        self.assertEqual(
+            [(name, rows) for name, rows, _ in self.report],
+            [
+                ('Пользователи', 200), ('Группы', 10), ('Подписки', 2000),
+                ('Посты', 2000), ('Комментарии', 3000),
+            ],
+        )
+        self.assertEqual(User.objects.count(), 200)
+        self.assertEqual(Group.objects.count(), 10)
+        self.assertEqual(count(Post), 2000)
+        self.assertEqual(count(Comment), 3000)
+        self.assertEqual(Follow.objects.count(), 2000)
+
+    def test_follows_are_unique_and_skewed(self):
+        """Подписки без повторов, у первых авторов больше подписчиков"""
+        pairs = list(Follow.objects.values_list('user', 'author'))
+        self.assertEqual(len(set(pairs)), len(pairs))
+        self.assertFalse([pair for pair in pairs if pair[0] == pair[1]])
+        followers = sorted(
+            Counter(author for _, author in pairs).values(), reverse=True
+        )
+        self.assertGreater(followers[0], 10 * followers[len(followers) // 2])
+
+    def test_rows_are_usable(self):
+        """Даты не перетираются auto_now_add, новая запись получает id"""
+        dates = [
+            date for using in sharding.post_databases()
+            for date in Post.objects.using(using).values_list(
+                'pub_date', flat=True
+            )
+        ]
+        self.assertGreater(max(dates) - min(dates), timedelta(days=300))
+        self.assertTrue(User.objects.first().check_password(PASSWORD))
+        author = User.objects.first()
+        comment = Comment.objects.create(
+            post=Post.objects.create(author=author, text='Новый'),
+            author=author,
+            text='Новый',
+        )
+        self.assertEqual(count(Comment), 3001)
+        self.assertTrue(comment.pk)
+
+    def test_next_id_skips_archived_and_deleted_posts(self):
+        """Новые id не повторяют id архивных и удалённых постов"""
+        author = User.objects.first()
+        using = Post.objects.of_author(author).db
+        last = next_id(Post, ArchivedPost, using=using)
+        ArchivedPost.objects.using(using).create(
+            id=last, author=author, text='В архиве', pub_date=timezone.now()
+        )
+        self.assertEqual(next_id(Post, ArchivedPost, using=using), last + 1)
+        Post.objects.using(using).create(
+            id=last + 5, author=author, text='Удалён'
+        )
+        Post.all_objects.using(using).filter(pk=last + 5).delete()
+        self.assertEqual(next_id(Post, ArchivedPost, using=using), last + 6)
@@ -15,6 +15,7 @@ TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
 
 @override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
 class PostFormTests(TestCase):
+    databases = '__all__'
 
     @classmethod
     def setUpClass(cls):
@@ -44,7 +45,7 @@ class PostFormTests(TestCase):
 
     def test_create_post(self):
         """Проверка создания поста"""
-        posts_count = Post.objects.count()
+        posts_count = Post.objects.of_author(self.user).count()
         small_gif = (
             b'\x47\x49\x46\x38\x39\x61\x02\x00'
             b'\x01\x00\x80\x00\x00\x00\x00\x00'
@@ -65,12 +66,14 @@ class PostFormTests(TestCase):
         }
         response = self.authorized_client.post(
             reverse('posts:post_create'), data=form_data, follow=True,)
-        new_post = Post.objects.latest('pub_date')
+        new_post = Post.objects.of_author(self.user).latest('pub_date')
         self.assertRedirects(response, reverse(
             'posts:profile',
             kwargs={'username': self.user.username}
         ))
-        self.assertEqual(Post.objects.count(), posts_count + 1)
+        self.assertEqual(
+            Post.objects.of_author(self.user).count(), posts_count + 1
+        )
         self.assertEqual(new_post.text, form_data['text'],
                          "Текс не совпадает с ожидаемым")
         self.assertEqual(new_post.group.id, form_data['group'],
@@ -79,7 +82,7 @@ class PostFormTests(TestCase):
                          "Автор не совпадаем с ожидаемым")
         self.assertEqual(response.status_code, HTTPStatus.OK)
         self.assertTrue(
-            Post.objects.filter(
+            Post.objects.of_author(self.user).filter(
                 text='Тестовый текст',
                 group=self.group.id,
                 image='posts/small.gif'
@@ -88,18 +91,20 @@ class PostFormTests(TestCase):
 
     def test_post_edit(self):
         """Валидная форма изменяет запись поста для авторизованного"""
-        posts_count = Post.objects.count()
+        posts_count = Post.objects.of_author(self.user).count()
         form_data = {'text': 'Изменяем текст', 'group': self.group.id}
         response = self.authorized_client.post(reverse(
             'posts:post_edit',
             args=({self.post.id})
         ), data=form_data, follow=True,)
-        edit_post = Post.objects.get(id=self.post.id)
+        edit_post = Post.objects.with_id(self.post.id).get()
         self.assertRedirects(response, reverse(
             'posts:post_detail',
             kwargs={'post_id': self.post.id}
         ))
-        self.assertEqual(Post.objects.count(), posts_count)
+        self.assertEqual(
+            Post.objects.of_author(self.user).count(), posts_count
+        )
         self.assertEqual(edit_post.text, form_data['text'],
                          "Текс не совпадает с ожидаемым")
         self.assertEqual(edit_post.group.id, form_data['group'],
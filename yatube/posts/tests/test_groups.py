@@ -0,0 +1,78 @@
+from django.core.cache import cache, caches
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.groups import get_group_by_slug, refresh_group_stats, slug_key
+from posts.models import Group, GroupStats, Post, User
+
+
+class GroupDirectoryTests(TestCase):
+    databases = '__all__'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.authors = [
+            User.objects.create_user(username=f'author{number}')
+            for number in range(4)
+        ]
+        cls.group = Group.objects.create(
+            title='Бета', slug='beta', description='Описание'
+        )
+        cls.empty_group = Group.objects.create(
+            title='Альфа', slug='alpha', description='Пусто'
+        )
+        for number, author in enumerate(cls.authors):
+            for _ in range(number + 1):
+                cls.last = Post.objects.create(
+                    author=author, group=cls.group, text='Пост'
+                )
+
+    def setUp(self):
+        cache.clear()
+        caches['shared'].clear()
+
+    def test_refresh_group_stats(self):
+        """Сводка считает посты, последнюю дату и активных авторов"""
+        self.assertEqual(refresh_group_stats(), 2)
+        stats = GroupStats.objects.get(group=self.group)
+        self.assertEqual(stats.posts_count, 10)
+        self.assertEqual(stats.last_post_at, self.last.pub_date)
+        self.assertEqual(
+            [author['username'] for author in stats.authors()],
+            ['author3', 'author2', 'author1'],
+        )
+        self.assertEqual(
+            GroupStats.objects.get(group=self.empty_group).posts_count, 0
+        )
+
+    def test_group_index(self):
+        """Каталог групп строится одним запросом к группам и сводке"""
+        refresh_group_stats()
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('posts:group_index'))
+        groups = list(response.context['page_obj'])
+        self.assertEqual(groups, [self.empty_group, self.group])
+        self.assertContains(response, 'Постов: 10')
+
+    def test_group_cache_invalidated_on_save(self):
+        """Группа по slug берётся из кеша и сбрасывается при сохранении"""
+        self.assertEqual(get_group_by_slug('beta'), self.group)
+        with CaptureQueriesContext(connection) as queries:
+            get_group_by_slug('beta')
+        self.assertFalse(
+            [query for query in queries if 'posts_group' in query['sql']]
+        )
+        self.group.slug = 'gamma'
+        self.group.save()
+        self.assertIsNone(get_group_by_slug('beta'))
+        self.assertEqual(get_group_by_slug('gamma').title, 'Бета')
+
+    def test_stale_copy_in_process_cache_ignored(self):
+        """Старая копия группы в кеше процесса не читается"""
+        get_group_by_slug('beta')
+        self.group.delete()
+        # так группу видел бы другой процесс с кешем в памяти
+        cache.set(slug_key('beta'), self.group)
+        self.assertIsNone(get_group_by_slug('beta'))
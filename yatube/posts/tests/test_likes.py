@@ -0,0 +1,114 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.likes import counter_keys, flush_likes, has_liked, liked_key
+from posts.models import Like, Post, User
+
+
+class LikeTests(TransactionTestCase):
+    databases = '__all__'
+
+    # горячие счётчики сбрасываются в on_commit
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username='author')
+        self.fans = [
+            User.objects.create_user(username=f'fan{number}')
+            for number in range(3)
+        ]
+        self.post = Post.objects.create(author=self.author, text='Пост')
+        self.clients = []
+        for fan in self.fans:
+            client = Client()
+            client.force_login(fan)
+            self.clients.append(client)
+
+    def like(self, client, name='posts:post_like'):
+        return client.post(reverse(name, kwargs={'post_id': self.post.pk}))
+
+    def likes_on_index(self):
+        page = self.client.get(reverse('posts:index')).context['page_obj']
+        return page[0].likes
+
+    def likes_on_post(self):
+        response = self.client.get(
+            reverse('posts:post_detail', kwargs={'post_id': self.post.pk})
+        )
+        return response.context['post'].likes
+
+    def test_like_is_counted_once(self):
+        """Повторный лайк не учитывается, счётчик виден до сброса"""
+        for client in self.clients:
+            self.like(client)
+        self.like(self.clients[0])
+        self.assertEqual(Like.objects.count(), 3)
+        self.assertEqual(self.likes_on_index(), 3)
+        self.assertTrue(has_liked(self.fans[0].pk, self.post.pk))
+        self.assertFalse(has_liked(self.author.pk, self.post.pk))
+
+    def test_flush_moves_likes_to_post(self):
+        """flush_likes пишет лайки в likes_count пачками"""
+        for client in self.clients:
+            self.like(client)
+        self.assertEqual(flush_likes(batch_size=2), 3)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.likes_count, 3)
+        self.assertFalse(Like.objects.exclude(pending=0).exists())
+        self.like(self.clients[0], 'posts:post_unlike')
+        self.assertEqual(self.likes_on_index(), 2)
+        self.assertEqual(flush_likes(), 1)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.likes_count, 2)
+        self.assertEqual(Like.objects.count(), 2)
+
+    def test_flush_keeps_counters_consistent(self):
+        """После сброса старые счётчики не читаются, лайки не удваиваются"""
+        for client in self.clients:
+            self.like(client)
+        keys = list(counter_keys(self.post.pk, 0))
+        counters = cache.get_many(keys)
+        flush_likes()
+        # как при сбросе в другом процессе: кеш этого процесса не тронут
+        self.assertEqual(cache.get_many(keys), counters)
+        self.assertEqual(self.likes_on_post(), 3)
+        self.like(self.clients[0], 'posts:post_unlike')
+        self.assertEqual(self.likes_on_post(), 2)
+
+    def test_stale_liked_cache(self):
+        """Устаревший кеш лайкнутых постов не мешает снять лайк"""
+        self.like(self.clients[0])
+        cache.set(liked_key(self.fans[0].pk), b'')
+        self.like(self.clients[0], 'posts:post_unlike')
+        self.assertEqual(Like.objects.count(), 0)
+        self.assertEqual(self.likes_on_index(), 0)
+
+    def test_unlike_before_flush(self):
+        """Снятый до сброса лайк не попадает в БД"""
+        self.like(self.clients[0])
+        self.like(self.clients[0], 'posts:post_unlike')
+        self.assertFalse(Like.objects.exists())
+        self.assertEqual(self.likes_on_index(), 0)
+        self.assertEqual(flush_likes(), 0)
+
+    def test_feed_does_not_count_likes(self):
+        """Лента берёт лайки из счётчиков без запросов к таблице лайков"""
+        for client in self.clients:
+            self.like(client)
+        flush_likes()
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.likes_on_index(), 3)
+        self.assertFalse(
+            [query for query in queries if 'posts_like' in query['sql']]
+        )
+
+    def test_like_requires_post(self):
+        """Лайк ставится только POST-запросом к существующему посту"""
+        url = reverse('posts:post_like', kwargs={'post_id': self.post.pk})
+        self.assertEqual(self.clients[0].get(url).status_code, 405)
+        response = self.clients[0].post(
+            reverse('posts:post_like', kwargs={'post_id': 0})
+        )
+        self.assertEqual(response.status_code, 404)
@@ -0,0 +1,152 @@
+from django.test import (
+    Client, TestCase, TransactionTestCase, override_settings,
+)
+from django.urls import reverse
+
+from posts import live
+from posts.models import Follow, Group, LiveEvent, Post, User
+
+
+@override_settings(LIVE_BUFFER_SIZE=2)
+class HubTests(TestCase):
+    databases = '__all__'
+
+    def setUp(self):
+        self.hub = live.Hub(background=False)
+
+    def test_publish_to_channel_subscribers(self):
+        """Сообщение получают только подписчики канала"""
+        index = self.hub.subscribe(['index'])
+        group = self.hub.subscribe(['group:1'])
+        self.assertEqual(self.hub.publish('index', 1), 1)
+        self.assertEqual(index.get(0), 1)
+        self.assertIsNone(group.get(0))
+
+    def test_slow_subscriber_drops_oldest(self):
+        """Переполненная очередь теряет самые старые сообщения"""
+        subscription = self.hub.subscribe(['index'])
+        for post_id in range(5):
+            self.hub.publish('index', post_id)
+        self.assertEqual([subscription.get(0), subscription.get(0)], [3, 4])
+
+    def test_closed_subscription_removed(self):
+        """Закрытая подписка больше не получает сообщений"""
+        subscription = self.hub.subscribe(['index'])
+        subscription.close()
+        self.assertEqual(self.hub.publish('index', 1), 0)
+        self.assertEqual(self.hub.subscriptions, {})
+
+    def test_events_from_other_processes(self):
+        """Посты из других процессов приходят через таблицу событий"""
+        LiveEvent.objects.create(post_id=1, author_id=1)
+        subscription = self.hub.subscribe(['index', 'group:2'])
+        LiveEvent.objects.create(post_id=2, author_id=1, group_id=2)
+        self.assertIsNone(subscription.get(0))
+        self.assertEqual(self.hub.poll(), 1)
+        self.assertEqual([subscription.get(0), subscription.get(0)], [2, 2])
+        self.assertIsNone(subscription.get(0))
+
+    @override_settings(LIVE_MAX_STREAMS=1)
+    def test_streams_limited(self):
+        """Подписок не больше LIVE_MAX_STREAMS"""
+        subscription = self.hub.subscribe(['index'])
+        self.assertIsNone(self.hub.subscribe(['index']))
+        subscription.close()
+        subscription.close()
+        self.assertIsNotNone(self.hub.subscribe(['index']))
+
+
+@override_settings(LIVE_HEARTBEAT=0.01, LIVE_STREAM_TIMEOUT=1)
+class LiveFeedViewTests(TestCase):
+    databases = '__all__'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='reader')
+        cls.author = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+        Follow.objects.create(user=cls.user, author=cls.author)
+
+    def setUp(self):
+        live.hub = live.Hub(background=False)
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def stream(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        content = response.streaming_content
+        self.assertTrue(next(content).startswith(b'retry:'))
+        self.addCleanup(self.close, response)
+        return content
+
+    def close(self, response):
+        # закрываем обёртку тестового клиента, как сервер в конце ответа:
+        # она вызывает response.close() без close_old_connections, а сам
+        # response.close() закрыл бы соединение с БД посреди транзакции
+        response._iterator.close()
+
+    def next_event(self, content):
+        for chunk in content:
+            if chunk.startswith(b'event:'):
+                return chunk
+        return None
+
+    def test_feeds_receive_new_posts(self):
+        """Каждая лента получает новые посты своего канала"""
+        post = Post(pk=7, author=self.author, group=self.group, text='Пост')
+        urls = (
+            reverse('posts:live_index'),
+            reverse('posts:live_group', kwargs={'slug': 'group'}),
+            reverse('posts:live_follow'),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                content = self.stream(url)
+                live.publish_post(post)
+                live.hub.poll()
+                self.assertEqual(
+                    self.next_event(content), b'event: post\ndata: 7\n\n'
+                )
+
+    def test_stream_ends_after_timeout(self):
+        """Поток завершается по таймауту, чтобы клиент переподключился"""
+        with override_settings(LIVE_STREAM_TIMEOUT=0.05):
+            content = self.stream(reverse('posts:live_index'))
+            self.assertIsNone(self.next_event(content))
+        self.assertEqual(live.hub.subscriptions, {})
+
+    def test_closed_stream_unsubscribes(self):
+        """Закрытый клиентом поток освобождает подписку"""
+        self.stream(reverse('posts:live_index'))
+        response = self.client.get(reverse('posts:live_index'))
+        next(response.streaming_content)
+        self.assertEqual(live.hub.count, 2)
+        self.close(response)
+        self.assertEqual(live.hub.count, 1)
+        # соединение теста осталось открытым
+        self.assertTrue(User.objects.exists())
+
+    @override_settings(LIVE_MAX_STREAMS=0, LIVE_BUSY_RETRY_MS=60000)
+    def test_busy_stream_asks_to_retry_later(self):
+        """Без свободных мест поток сразу просит переподключиться позже"""
+        response = self.client.get(reverse('posts:live_index'))
+        self.assertEqual(
+            list(response.streaming_content), [b'retry: 60000\n\n']
+        )
+
+
+class LivePublishTests(TransactionTestCase):
+    databases = '__all__'
+
+    def test_new_post_published_after_commit(self):
+        """Сохранённый пост публикуется в ленту после коммита"""
+        live.hub = live.Hub(background=False)
+        subscription = live.hub.subscribe(['index'])
+        author = User.objects.create_user(username='author')
+        post = Post.objects.create(author=author, text='Пост')
+        self.assertIsNone(subscription.get(0))
+        live.hub.poll()
+        self.assertEqual(subscription.get(0), post.pk)
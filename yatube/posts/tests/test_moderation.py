@@ -0,0 +1,181 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache, caches
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from posts import sharding
+from posts.cache import FEEDS_VERSION_KEY
+from posts.archive import archive_cutoff, archive_posts
+from posts.models import (
+    ArchivedComment, ArchivedPost, Comment, Group, ModerationJob, Post,
+)
+from posts.moderation import purge_deleted, run_pending_jobs
+
+User = get_user_model()
+
+
+def total(queryset):
+    """Число строк во всех базах постов: в шардах или в default"""
+    return sum(
+        queryset.using(alias).count() for alias in sharding.post_databases()
+    )
+
+
+def changelist_url(using):
+    """Список постов в админке на шарде, где лежат выбранные посты"""
+    return reverse('admin:posts_post_changelist') + f'?shard={using}'
+
+
+class ModerationJobTests(TestCase):
+    databases = '__all__'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.spammer = User.objects.create_user(username='spammer')
+        cls.user = User.objects.create_user(username='user')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+        cls.other_group = Group.objects.create(
+            title='Другая', slug='other', description='Описание'
+        )
+        for number in range(5):
+            post = Post.objects.create(
+                author=cls.spammer, group=cls.group, text=f'Спам {number}'
+            )
+            Comment.objects.create(post=post, author=cls.user, text='Ответ')
+        cls.post = Post.objects.create(author=cls.user, text='Пост')
+        Comment.objects.create(post=cls.post, author=cls.spammer, text='Спам')
+
+    def setUp(self):
+        cache.clear()
+
+    def run_job(self, **fields):
+        job = ModerationJob.objects.create(**fields)
+        self.assertEqual(run_pending_jobs(batch_size=2), 1)
+        job.refresh_from_db()
+        self.assertEqual(job.status, ModerationJob.DONE)
+        self.assertEqual(job.processed, job.total)
+        return job
+
+    def test_hide_author_posts(self):
+        """Скрытые посты пропадают из ленты, кеш лент сбрасывается"""
+        self.client.get(reverse('posts:index'))
+        job = self.run_job(action=ModerationJob.HIDE, author=self.spammer)
+        self.assertEqual(job.total, 5)
+        page = self.client.get(reverse('posts:index')).context['page_obj']
+        self.assertEqual(list(page), [self.post])
+
+    def test_feeds_reset_in_shared_cache(self):
+        """Задачи идут в другом процессе: версия лент меняется в общем кеше"""
+        self.client.get(reverse('posts:index'))
+        version = caches['shared'].get(FEEDS_VERSION_KEY)
+        self.assertIsNotNone(version)
+        self.run_job(action=ModerationJob.HIDE, author=self.spammer)
+        self.assertNotEqual(caches['shared'].get(FEEDS_VERSION_KEY), version)
+
+    def test_delete_author_posts_softly(self):
+        """Удалённые посты скрыты, но физически остаются до очистки"""
+        self.run_job(action=ModerationJob.DELETE, author=self.spammer)
+        self.assertFalse(Post.objects.of_author(self.spammer).exists())
+        self.assertEqual(Post.all_objects.of_author(self.spammer).count(), 5)
+        self.assertEqual(total(Comment.objects.all()), 6)
+
+    def test_purge_deletes_posts_with_comments(self):
+        """Очистка стирает удалённые посты вместе с комментариями"""
+        self.run_job(action=ModerationJob.DELETE, author=self.spammer)
+        self.assertEqual(purge_deleted(timezone.now(), batch_size=2), 5)
+        self.assertFalse(Post.all_objects.of_author(self.spammer).exists())
+        self.assertEqual(total(Comment.all_objects.all()), 1)
+
+    def test_purge_keeps_recently_deleted(self):
+        """Недавно удалённое очистка не трогает"""
+        self.run_job(action=ModerationJob.DELETE, author=self.spammer)
+        cutoff = timezone.now() - timedelta(days=1)
+        self.assertEqual(purge_deleted(cutoff), 0)
+        self.assertEqual(total(Post.all_objects.all()), 6)
+
+    def test_delete_author_comments(self):
+        """Комментарии автора удаляются, посты остаются"""
+        self.run_job(
+            action=ModerationJob.DELETE,
+            target=ModerationJob.COMMENTS,
+            author=self.spammer,
+        )
+        self.assertFalse(total(Comment.objects.filter(author=self.spammer)))
+        self.assertEqual(total(Comment.all_objects.all()), 6)
+        self.assertEqual(total(Post.objects.all()), 6)
+
+    def test_regroup_group_posts(self):
+        """Посты группы переносятся в другую группу"""
+        self.run_job(
+            action=ModerationJob.REGROUP,
+            group=self.group,
+            new_group=self.other_group,
+        )
+        self.assertEqual(
+            total(Post.objects.filter(group=self.other_group)), 5
+        )
+
+    def test_admin_action_queues_job(self):
+        """Действие админки ставит задачу на автора выбранных постов"""
+        admin = User.objects.create_superuser(
+            'admin', 'admin@example.com', 'password'
+        )
+        self.client.force_login(admin)
+        posts = Post.objects.of_author(self.spammer)
+        self.client.post(changelist_url(posts.db), {
+            'action': 'delete_posts_by_author',
+            '_selected_action': list(posts.values_list('pk', flat=True)),
+        })
+        job = ModerationJob.objects.get()
+        self.assertEqual(
+            (job.action, job.author), (ModerationJob.DELETE, self.spammer)
+        )
+        self.assertEqual(total(Post.objects.all()), 6)
+
+    def test_regroup_admin_action(self):
+        """Перенос в группу спрашивает группу и ставит задачу"""
+        admin = User.objects.create_superuser(
+            'admin', 'admin@example.com', 'password'
+        )
+        self.client.force_login(admin)
+        posts = Post.objects.of_author(self.spammer).filter(group=self.group)
+        data = {
+            'action': 'regroup_posts_by_group',
+            '_selected_action': [posts.first().pk],
+        }
+        url = changelist_url(posts.db)
+        response = self.client.post(url, data)
+        self.assertIn('new_group', response.context['form'].fields)
+        self.assertFalse(ModerationJob.objects.exists())
+        self.client.post(
+            url, {**data, 'apply': '1', 'new_group': self.other_group.pk}
+        )
+        job = ModerationJob.objects.get()
+        self.assertEqual(
+            (job.action, job.group, job.new_group),
+            (ModerationJob.REGROUP, self.group, self.other_group),
+        )
+
+    def test_job_moderates_archive(self):
+        """Задача модерации доходит и до архивных постов и комментариев"""
+        Post.objects.of_author(self.spammer).update(
+            pub_date=timezone.now() - timedelta(days=400)
+        )
+        self.assertEqual(archive_posts(archive_cutoff()), 5)
+        job = self.run_job(action=ModerationJob.HIDE, author=self.spammer)
+        self.assertEqual(job.total, 5)
+        self.assertFalse(total(ArchivedPost.objects.all()))
+        self.assertEqual(total(ArchivedPost.all_objects.all()), 5)
+        self.run_job(
+            action=ModerationJob.DELETE,
+            target=ModerationJob.COMMENTS,
+            author=self.user,
+        )
+        self.assertFalse(total(ArchivedComment.objects.all()))
+        self.assertEqual(purge_deleted(timezone.now()), 5)
+        self.assertFalse(total(ArchivedComment.all_objects.all()))
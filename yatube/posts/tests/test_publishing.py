@@ -0,0 +1,125 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from notifications.models import NotificationEvent
+from posts.models import DRAFT, PUBLISHED, SCHEDULED, Post
+from posts.publishing import due_posts as real_due_posts, publish_due
+
+User = get_user_model()
+
+
+class PublishingTests(TestCase):
+    databases = '__all__'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='author')
+        cls.post = Post.objects.create(author=cls.user, text='Вышел')
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.user)
+
+    def test_draft_is_hidden(self):
+        """Черновик не попадает в ленту, но виден автору в черновиках"""
+        response = self.client.post(
+            reverse('posts:post_create'), {'text': 'Черновик', 'draft': 'on'}
+        )
+        self.assertRedirects(response, reverse('posts:drafts'))
+        draft = Post.all_objects.of_author(self.user).get(text='Черновик')
+        self.assertEqual(draft.status, DRAFT)
+        page = self.client.get(reverse('posts:index')).context['page_obj']
+        self.assertEqual(list(page), [self.post])
+        response = self.client.get(reverse('posts:drafts'))
+        self.assertEqual(list(response.context['posts']), [draft])
+        self.assertFalse(NotificationEvent.objects.exists())
+
+    def test_publish_draft_on_edit(self):
+        """Черновик публикуется правкой с текущей датой"""
+        draft = Post.objects.create(
+            author=self.user, text='Черновик', status=DRAFT
+        )
+        self.client.post(
+            reverse('posts:post_edit', args=(draft.pk,)), {'text': 'Готово'}
+        )
+        draft.refresh_from_db()
+        self.assertEqual(draft.status, PUBLISHED)
+        self.assertGreater(draft.pub_date, self.post.pub_date)
+        self.assertEqual(NotificationEvent.objects.count(), 1)
+
+    def test_publish_due_in_batches(self):
+        """Наступившие посты публикуются пачками с датой из расписания"""
+        now = timezone.now()
+        for number in range(5):
+            publish_at = now + timedelta(minutes=number + 1)
+            self.client.post(reverse('posts:post_create'), {
+                'text': f'Отложен {number}',
+                'publish_at': publish_at.strftime('%Y-%m-%d %H:%M:%S'),
+            })
+        self.assertEqual(
+            Post.all_objects.of_author(self.user)
+            .filter(status=SCHEDULED).count(),
+            5,
+        )
+        self.assertEqual(
+            publish_due(batch_size=2, now=now + timedelta(minutes=3)), 3
+        )
+        page = self.client.get(reverse('posts:index')).context['page_obj']
+        self.assertEqual(
+            [post.text for post in page],
+            ['Отложен 2', 'Отложен 1', 'Отложен 0', 'Вышел'],
+        )
+        self.assertEqual(
+            page[0].pub_date,
+            Post.objects.of_author(self.user).get(text='Отложен 2').publish_at,
+        )
+        self.assertEqual(NotificationEvent.objects.count(), 3)
+        self.assertEqual(publish_due(now=now + timedelta(minutes=3)), 0)
+
+    def test_post_published_by_other_process_skipped(self):
+        """Пост, опубликованный другим процессом, не объявляется повторно"""
+        now = timezone.now()
+        posts = [
+            Post.objects.create(
+                author=self.user, text=f'Отложен {number}',
+                status=SCHEDULED, publish_at=now,
+            )
+            for number in range(2)
+        ]
+        # другой процесс успел опубликовать пост после выборки пачки
+        Post.all_objects.with_id(posts[0].pk).update(
+            status=PUBLISHED, pub_date=now
+        )
+        selections = [posts]
+
+        def due_posts(using, *args):
+            if using == posts[0]._state.db and selections:
+                return selections.pop()
+            return real_due_posts(using, *args)
+
+        with mock.patch('posts.publishing.due_posts', due_posts):
+            self.assertEqual(publish_due(now=now), 1)
+        self.assertEqual(
+            list(NotificationEvent.objects.values_list('post_id', flat=True)),
+            [posts[1].pk],
+        )
+
+    def test_due_query_uses_partial_index(self):
+        """Поиск наступивших постов идёт по частичному индексу"""
+        queryset = Post.all_objects.filter(
+            status=SCHEDULED, publish_at__lte=timezone.now()
+        ).order_by('publish_at')
+        if connection.vendor != 'sqlite':
+            self.skipTest('План проверяется только для SQLite')
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+            plan = ' '.join(str(row) for row in cursor.fetchall())
+        self.assertIn('post_scheduled_due_idx', plan)
@@ -0,0 +1,79 @@
+from http import HTTPStatus
+
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from core.ratelimit import consume
+from posts.models import Comment, Post, User
+
+
+class SlidingWindowTests(TestCase):
+    databases = '__all__'
+
+    def setUp(self):
+        cache.clear()
+
+    def test_no_double_burst_across_windows(self):
+        """На стыке окон не проходит второй полный лимит"""
+        for _ in range(2):
+            self.assertEqual(consume('scope', 'ip', 2, 60, now=59), 0)
+        self.assertEqual(consume('scope', 'ip', 2, 60, now=60), 60)
+
+    def test_previous_window_fades(self):
+        """Вес прошлого окна убывает, и запросы снова проходят"""
+        for _ in range(4):
+            consume('scope', 'ip', 4, 60, now=30)
+        # 4 * (1 - 15 / 60) + 1 <= 4
+        self.assertEqual(consume('scope', 'ip', 4, 60, now=75), 0)
+        # 4 * (1 - 20 / 60) + 2 > 4; через 25 с: 4 * (1 - 45 / 60) + 3 = 4
+        self.assertEqual(consume('scope', 'ip', 4, 60, now=80), 25)
+        self.assertEqual(consume('scope', 'ip', 4, 60, now=106), 0)
+
+
+@override_settings(RATELIMIT_RATES={
+    'post_create': '2/m',
+    'add_comment': '2/m',
+    'follow': '2/m',
+})
+class RateLimitTests(TestCase):
+    databases = '__all__'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username='NoName')
+        cls.author = User.objects.create(username='Author')
+        cls.post = Post.objects.create(author=cls.author, text='Тестовый пост')
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def test_add_comment_limited(self):
+        """Лишние комментарии отклоняются с кодом 429 и Retry-After"""
+        url = reverse('posts:add_comment', args=(self.post.id,))
+        for _ in range(2):
+            response = self.authorized_client.post(url, {'text': 'Спам'})
+            self.assertEqual(response.status_code, HTTPStatus.FOUND)
+        response = self.authorized_client.post(url, {'text': 'Спам'})
+        self.assertEqual(response.status_code, HTTPStatus.TOO_MANY_REQUESTS)
+        self.assertGreater(int(response['Retry-After']), 0)
+        self.assertEqual(Comment.objects.of_post(self.post.id).count(), 2)
+
+    def test_follow_limited(self):
+        """Подписки и отписки ограничены общим лимитом"""
+        follow = reverse('posts:profile_follow', args=(self.author.username,))
+        unfollow = reverse(
+            'posts:profile_unfollow', args=(self.author.username,)
+        )
+        self.authorized_client.get(follow)
+        self.authorized_client.get(unfollow)
+        response = self.authorized_client.get(follow)
+        self.assertEqual(response.status_code, HTTPStatus.TOO_MANY_REQUESTS)
+
+    def test_get_create_page_not_limited(self):
+        """Открытие формы создания поста не расходует лимит"""
+        for _ in range(3):
+            response = self.authorized_client.get(reverse('posts:post_create'))
+            self.assertEqual(response.status_code, HTTPStatus.OK)
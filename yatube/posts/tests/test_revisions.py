@@ -0,0 +1,136 @@
+from django.core.cache import cache, caches
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Post, PostRevision, User
+from posts.revisions import (
+    apply_delta, make_delta, recent_key, recent_revisions, record_edit,
+    revision_text,
+)
+
+
+class DeltaTests(TestCase):
+    databases = '__all__'
+
+    def test_delta_roundtrip(self):
+        """Разница превращает старый текст в новый"""
+        cases = (
+            ('', 'новый'),
+            ('a\nb\nc\n', 'a\nB\nc\nd'),
+            ('строка 1\nстрока 2', 'строка 2\nстрока 1\n'),
+            ('текст', ''),
+        )
+        for old, new in cases:
+            with self.subTest(old=old, new=new):
+                self.assertEqual(apply_delta(old, make_delta(old, new)), new)
+
+
+@override_settings(POST_REVISION_CHECKPOINT_EVERY=3)
+class PostRevisionTests(TestCase):
+    databases = '__all__'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.lines = [f'Строка номер {number}' for number in range(200)]
+        cls.post = Post.objects.create(
+            author=cls.author, text='\n'.join(cls.lines)
+        )
+
+    def setUp(self):
+        cache.clear()
+        caches['shared'].clear()
+        self.client = Client()
+        self.client.force_login(self.author)
+
+    def edit(self, text):
+        self.client.post(
+            reverse('posts:post_edit', kwargs={'post_id': self.post.pk}),
+            {'text': text},
+        )
+
+    def make_versions(self, count):
+        versions = ['\n'.join(self.lines)]
+        for number in range(1, count + 1):
+            lines = list(self.lines)
+            lines[number] = f'Правка {number}'
+            versions.append('\n'.join(lines))
+            self.edit(versions[-1])
+        return versions
+
+    def test_every_version_restored(self):
+        """Любая версия восстанавливается из копии и разниц"""
+        versions = self.make_versions(7)
+        cache.clear()
+        for number, text in enumerate(versions):
+            with self.subTest(number=number):
+                self.assertEqual(revision_text(self.post.pk, number), text)
+
+    def test_checkpoints_and_compact_deltas(self):
+        """Полные копии — раз в N версий, разницы много меньше текста"""
+        self.make_versions(4)
+        revisions = PostRevision.objects.filter(post_id=self.post.pk)
+        self.assertEqual(
+            list(revisions.filter(is_checkpoint=True).values_list(
+                'number', flat=True
+            ).order_by('number')),
+            [0, 3],
+        )
+        checkpoint = revisions.get(number=0)
+        for delta in revisions.filter(is_checkpoint=False):
+            self.assertLess(len(delta.data), len(checkpoint.data) / 5)
+
+    def test_edit_after_change_outside_view(self):
+        """Разница строится от сохранённой версии, а не от текста в форме"""
+        versions = self.make_versions(3)
+        Post.objects.filter(pk=self.post.pk).update(text='Правка из админки')
+        # форма открыта до правок: в old_text исходный текст
+        text = versions[0] + '\nНовая строка'
+        record_edit(Post(pk=self.post.pk, text=text), versions[0])
+        cache.clear()
+        self.assertEqual(revision_text(self.post.pk, 3), versions[3])
+        self.assertEqual(revision_text(self.post.pk, 4), text)
+
+    def test_unchanged_text_not_recorded(self):
+        """Правка без изменения текста не создаёт версию"""
+        self.edit(self.post.text)
+        self.assertFalse(PostRevision.objects.exists())
+
+    def test_history_page(self):
+        """Страница истории показывает список и выбранную версию"""
+        versions = self.make_versions(2)
+        url = reverse('posts:post_history', kwargs={'post_id': self.post.pk})
+        response = self.client.get(url, {'version': 1})
+        self.assertEqual(
+            [revision['number'] for revision in response.context['revisions']],
+            [2, 1, 0],
+        )
+        self.assertEqual(response.context['text'], versions[1])
+        self.assertEqual(
+            self.client.get(url, {'version': 9}).status_code, 404
+        )
+
+    def test_history_only_for_author(self):
+        """Историю правок другой пользователь не видит"""
+        self.make_versions(1)
+        reader = User.objects.create_user(username='reader')
+        self.client.force_login(reader)
+        response = self.client.get(
+            reverse('posts:post_history', kwargs={'post_id': self.post.pk})
+        )
+        self.assertRedirects(
+            response,
+            reverse('posts:post_detail', kwargs={'post_id': self.post.pk}),
+        )
+
+    def test_stale_list_in_process_cache_ignored(self):
+        """Список версий после правки свежий и там, где лежал старый"""
+        self.make_versions(1)
+        stale = recent_revisions(self.post.pk)
+        self.make_versions(2)
+        # так список видел бы другой процесс с кешем в памяти
+        cache.set(recent_key(self.post.pk), stale)
+        revisions = recent_revisions(self.post.pk)
+        self.assertEqual(
+            [revision['number'] for revision in revisions], [2, 1, 0]
+        )
@@ -0,0 +1,123 @@
+from datetime import datetime, timedelta
+from unittest import skipUnless
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.test import Client, SimpleTestCase, TestCase
+from django.urls import reverse
+
+from posts import sharding
+from posts.models import Comment, Group, Post, User
+
+
+class FakePost:
+    def __init__(self, pk, pub_date):
+        self.pk = pk
+        self.pub_date = pub_date
+
+
+class FakeShard(list):
+    def count(self):
+        return len(self)
+
+
+class FakeQuerySet:
+    def __init__(self, shards):
+        self.shards = shards
+
+    def using(self, alias):
+        return FakeShard(self.shards[alias])
+
+
+class ShardedFeedTests(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        start = datetime(2023, 1, 1)
+        posts = [
+            FakePost(pk, start + timedelta(minutes=pk)) for pk in range(25)
+        ]
+        posts.sort(key=lambda post: post.pub_date, reverse=True)
+        cls.expected = [post.pk for post in posts]
+        cls.feed = sharding.ShardedFeed(
+            FakeQuerySet({
+                'shard_0': [post for post in posts if post.pk % 3 == 0],
+                'shard_1': [post for post in posts if post.pk % 3 == 1],
+                'shard_2': [post for post in posts if post.pk % 3 == 2],
+            }),
+            databases=['shard_0', 'shard_1', 'shard_2'],
+        )
+
+    def test_slices_are_merged_by_pub_date(self):
+        """Срез ленты собирается слиянием потоков шардов по дате"""
+        self.assertEqual(
+            [post.pk for post in self.feed[5:15]], self.expected[5:15]
+        )
+
+    def test_feed_works_with_paginator(self):
+        """Лента шардов совместима с Paginator"""
+        page = Paginator(self.feed, 10).get_page(3)
+        self.assertEqual(
+            [post.pk for post in page], self.expected[20:]
+        )
+
+
+@skipUnless(len(settings.POST_SHARDS) > 1, 'шардирование выключено')
+class ShardedViewsTests(TestCase):
+    databases = '__all__'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.first = User.objects.create(username='first')
+        cls.second = User.objects.create(username='second')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.first_post = Post.objects.create(
+            author=cls.first, text='Пост первого', group=cls.group
+        )
+        cls.second_post = Post.objects.create(
+            author=cls.second, text='Пост второго', group=cls.group
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.second)
+
+    def test_post_is_stored_in_author_shard(self):
+        """Пост и комментарии лежат в шарде автора"""
+        alias = sharding.shard_for_author(self.first.pk)
+        self.assertEqual(sharding.shard_for_post(self.first_post.pk), alias)
+        self.assertTrue(
+            Post.objects.using(alias).filter(pk=self.first_post.pk).exists()
+        )
+        self.client.post(
+            reverse('posts:add_comment', args=(self.first_post.pk,)),
+            {'text': 'Комментарий'},
+        )
+        self.assertTrue(
+            Comment.objects.using(alias).filter(
+                post_id=self.first_post.pk
+            ).exists()
+        )
+
+    def test_group_page_gathers_all_shards(self):
+        """Страница группы собирает посты со всех шардов"""
+        response = self.client.get(
+            reverse('posts:group_list', args=(self.group.slug,))
+        )
+        self.assertEqual(
+            list(response.context['page_obj']),
+            [self.second_post, self.first_post],
+        )
+
+    def test_post_detail_reads_from_shard(self):
+        """Страница поста находит пост по глобальному id"""
+        response = self.client.get(
+            reverse('posts:post_detail', args=(self.first_post.pk,))
+        )
+        self.assertEqual(response.context['post'], self.first_post)
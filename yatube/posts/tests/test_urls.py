@@ -8,6 +8,8 @@ from posts.models import Post, Group, User
 
 
 class PostURLTests(TestCase):
+    databases = '__all__'
+
     @classmethod
     def setUpClass(cls):
         super().setUpClass()
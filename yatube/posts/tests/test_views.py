@@ -1,4 +1,4 @@
-from django.test import TestCase, Client
+from django.test import TestCase, Client, override_settings
 from django.urls import reverse
 from django import forms
 from django.conf import settings
@@ -10,6 +10,8 @@ POSTS_PER_PAGE = settings.POSTS_PER_PAGE
 
 
 class PostPagesTests(TestCase):
+    databases = '__all__'
+
     @classmethod
     def setUpClass(cls):
         super().setUpClass()
@@ -160,7 +162,8 @@ class PostPagesTests(TestCase):
 
     def test_add_comment_on_post(self):
         """Комментарий появляется на странице поста"""
-        comment_count = Comment.objects.count()
+        comments = Comment.objects.of_post(self.post.id)
+        comment_count = comments.count()
         form_data = {'text': self.comment.text}
         response = self.authorized_client.post(
             reverse('posts:add_comment', kwargs={'post_id': self.post.id}),
@@ -168,20 +171,21 @@ class PostPagesTests(TestCase):
             follow=True
         )
         self.assertContains(response, self.comment.text)
-        self.assertEqual(Comment.objects.count(), comment_count + 1)
+        self.assertEqual(comments.count(), comment_count + 1)
 
     def test_add_comment_only_authorized_client(self):
-        comment_count = Comment.objects.count()
+        comments = Comment.objects.of_post(self.post.id)
+        comment_count = comments.count()
         form_data = {'text': self.comment.text}
         self.guest_client.post(
             reverse('posts:add_comment', kwargs={'post_id': self.post.id}),
             data=form_data,
             follow=True
         )
-        self.assertTrue(Comment.objects.filter(
+        self.assertTrue(comments.filter(
             text='Тестовый комментарий'
         ).exists())
-        self.assertEqual(Comment.objects.count(), comment_count)
+        self.assertEqual(comments.count(), comment_count)
 
     def test_index_cache(self):
         response = self.authorized_client.get(reverse('posts:index'))
@@ -197,6 +201,8 @@ class PostPagesTests(TestCase):
 
 
 class PaginatorViewsTest(TestCase):
+    databases = '__all__'
+
     @classmethod
     def setUpClass(cls):
         super().setUpClass()
@@ -271,3 +277,31 @@ class PaginatorViewsTest(TestCase):
             ) + '?page=2')
         self.assertEqual(len(response.context['page_obj']),
                          self.POST_PER_SECOND_PAGE)
+
+
+@override_settings(POST_DETAIL_STREAM_COMMENTS=2, POST_DETAIL_STREAM_CHUNK=2)
+class PostDetailStreamingTests(TestCase):
+    databases = '__all__'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username='NoName')
+        cls.post = Post.objects.create(author=cls.user, text='Тестовый пост')
+        for number in range(5):
+            Comment.objects.create(
+                post=cls.post, author=cls.user, text=f'Комментарий {number}'
+            )
+
+    def test_many_comments_streamed(self):
+        """Пост с множеством комментариев отдаётся потоком по порядку"""
+        response = self.client.get(
+            reverse('posts:post_detail', kwargs={'post_id': self.post.id})
+        )
+        self.assertTrue(response.streaming)
+        content = b''.join(response.streaming_content).decode()
+        positions = [
+            content.index(f'Комментарий {number}') for number in range(5)
+        ]
+        self.assertEqual(positions, sorted(positions))
+        self.assertLess(content.index('Тестовый пост'), positions[0])
+        self.assertTrue(content.rstrip().endswith('</html>'))
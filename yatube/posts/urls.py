@@ -7,17 +7,33 @@ app_name = 'posts'
 
 urlpatterns = [
     path('', views.index, name='index'),
+    path('groups/', views.group_index, name='group_index'),
     path('group/<slug:slug>/', views.group_posts, name='group_list'),
     path('profile/<str:username>/', views.profile, name='profile'),
     path('posts/<int:post_id>/', views.post_detail, name='post_detail'),
     path('posts/<int:post_id>/edit/', views.post_edit, name='post_edit'),
+    path(
+        'posts/<int:post_id>/history/',
+        views.post_history,
+        name='post_history'
+    ),
+    path('posts/<int:post_id>/like/', views.post_like, name='post_like'),
+    path(
+        'posts/<int:post_id>/unlike/',
+        views.post_unlike,
+        name='post_unlike'
+    ),
     path('create/', views.post_create, name='post_create'),
+    path('drafts/', views.drafts, name='drafts'),
     path(
         'posts/<int:post_id>/comment/',
         views.add_comment,
         name='add_comment'
     ),
     path('follow/', views.follow_index, name='follow_index'),
+    path('live/', views.live_index, name='live_index'),
+    path('live/group/<slug:slug>/', views.live_group, name='live_group'),
+    path('live/follow/', views.live_follow, name='live_follow'),
     path(
         'profile/<str:username>/follow/',
         views.profile_follow,
@@ -1,34 +1,72 @@
 from django.core.paginator import Paginator
 from django.contrib.auth.decorators import login_required
 from django.shortcuts import render, get_object_or_404, redirect
-from django.contrib.auth.models import User
-from django.views.decorators.cache import cache_page
 from django.conf import settings
+from django.http import Http404, StreamingHttpResponse
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+from django.views.decorators.http import require_POST
 
-from posts.models import Post, Group, Follow
+from core.concurrent import QueryBatch
+from core.ratelimit import ratelimit
+from notifications.fanout import enqueue_comment, enqueue_post
+from posts import sharding
+from posts.live import event_stream
+from posts.archive import with_archive
+from posts.cache import cache_feed
+from posts.groups import get_group_or_404
+from posts.likes import attach_likes, has_liked, like, likes_epoch, unlike
+from posts.models import (
+    DRAFT, PUBLISHED, SCHEDULED, ArchivedComment, ArchivedPost, Comment,
+    Follow, Group, Post,
+)
+from posts.publishing import announce
 from posts.forms import PostForm, CommentForm
+from posts.revisions import recent_revisions, record_edit, revision_text
+from users.cache import get_user_or_404
 
 POSTS_PER_PAGE = settings.POSTS_PER_PAGE
+COMMENTS_MARKER = mark_safe('<!-- comments -->')
 
 
-@cache_page(20, key_prefix='index_page')
+@cache_feed(20, key_prefix='index_page')
 def index(request):
-    post_list = Post.objects.all()
+    post_list = with_archive(
+        Post.objects.select_related('author', 'group'),
+        ArchivedPost.objects.select_related('author', 'group'),
+    )
     paginator = Paginator(post_list, 10)
     page_number = request.GET.get('page')
     page_obj = paginator.get_page(page_number)
+    page_obj.object_list = attach_likes(page_obj)
     context = {
         'page_obj': page_obj,
     }
     return render(request, 'posts/index.html', context)
 
 
+def group_index(request):
+    groups = Group.objects.select_related('stats').order_by('title')
+    paginator = Paginator(groups, settings.GROUPS_PER_PAGE)
+    page_obj = paginator.get_page(request.GET.get('page'))
+    context = {
+        'page_obj': page_obj,
+    }
+    return render(request, 'posts/group_index.html', context)
+
+
 def group_posts(request, slug):
-    group = get_object_or_404(Group, slug=slug)
-    post_list = group.posts.all()
+    group = get_group_or_404(slug)
+    post_list = with_archive(
+        Post.objects.filter(group=group).select_related('author', 'group'),
+        ArchivedPost.objects.filter(group=group).select_related(
+            'author', 'group'
+        ),
+    )
     paginator = Paginator(post_list, 10)
     page_number = request.GET.get('page')
     page_obj = paginator.get_page(page_number)
+    page_obj.object_list = attach_likes(page_obj)
     context = {
         'group': group,
         'page_obj': page_obj,
@@ -37,35 +75,117 @@ def group_posts(request, slug):
 
 
 def profile(request, username):
-    author = get_object_or_404(User, username=username)
-    post_list = author.posts.all()
+    author = get_user_or_404(username)
+    post_list = with_archive(
+        Post.objects.of_author(author).select_related('author', 'group'),
+        ArchivedPost.objects.of_author(author).select_related(
+            'author', 'group'
+        ),
+    )
     paginator = Paginator(post_list, POSTS_PER_PAGE)
     page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
     following = False
-    if request.user.is_authenticated:
-        if Follow.objects.filter(user=request.user, author=author).exists():
-            following = True
+    with QueryBatch() as batch:
+        page = batch.page(paginator, page_number)
+        if request.user.is_authenticated:
+            following = batch.submit(
+                Follow.objects.filter(user=request.user, author=author).exists
+            )
+    page_obj = page.result()
+    page_obj.object_list = attach_likes(page_obj)
     context = {
         'author': author,
         'page_obj': page_obj,
-        'following': following,
+        'following': following and following.result(),
     }
     return render(request, 'posts/profile.html', context)
 
 
 def post_detail(request, post_id):
-    post = get_object_or_404(Post, id=post_id)
+    threshold = settings.POST_DETAIL_STREAM_COMMENTS
+    comment_list = (
+        Comment.objects.of_post(post_id).select_related('author')
+        .order_by('pk')
+    )
+    with QueryBatch() as batch:
+        post = batch.submit(
+            Post.objects.with_id(post_id).select_related('author', 'group')
+            .first
+        )
+        comments = batch.submit(
+            lambda: list(comment_list[:threshold + 1])
+        )
+    post = post.result()
+    comments = comments.result()
+    is_archived = post is None
+    if is_archived:
+        post = get_object_or_404(ArchivedPost.objects.with_id(post_id))
+        comment_list = (
+            ArchivedComment.objects.of_post(post.pk).select_related('author')
+            .order_by('pk')
+        )
+        comments = list(comment_list[:threshold + 1])
+    # автор известен только теперь: у архивного поста его нет среди
+    # горячих, а считать нужно и архив
+    author_posts_count = with_archive(
+        Post.objects.of_author(post.author),
+        ArchivedPost.objects.of_author(post.author),
+    ).count()
+    attach_likes([post])
     form = CommentForm()
     context = {
         'post': post,
         'form': form,
-        'comments': post.comments.all(),
+        'comments': comments,
+        'author_posts_count': author_posts_count,
+        'is_archived': is_archived,
+        'liked': (
+            request.user.is_authenticated
+            and has_liked(request.user.pk, post.pk)
+        ),
     }
-    return render(request, 'posts/post_detail.html', context)
+    if len(comments) <= threshold:
+        return render(request, 'posts/post_detail.html', context)
+    return render_comments_stream(
+        request,
+        'posts/post_detail.html',
+        context,
+        comments,
+        comment_list[threshold + 1:],
+    )
+
+
+def render_comments_stream(request, template_name, context, first, rest):
+    """Отдаёт страницу потоком: шапка и пост уходят до списка комментариев."""
+    context['stream_comments'] = COMMENTS_MARKER
+    head, tail = render_to_string(
+        template_name, context, request
+    ).split(COMMENTS_MARKER, 1)
+    chunk_size = settings.POST_DETAIL_STREAM_CHUNK
+
+    def render_comments(comments):
+        return render_to_string(
+            'includes/comment_list.html', {'comments': comments}
+        )
+
+    def content():
+        yield head
+        yield render_comments(first)
+        chunk = []
+        for comment in rest.iterator(chunk_size=chunk_size):
+            chunk.append(comment)
+            if len(chunk) == chunk_size:
+                yield render_comments(chunk)
+                chunk = []
+        if chunk:
+            yield render_comments(chunk)
+        yield tail
+
+    return StreamingHttpResponse(content())
 
 
 @login_required
+@ratelimit('post_create')
 def post_create(request):
     form = PostForm(request.POST or None, files=request.FILES or None,)
     user = request.user
@@ -77,14 +197,22 @@ def post_create(request):
     new_post = form.save(commit=False)
     new_post.author = user
     new_post.save()
+    if new_post.status != PUBLISHED:
+        return redirect('posts:drafts')
+    enqueue_post(new_post)
     return redirect('posts:profile', user.username)
 
 
 @login_required
 def post_edit(request, post_id):
-    post = get_object_or_404(Post, id=post_id)
+    post = get_object_or_404(
+        Post.all_objects.with_id(post_id).filter(is_deleted=False)
+    )
     if post.author != request.user:
         return redirect('posts:post_detail', post_id)
+    # is_valid() записывает новые данные в post, старый текст нужен
+    # для истории правок
+    old_text = post.text
     form = PostForm(
         request.POST or None,
         files=request.FILES or None,
@@ -96,29 +224,105 @@ def post_edit(request, post_id):
     }
     if form.is_valid():
         form.save()
+        record_edit(post, old_text)
+        if form.published_now:
+            announce([post])
+        if post.status != PUBLISHED:
+            return redirect('posts:drafts')
         return redirect('posts:post_detail', post_id)
     return render(request, 'posts/create_post.html', context)
 
 
 @login_required
+def drafts(request):
+    post_list = Post.all_objects.of_author(request.user).filter(
+        is_deleted=False, status__in=(DRAFT, SCHEDULED)
+    ).order_by('status', 'pub_date')
+    context = {
+        'posts': post_list,
+    }
+    return render(request, 'posts/drafts.html', context)
+
+
+@login_required
+def post_history(request, post_id):
+    post = get_object_or_404(Post.objects.with_id(post_id))
+    # в старых версиях может быть то, что автор убрал из поста
+    if post.author_id != request.user.pk:
+        return redirect('posts:post_detail', post_id)
+    revisions = recent_revisions(post_id)
+    version = request.GET.get('version')
+    text = None
+    if version and version.isdigit():
+        text = revision_text(post_id, int(version))
+        if text is None:
+            raise Http404('Такой версии нет')
+    context = {
+        'post': post,
+        'revisions': revisions,
+        'version': version,
+        'text': text,
+    }
+    return render(request, 'posts/post_history.html', context)
+
+
+@login_required
+@require_POST
+@ratelimit('like')
+def post_like(request, post_id):
+    epoch = likes_epoch(post_id)
+    if epoch is None:
+        raise Http404('Такого поста нет')
+    like(request.user, post_id, epoch)
+    return redirect('posts:post_detail', post_id=post_id)
+
+
+@login_required
+@require_POST
+@ratelimit('like')
+def post_unlike(request, post_id):
+    epoch = likes_epoch(post_id)
+    if epoch is None:
+        raise Http404('Такого поста нет')
+    unlike(request.user, post_id, epoch)
+    return redirect('posts:post_detail', post_id=post_id)
+
+
+@login_required
+@ratelimit('add_comment')
 def add_comment(request, post_id):
-    post = get_object_or_404(Post, pk=post_id)
+    post = get_object_or_404(Post.objects.with_id(post_id))
     form = CommentForm(request.POST or None)
     if form.is_valid():
         comment = form.save(commit=False)
         comment.author = request.user
         comment.post = post
         comment.save()
+        enqueue_comment(comment)
     return redirect('posts:post_detail', post_id=post_id)
 
 
 @login_required
 def follow_index(request):
     user = request.user
-    post_list = Post.objects.filter(author__following__user=user)
+    authors = Follow.objects.filter(user=user).values_list('author')
+    shards = None
+    if sharding.is_enabled():
+        authors = [pk for pk, in authors]
+        shards = sorted({sharding.shard_for_author(pk) for pk in authors})
+    post_list = with_archive(
+        Post.objects.filter(author__in=authors).select_related(
+            'author', 'group'
+        ),
+        ArchivedPost.objects.filter(author__in=authors).select_related(
+            'author', 'group'
+        ),
+        databases=shards,
+    )
     paginator = Paginator(post_list, POSTS_PER_PAGE)
     page_number = request.GET.get('page')
     page_obj = paginator.get_page(page_number)
+    page_obj.object_list = attach_likes(page_obj)
     context = {
         'page_obj': page_obj
     }
@@ -126,17 +330,45 @@ def follow_index(request):
 
 
 @login_required
+@ratelimit('follow', methods=None)
 def profile_follow(reqeust, username):
     user = reqeust.user
-    author = get_object_or_404(User, username=username)
+    author = get_user_or_404(username)
     if user != author:
         Follow.objects.get_or_create(author=author, user=user,)
     return redirect('posts:follow_index')
 
 
 @login_required
+@ratelimit('follow', methods=None)
 def profile_unfllow(request, username):
-    author = get_object_or_404(User, username=username)
+    author = get_user_or_404(username)
     if author != request.user:
         Follow.objects.filter(user=request.user, author=author).delete()
     return redirect('posts:follow_index')
+
+
+def live_response(channels):
+    response = StreamingHttpResponse(
+        event_stream(channels), content_type='text/event-stream'
+    )
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+def live_index(request):
+    return live_response(['index'])
+
+
+def live_group(request, slug):
+    group = get_group_or_404(slug)
+    return live_response([f'group:{group.pk}'])
+
+
+@login_required
+def live_follow(request):
+    authors = Follow.objects.filter(user=request.user).values_list(
+        'author', flat=True
+    )
+    return live_response([f'author:{pk}' for pk in authors])
@@ -0,0 +1,55 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.http import Http404
+
+User = get_user_model()
+
+# Общий кеш: после сохранения пользователя в одном процессе остальные
+# не должны видеть старую копию (пароль, is_active, is_staff).
+cache = caches['shared']
+
+
+def id_key(user_id):
+    return f'user:id:{user_id}'
+
+
+def username_key(username):
+    return f'user:username:{username}'
+
+
+def get_user(user_id):
+    """Пользователь по id из кеша, при промахе — из БД."""
+    user = cache.get(id_key(user_id))
+    if user is None:
+        user = User.objects.filter(pk=user_id).first()
+        if user is not None:
+            cache.set(id_key(user_id), user, settings.USER_CACHE_TIMEOUT)
+    return user
+
+
+def get_user_by_username(username):
+    user_id = cache.get(username_key(username))
+    if user_id is not None:
+        user = get_user(user_id)
+        # после смены имени старый ключ ещё может указывать на этот id
+        if user is not None and user.username == username:
+            return user
+    user = User.objects.filter(username=username).first()
+    if user is not None:
+        cache.set_many(
+            {username_key(username): user.pk, id_key(user.pk): user},
+            settings.USER_CACHE_TIMEOUT,
+        )
+    return user
+
+
+def get_user_or_404(username):
+    user = get_user_by_username(username)
+    if user is None:
+        raise Http404('Пользователь не найден')
+    return user
+
+
+def invalidate_user(user):
+    cache.delete_many([id_key(user.pk), username_key(user.username)])
@@ -0,0 +1,40 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth import hashers
+
+_executor = None
+
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.PASSWORD_HASHING_WORKERS,
+            thread_name_prefix='hashing',
+        )
+    return _executor
+
+
+def run_hashing(func, *args):
+    if not settings.PASSWORD_HASHING_WORKERS:
+        return func(*args)
+    return get_executor().submit(func, *args).result()
+
+
+class PBKDF2PasswordHasher(hashers.PBKDF2PasswordHasher):
+    """PBKDF2 с числом итераций из PASSWORD_HASH_ITERATIONS.
+
+    Хеш считается в пуле из PASSWORD_HASHING_WORKERS потоков: hashlib
+    отпускает GIL, поэтому одновременно хешей считается не больше, чем
+    потоков в пуле, а лишние входы ждут своей очереди, не отнимая
+    процессор у остальных запросов. Пароли, захешированные с другим
+    числом итераций, пересчитываются при следующем входе.
+    """
+
+    @property
+    def iterations(self):
+        return settings.PASSWORD_HASH_ITERATIONS
+
+    def encode(self, password, salt, iterations=None):
+        return run_hashing(super().encode, password, salt, iterations)
@@ -0,0 +1,54 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth import authenticate, get_user_model
+from django.contrib.auth.hashers import identify_hasher
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+User = get_user_model()
+PASSWORD = 'bench-password'
+
+
+class Command(BaseCommand):
+    help = 'Измеряет число входов в секунду на ядро'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--logins', type=int, default=200)
+        parser.add_argument('--clients', type=int, default=os.cpu_count())
+
+    def handle(self, *args, **options):
+        user, _ = User.objects.get_or_create(username='bench_login')
+        user.set_password(PASSWORD)
+        user.save()
+        try:
+            rate = self.measure(options['logins'], options['clients'])
+            user.refresh_from_db()
+            iterations = identify_hasher(user.password).safe_summary(
+                user.password
+            )['iterations']
+        finally:
+            user.delete()
+        cores = os.cpu_count() or 1
+        self.stdout.write(
+            f'{rate:.1f} входов/с, {rate / cores:.1f} на ядро '
+            f'({cores} ядер, {iterations} итераций PBKDF2)'
+        )
+
+    def measure(self, logins, clients):
+        def login(_):
+            try:
+                return authenticate(
+                    username='bench_login', password=PASSWORD
+                )
+            finally:
+                connection.close()
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=clients) as executor:
+            results = list(executor.map(login, range(logins)))
+        elapsed = time.perf_counter() - started
+        if not all(results):
+            self.stderr.write('Часть входов не удалась')
+        return logins / elapsed
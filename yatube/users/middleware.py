@@ -0,0 +1,41 @@
+from django.conf import settings
+from django.contrib.auth import (
+    BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY, load_backend,
+)
+from django.contrib.auth.middleware import AuthenticationMiddleware
+from django.contrib.auth.models import AnonymousUser
+from django.utils.crypto import constant_time_compare
+from django.utils.functional import SimpleLazyObject
+
+from users.cache import User, get_user
+
+
+def get_session_user(request):
+    """То же, что django.contrib.auth.get_user, но пользователь из кеша."""
+    try:
+        user_id = User._meta.pk.to_python(request.session[SESSION_KEY])
+        backend_path = request.session[BACKEND_SESSION_KEY]
+    except KeyError:
+        return AnonymousUser()
+    if backend_path not in settings.AUTHENTICATION_BACKENDS:
+        return AnonymousUser()
+    user = get_user(user_id)
+    backend = load_backend(backend_path)
+    can_authenticate = getattr(backend, 'user_can_authenticate', None)
+    if user is None or can_authenticate and not can_authenticate(user):
+        return AnonymousUser()
+    session_hash = request.session.get(HASH_SESSION_KEY)
+    if not session_hash or not constant_time_compare(
+        session_hash, user.get_session_auth_hash()
+    ):
+        request.session.flush()
+        return AnonymousUser()
+    return user
+
+
+class CachedAuthenticationMiddleware(AuthenticationMiddleware):
+    """request.user без запроса к БД, пока пользователь есть в кеше."""
+
+    def process_request(self, request):
+        super().process_request(request)
+        request.user = SimpleLazyObject(lambda: get_session_user(request))
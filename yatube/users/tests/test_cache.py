@@ -0,0 +1,92 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache, caches
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from users.cache import get_user, get_user_by_username, id_key
+
+User = get_user_model()
+
+
+class UserCacheTests(TestCase):
+    databases = '__all__'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='auth')
+
+    def setUp(self):
+        cache.clear()
+        caches['shared'].clear()
+
+    def test_warm_lookup_without_queries(self):
+        """Повторный поиск по имени и id не читает таблицу пользователей"""
+        get_user_by_username('auth')
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(get_user_by_username('auth'), self.user)
+            self.assertEqual(get_user(self.user.pk), self.user)
+        self.assertFalse(
+            [query for query in queries if 'auth_user' in query['sql']]
+        )
+
+    def test_save_invalidates(self):
+        """Сохранение пользователя сбрасывает кеш"""
+        get_user_by_username('auth')
+        self.user.first_name = 'Лев'
+        self.user.save()
+        self.assertEqual(get_user(self.user.pk).first_name, 'Лев')
+
+    def test_renamed_user_not_found_by_old_name(self):
+        """После смены имени старое имя не находит пользователя"""
+        get_user_by_username('auth')
+        user = User.objects.get(pk=self.user.pk)
+        user.username = 'renamed'
+        user.save()
+        self.assertIsNone(get_user_by_username('auth'))
+        self.assertEqual(get_user_by_username('renamed'), user)
+
+
+class CachedAuthenticationTests(TestCase):
+    databases = '__all__'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='auth')
+
+    def setUp(self):
+        cache.clear()
+        caches['shared'].clear()
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def test_request_user_from_cache(self):
+        """Пользователь запроса берётся из кеша"""
+        url = reverse('posts:profile', kwargs={'username': 'auth'})
+        self.client.get(url)
+        response = self.client.get(url)
+        self.assertEqual(response.context['user'], self.user)
+        self.assertEqual(response.context['author'], self.user)
+
+    def test_password_change_logs_out(self):
+        """Смена пароля завершает старые сессии"""
+        user = User.objects.get(pk=self.user.pk)
+        user.set_password('new-password')
+        user.save()
+        response = self.client.get(reverse('posts:post_create'))
+        self.assertEqual(response.status_code, 302)
+
+    def test_stale_copy_in_process_cache_ignored(self):
+        """Старая копия пользователя в памяти процесса не продлевает сессию"""
+        url = reverse('posts:post_create')
+        self.client.get(url)
+        stale = User.objects.get(pk=self.user.pk)
+        user = User.objects.get(pk=self.user.pk)
+        user.set_password('new-password')
+        user.save()
+        # так пользователя помнил бы другой процесс с кешем в памяти
+        cache.set(id_key(user.pk), stale)
+        self.assertEqual(self.client.get(url).status_code, 302)
+        self.client.login(username='auth', password='new-password')
+        self.assertEqual(self.client.get(url).status_code, 200)
@@ -0,0 +1,41 @@
+import threading
+
+from django.contrib.auth import authenticate, get_user_model
+from django.contrib.auth.hashers import identify_hasher
+from django.test import TestCase, override_settings
+
+from users import hashers
+
+User = get_user_model()
+
+
+def iterations(encoded):
+    return int(identify_hasher(encoded).safe_summary(encoded)['iterations'])
+
+
+@override_settings(PASSWORD_HASH_ITERATIONS=1000)
+class PasswordHasherTests(TestCase):
+    databases = '__all__'
+
+    def test_iterations_from_settings(self):
+        """Число итераций берётся из настроек"""
+        user = User.objects.create_user(username='auth', password='secret')
+        self.assertEqual(iterations(user.password), 1000)
+
+    def test_rehash_on_login(self):
+        """При входе пароль пересчитывается с новыми параметрами"""
+        User.objects.create_user(username='auth', password='secret')
+        with override_settings(PASSWORD_HASH_ITERATIONS=1200):
+            user = authenticate(username='auth', password='secret')
+        user.refresh_from_db()
+        self.assertEqual(iterations(user.password), 1200)
+
+    def test_hashing_runs_in_pool(self):
+        """Хеш считается в потоке пула"""
+        names = []
+
+        def encode(*args):
+            names.append(threading.current_thread().name)
+
+        hashers.run_hashing(encode)
+        self.assertTrue(names[0].startswith('hashing'))
@@ -0,0 +1,16 @@
+"""
+ASGI config for yatube project.
+
+It exposes the ASGI callable as a module-level variable named ``application``.
+Views still run synchronously, in the thread pool of core.asgi.WsgiToAsgi.
+"""
+
+import os
+
+from django.core.wsgi import get_wsgi_application
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
+
+from core.asgi import WsgiToAsgi  # noqa: E402
+
+application = WsgiToAsgi(get_wsgi_application())
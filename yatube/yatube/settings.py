@@ -46,15 +46,18 @@ INSTALLED_APPS = [
     'django.contrib.messages',
     'django.contrib.staticfiles',
     'about.apps.AboutConfig',
+    'notifications.apps.NotificationsConfig',
     'sorl.thumbnail',
 ]
 
 MIDDLEWARE = [
+    'core.middleware.QueryStatsMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'core.middleware.CompressionMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
-    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'users.middleware.CachedAuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -63,12 +66,20 @@ ROOT_URLCONF = 'yatube.urls'
 
 STATICFILES_DIRS = (os.path.join(BASE_DIR, 'static'),)
 
+TEMPLATE_LOADERS = [
+    'django.template.loaders.filesystem.Loader',
+    'django.template.loaders.app_directories.Loader',
+]
+
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
         'DIRS': [os.path.join(BASE_DIR, 'templates')],
-        'APP_DIRS': True,
         'OPTIONS': {
+            # без DEBUG шаблоны компилируются один раз на процесс
+            'loaders': TEMPLATE_LOADERS if DEBUG else [
+                ('core.template_cache.ReloadingCachedLoader', TEMPLATE_LOADERS),
+            ],
             'context_processors': [
                 'django.template.context_processors.debug',
                 'django.template.context_processors.request',
@@ -80,19 +91,66 @@ TEMPLATES = [
     },
 ]
 
+# Прогрев всех шаблонов при старте и проверка изменённых файлов
+# не чаще раза в TEMPLATES_RELOAD_INTERVAL секунд (None — не проверять).
+TEMPLATES_WARMUP = not DEBUG
+TEMPLATES_RELOAD_INTERVAL = 2
+
 WSGI_APPLICATION = 'yatube.wsgi.application'
 
+ASGI_APPLICATION = 'yatube.asgi.application'
+
+# Потоки, в которых ASGI-обёртка выполняет синхронные представления.
+ASGI_THREADS = 8
+
+# Пул для параллельных независимых запросов внутри представления
+# (core.concurrent.QueryBatch), 0 — выполнять запросы последовательно.
+QUERY_EXECUTOR_THREADS = 8
+
 
 # Database
 # https://docs.djangoproject.com/en/2.2/ref/settings/#databases
 
+# Тестовые базы — файлы, чтобы их можно было сохранять между запусками
+# и копировать для параллельных процессов (см. core.test_runner).
+# SERIALIZE выключен: serialized_rollback в тестах не используется.
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+        'TEST': {
+            'NAME': os.path.join(BASE_DIR, 'test_db.sqlite3'),
+            'SERIALIZE': False,
+        },
     }
 }
 
+# Шардирование постов и комментариев по author_id.
+# POST_SHARDS=2 создаст шарды shard_0 и shard_1 (отдельные файлы SQLite),
+# пустой список оставляет все посты в default.
+POST_SHARDS = [
+    f'shard_{number}' for number in range(int(os.getenv('POST_SHARDS', 0)))
+]
+for alias in POST_SHARDS:
+    DATABASES[alias] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.path.join(BASE_DIR, f'db_{alias}.sqlite3'),
+        'TEST': {
+            'NAME': os.path.join(BASE_DIR, f'test_db_{alias}.sqlite3'),
+            'SERIALIZE': False,
+        },
+    }
+
+DATABASE_ROUTERS = ['posts.sharding.ShardRouter']
+
+# manage.py test идёт параллельно по числу ядер и переиспользует
+# тестовые базы; в конце — TEST_TIMINGS_REPORT самых медленных модулей.
+TEST_RUNNER = 'core.test_runner.ParallelTestRunner'
+TEST_TIMINGS_REPORT = 10
+# Бюджеты времени рендеринга (core.testing.budgets) проверяются только
+# при BUDGET_RENDER_TIME=1: в параллельном прогоне время плавает.
+BUDGET_RENDER_TIME = bool(int(os.getenv('BUDGET_RENDER_TIME', 0)))
+
 
 # Password validation
 # https://docs.djangoproject.com/en/2.2/ref/settings/#auth-password-validators
@@ -112,6 +170,19 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# Первый хешер — для новых паролей, остальные проверяют старые хеши.
+PASSWORD_HASHERS = [
+    'users.hashers.PBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+]
+PASSWORD_HASH_ITERATIONS = int(
+    os.environ.get('PASSWORD_HASH_ITERATIONS', 150000)
+)
+# Потоки для хеширования паролей, 0 — хешировать в потоке запроса.
+PASSWORD_HASHING_WORKERS = os.cpu_count() or 1
+
 
 # Internationalization
 # https://docs.djangoproject.com/en/2.2/topics/i18n/
@@ -128,10 +199,33 @@ USE_TZ = True
 
 POSTS_PER_PAGE = 10
 
+# Страница поста с большим числом комментариев отдаётся потоком,
+# комментарии рендерятся кусками по POST_DETAIL_STREAM_CHUNK.
+POST_DETAIL_STREAM_COMMENTS = 200
+POST_DETAIL_STREAM_CHUNK = 100
+
+# Посты старше POSTS_ARCHIVE_AFTER_DAYS переносятся командой archive_posts
+# в архивные таблицы пачками по POSTS_ARCHIVE_BATCH_SIZE. Размер архива
+# для пагинации кешируется на POSTS_ARCHIVE_COUNT_TIMEOUT секунд.
+POSTS_ARCHIVE_AFTER_DAYS = 365
+POSTS_ARCHIVE_BATCH_SIZE = 500
+POSTS_ARCHIVE_COUNT_TIMEOUT = 60 * 60
+
 # Static files (CSS, JavaScript, Images)
 # https://docs.djangoproject.com/en/2.2/howto/static-files/
 
 STATIC_URL = '/static/'
+STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
+
+# collectstatic кладёт в STATIC_ROOT файлы с хешем в имени, без дублей,
+# с готовыми .gz/.br. STATIC_SERVE включает их раздачу самим Django
+# (core.views.serve_static) с Cache-Control: immutable.
+if not DEBUG:
+    STATICFILES_STORAGE = (
+        'core.staticfiles.CompressedManifestStaticFilesStorage'
+    )
+STATIC_SERVE = False
+STATIC_MAX_AGE = 60
 
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
@@ -142,11 +236,142 @@ LOGIN_URL = 'users:login'
 LOGIN_REDIRECT_URL = 'posts:index'
 LOGOUT_REDIRECT_URL = None
 
-EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
+# Письма складываются в очередь на диске, send_queued_mail отправляет их
+# через EMAIL_SPOOL_BACKEND (в бою — smtp) с повторами через
+# EMAIL_SPOOL_RETRY_DELAY * 2 ** (попытка - 1) секунд.
+EMAIL_BACKEND = 'core.mail.SpoolEmailBackend'
+EMAIL_SPOOL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
+EMAIL_SPOOL_DIR = os.path.join(BASE_DIR, 'mail_spool')
+EMAIL_SPOOL_BATCH = 100
+EMAIL_SPOOL_MAX_ATTEMPTS = 5
+EMAIL_SPOOL_RETRY_DELAY = 60
+EMAIL_SPOOL_POLL_INTERVAL = 5
+EMAIL_SPOOL_LOCK_TIMEOUT = 10 * 60
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
 
+# default — кеш в памяти процесса. В shared лежат ключи, которые
+# сбрасываются из других процессов (фоновых команд): версия лент,
+# счётчики непрочитанных уведомлений, пользователи и группы. Он должен быть
+# общим для всех процессов: таблица в БД (manage.py createcachetable),
+# а при наличии memcached или redis — они.
 CACHES = {
     'default': {
         'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
-    }
+    },
+    'shared': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'shared_cache',
+        'OPTIONS': {'MAX_ENTRIES': 100000},
+    },
 }
+
+# Пользователи по id и имени кешируются в shared, кеш сбрасывается
+# при сохранении.
+USER_CACHE_TIMEOUT = 60 * 60
+
+# Отложенные посты: publish_scheduled публикует их пачками.
+PUBLISH_BATCH_SIZE = 500
+PUBLISH_POLL_INTERVAL = 10
+
+# Группы по slug кешируются в shared, кеш сбрасывается при сохранении
+# и удалении группы.
+# Сводку для каталога групп пересчитывает refresh_group_stats.
+GROUP_CACHE_TIMEOUT = 60 * 60
+GROUPS_PER_PAGE = 30
+GROUP_STATS_TOP_AUTHORS = 3
+GROUP_STATS_REFRESH_INTERVAL = 10 * 60
+
+# Лайки: горячие счётчики в кеше разбиты на LIKES_COUNTER_SHARDS ключей,
+# flush_likes переносит их в БД пачками. Лайкнутые пользователем посты
+# кешируются компактным массивом id. Счётчик живёт LIKES_COUNTER_TIMEOUT
+# секунд — заведомо дольше, чем между сбросами. С кешем в памяти
+# процесса (LocMemCache) каждый процесс видит только свои несброшенные
+# лайки, для общих счётчиков нужен общий кеш (memcached, redis).
+LIKES_COUNTER_SHARDS = 8
+LIKES_COUNTER_TIMEOUT = 60 * 60
+LIKES_FLUSH_BATCH_SIZE = 1000
+LIKES_FLUSH_POLL_INTERVAL = 10
+LIKES_USER_CACHE_TIMEOUT = 5 * 60
+
+# История правок: полная копия текста каждые N версий, между ними —
+# сжатые разницы; тексты версий кешируются в default, список последних
+# версий — в shared. Историю видит только автор поста.
+POST_REVISION_CHECKPOINT_EVERY = 10
+POST_REVISIONS_RECENT = 10
+POST_REVISIONS_CACHE_TIMEOUT = 60 * 60
+
+# Задачи модерации: строк за одну транзакцию.
+MODERATION_BATCH_SIZE = 1000
+MODERATION_POLL_INTERVAL = 5
+# Удалённые модератором строки физически стирает purge_deleted.
+SOFT_DELETE_PURGE_AFTER_DAYS = 30
+
+# Админка не считает строки дальше этого предела, остальное листается
+# ссылкой «дальше» по ключу.
+ADMIN_COUNT_LIMIT = 10000
+
+# Живая лента (text/event-stream): очередь на подключение, пинг и время
+# жизни соединения в секундах, задержка переподключения браузера в мс.
+# Новые посты из всех процессов проходят через таблицу LiveEvent: хаб
+# процесса читает её раз в LIVE_POLL_INTERVAL секунд, события старше
+# LIVE_EVENT_TTL удаляются. Подключение занимает свой поток сервера
+# на всё время жизни, поэтому в процессе их не больше LIVE_MAX_STREAMS;
+# лишним браузер переподключается через LIVE_BUSY_RETRY_MS.
+LIVE_BUFFER_SIZE = 100
+LIVE_HEARTBEAT = 15
+LIVE_STREAM_TIMEOUT = 5 * 60
+LIVE_RETRY_MS = 3000
+LIVE_POLL_INTERVAL = 1
+LIVE_POLL_BATCH_SIZE = 500
+LIVE_EVENT_TTL = 10 * 60
+LIVE_MAX_STREAMS = 4
+LIVE_BUSY_RETRY_MS = 30 * 1000
+
+# Уведомления: события рассылает fanout_notifications пачками.
+# Ящик отдаёт последние NOTIFICATIONS_INBOX_SIZE уведомлений.
+NOTIFICATIONS_BATCH_SIZE = 500
+NOTIFICATIONS_POLL_INTERVAL = 2
+NOTIFICATIONS_CACHE_TIMEOUT = 5 * 60
+NOTIFICATIONS_INBOX_SIZE = 50
+
+# Сжатие ответов (brotli, если установлен, иначе gzip).
+COMPRESSION_ENABLED = True
+COMPRESSION_MIN_SIZE = 1024
+COMPRESSION_CONTENT_TYPES = (
+    'text/html',
+    'text/css',
+    'text/plain',
+    'application/javascript',
+    'application/json',
+    'image/svg+xml',
+)
+
+# Лимиты на запись: 'N/период' (s, m, h, d) по пользователю и по IP,
+# скользящим окном (core.ratelimit.consume). Общими для всех
+# процессов они будут только с общим кешем.
+RATELIMIT_ENABLED = True
+RATELIMIT_RATES = {
+    'post_create': '10/m',
+    'add_comment': '20/m',
+    'follow': '30/m',
+    'like': '60/m',
+}
+
+# Сессии: кеш + БД с отложенной записью изменений. Кеш SESSION_CACHE_ALIAS
+# и отложенная запись используются только с общим для процессов кешем,
+# с LocMemCache сессии читаются и пишутся прямо в БД. Без сервера кеша подойдёт и
+# 'django.contrib.sessions.backends.signed_cookies' — БД не нужна вовсе.
+# clearsessions удаляет истёкшие сессии пачками по SESSION_CLEANUP_BATCH.
+SESSION_ENGINE = 'core.sessions'
+SESSION_WRITE_BEHIND_BATCH = 100
+SESSION_WRITE_BEHIND_INTERVAL = 5
+SESSION_CLEANUP_BATCH = 1000
+
+# Статистика запросов к БД по отпечаткам SQL, представлениям и местам
+# вызова (core.querylog): файлы процессов в QUERY_STATS_DIR, выгрузка —
+# manage.py query_stats. Запросы дольше QUERY_SLOW_MS попадают в лог
+# с планом EXPLAIN.
+QUERY_STATS_ENABLED = os.getenv('QUERY_STATS', '') == '1'
+QUERY_STATS_DIR = os.path.join(BASE_DIR, 'query_stats')
+QUERY_STATS_FLUSH_INTERVAL = 60
+QUERY_SLOW_MS = 200
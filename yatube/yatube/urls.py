@@ -1,8 +1,10 @@
 from django.contrib import admin
-from django.urls import include, path
+from django.urls import include, path, re_path
 from django.conf import settings
 from django.conf.urls.static import static
 
+from core.views import serve_static
+
 
 urlpatterns = [
     path('', include('posts.urls', namespace='posts')),
@@ -10,10 +12,22 @@ urlpatterns = [
     path('auth/', include('users.urls')),
     path('auth/', include('django.contrib.auth.urls')),
     path('about/', include('about.urls', namespace='about')),
+    path(
+        'notifications/',
+        include('notifications.urls', namespace='notifications')
+    ),
 ]
 
 handler404 = 'core.views.page_not_found'
 
+if settings.STATIC_SERVE:
+    urlpatterns += [
+        re_path(
+            r'^{}(?P<path>.+)$'.format(settings.STATIC_URL.lstrip('/')),
+            serve_static,
+        ),
+    ]
+
 if settings.DEBUG:
     urlpatterns += static(
         settings.MEDIA_URL, document_root=settings.MEDIA_ROOT